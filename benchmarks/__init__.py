@@ -0,0 +1 @@
+"""Performance benchmarks for graphotype itself; run them with `python -m benchmarks.run`."""
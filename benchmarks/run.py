@@ -0,0 +1,163 @@
+"""Run the benchmark suite: `python -m benchmarks.run`.
+
+For each size in `--sizes`, a synthetic schema (see `benchmarks.schemas`)
+is built, measuring how long `make_schema` takes and how much memory it
+allocates (peak, and still allocated at the end), and how long the
+standard introspection query takes to execute against it, and to answer
+from the schema's cache once it's there; and the same for a lazy
+schema (see `graphotype.lazy`) serving one small query. Then the nested query of
+`benchmarks.starwars` is run in each execution mode of
+`graphotype.bench`.
+
+Results are written as JSON to `benchmarks/results/<commit>.json` (or
+`--output`); `--compare` with an earlier file prints the change in each
+number.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from graphql import parse
+from graphql.utils.introspection_query import introspection_query
+
+from graphotype import execute, make_schema
+from graphotype.bench import MODES, Operation, benchmark
+from graphotype.limits import MemoryMeasurement
+
+from . import schemas, starwars
+
+SIZES = (10, 100, 1000, 10000)
+RESULTS = os.path.join(os.path.dirname(__file__), 'results')
+
+LOWER_IS_BETTER = {'seconds', 'peak', 'allocated', 'p50', 'p95', 'p99'}
+HIGHER_IS_BETTER = {'throughput'}
+# changes for the worse smaller than this are taken to be noise
+THRESHOLD = 0.1
+
+def _median_time(f: Callable[[], Any], repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        f()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+def bench_make_schema(n: int, repeat: int) -> Dict[str, Dict[str, Any]]:
+    module = schemas.load(schemas.generate(n), f'benchmarks.synthetic{n}')
+    seconds = _median_time(lambda: make_schema(module.Query), repeat)
+    memory = MemoryMeasurement()
+    memory.start()
+    schema = make_schema(module.Query)
+    usage = memory.stop()
+    types = len([name for name in schema.get_type_map() if not name.startswith('__')])
+    executed = make_schema(module.Query, introspection='execute')
+    def introspect(schema: Any) -> None:
+        result = execute(schema, introspection_query)
+        assert not result.errors, result.errors
+    # fill the cache
+    introspect(schema)
+    def lazy() -> Any:
+        schema = make_schema(module.Query, lazy=True)
+        result = execute(schema, '{ object0 { id name } }', root=module.Query())
+        assert not result.errors, result.errors
+        return schema
+    lazy_seconds = _median_time(lazy, repeat)
+    memory.start()
+    lazy_schema = lazy()
+    lazy_usage = memory.stop()
+    return {
+        f'make_schema[{n}]': {'types': types, 'seconds': seconds, 'peak': usage['peak'], 'allocated': usage['allocated']},
+        f'introspection[{n}]': {'seconds': _median_time(lambda: introspect(executed), repeat)},
+        f'cached_introspection[{n}]': {'seconds': _median_time(lambda: introspect(schema), repeat)},
+        f'lazy_first_query[{n}]': {
+            'types': len([name for name in lazy_schema._type_map if not name.startswith('__')]), 'seconds': lazy_seconds, 'peak': lazy_usage['peak'], 'allocated': lazy_usage['allocated']
+        },
+    }
+
+def bench_starwars(requests: int, concurrency: int) -> Dict[str, Dict[str, Any]]:
+    operation = Operation('starwars', parse(starwars.QUERY), 'NestedFriends', {'episode': 'EMPIRE'})
+    results = {}
+    for mode in MODES:
+        [m] = benchmark(starwars.schema, [operation], requests=requests, concurrency=concurrency, mode=mode)
+        assert not m.errors
+        results[f'starwars[{mode}]'] = dict(
+            throughput=m.throughput, **m.percentiles(), nodes=m.nodes, peak=m.peak
+        )
+    return results
+
+def commit() -> str:
+    """The current git commit, with '+' if there are uncommitted changes."""
+    try:
+        head = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True)
+        status = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+    return head.stdout.strip() + ('+' if status.stdout.strip() else '')
+
+def run(sizes: List[int], repeat: int = 3, requests: int = 200, concurrency: int = 4) -> Dict[str, Any]:
+    results: Dict[str, Dict[str, Any]] = {}
+    for n in sizes:
+        results.update(bench_make_schema(n, repeat))
+    results.update(bench_starwars(requests, concurrency))
+    import graphql
+    return {
+        'commit': commit(),
+        'time': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'graphql-core': graphql.__version__,
+        'benchmarks': results,
+    }
+
+def compare(old: Dict[str, Any], new: Dict[str, Any]) -> str:
+    """A table of the change in every number from `old` to `new`, marking
+    changes for the worse by more than THRESHOLD with '!'."""
+    rows = [['benchmark', 'metric', old['commit'], new['commit'], 'change']]
+    for name, metrics in new['benchmarks'].items():
+        before = old['benchmarks'].get(name, {})
+        for metric, value in metrics.items():
+            previous = before.get(metric)
+            if not isinstance(value, (int, float)) or not isinstance(previous, (int, float)) or not previous:
+                continue
+            change = (value - previous) / previous
+            worse = (
+                metric in LOWER_IS_BETTER and change > THRESHOLD
+                or metric in HIGHER_IS_BETTER and change < -THRESHOLD
+            )
+            rows.append([name, metric, f'{previous:.4g}', f'{value:.4g}', f"{change:+.1%}{' !' if worse else ''}"])
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    return '\n'.join('  '.join(cell.ljust(width) for cell, width in zip(row, widths)) for row in rows) + '\n'
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description='Benchmark graphotype.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(SIZES), help='Synthetic schema sizes, in types')
+    parser.add_argument('--repeat', type=int, default=3, help='Times to build and introspect each schema')
+    parser.add_argument('--requests', type=int, default=200, help='Executions of the nested query per mode')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('-o', '--output', help='Where to write the results (default: benchmarks/results/<commit>.json)')
+    parser.add_argument('--compare', help='Results of an earlier run to compare with')
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, args.repeat, args.requests, args.concurrency)
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS, exist_ok=True)
+        output = os.path.join(RESULTS, f"{results['commit']}.json")
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f'Wrote {output}', file=sys.stderr)
+    if args.compare:
+        with open(args.compare) as f:
+            sys.stdout.write(compare(json.load(f), results))
+    else:
+        json.dump(results['benchmarks'], sys.stdout, indent=2)
+        print()
+
+if __name__ == '__main__':
+    main()
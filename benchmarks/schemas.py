@@ -0,0 +1,102 @@
+"""Synthetic graphotype schemas of any size.
+
+`generate(n)` writes the source of a module defining about `n` GraphQL
+types, the way an application would, and `load` imports it. The types are
+a mix of:
+
+- interfaces, in chains `depth` deep, each extending the one before;
+- objects, most of them implementing the last interface of a chain, with
+  scalar and NewType attributes and a method taking an input object and
+  returning another object;
+- unions of up to `union_width` objects;
+- NewTypes of str, which become custom scalars;
+- input dataclasses, some nesting others.
+
+Every object and union is a field of `Query`, so they all end up in the
+schema. The same `n` and `seed` always give the same module.
+"""
+import random
+import sys
+import types
+from typing import List
+
+def generate(n: int, seed: int = 0, depth: int = 8, union_width: int = 16) -> str:
+    """The source of a module defining about `n` types, and `Query`."""
+    rng = random.Random(seed)
+    n_interfaces = max(1, n // 10)
+    n_unions = max(1, n // 20)
+    n_newtypes = max(1, n // 20)
+    n_inputs = max(1, n // 5)
+    n_objects = max(2, n - n_interfaces - n_unions - n_newtypes - n_inputs)
+    lines: List[str] = [
+        # so that same-named types of different modules can't be confused,
+        # see benchmarks.starwars
+        'from __future__ import annotations',
+        '',
+        'from dataclasses import dataclass',
+        'from typing import List, NewType, Optional, Union',
+        '',
+        'from graphotype import Interface, Object',
+        '',
+    ]
+
+    for i in range(n_newtypes):
+        lines.append(f"Name{i} = NewType('Name{i}', str)")
+    lines.append('')
+
+    # chains[c] is the interfaces of chain c, outermost last
+    chains: List[List[str]] = []
+    for i in range(n_interfaces):
+        if i % depth == 0:
+            chains.append([])
+        chain = chains[-1]
+        base = chain[-1] if chain else 'Interface'
+        name = f'Interface{i}'
+        lines += [f'class {name}({base}):', f'    field{i}: int', '']
+        chain.append(name)
+
+    for i in range(n_inputs):
+        lines += [
+            '@dataclass',
+            f'class Input{i}:',
+            '    id: int',
+            f'    name: Optional[Name{rng.randrange(n_newtypes)}] = None',
+        ]
+        if i:
+            lines.append(f"    child: Optional[Input{rng.randrange(i)}] = None")
+        lines.append('')
+
+    for i in range(n_objects):
+        chain = rng.choice(chains) if rng.random() < 0.8 else []
+        bases = ['Object'] + chain[-1:]
+        lines.append(f"class Object{i}({', '.join(bases)}):")
+        for interface in chain:
+            lines.append(f"    field{interface[len('Interface'):]} = {i}")
+        lines += [
+            f'    id: int = {i}',
+            f"    name: Name{rng.randrange(n_newtypes)} = 'object{i}'",
+            f'    score: float = {rng.random():.3f}',
+            f'    tags: List[str] = []',
+            f"    def related(self, input: Input{rng.randrange(n_inputs)}) -> Optional[Object{rng.randrange(n_objects)}]:",
+            '        return None',
+            '',
+        ]
+
+    for i in range(n_unions):
+        members = rng.sample(range(n_objects), min(union_width, n_objects))
+        lines.append(f"Union{i} = Union[{', '.join(f'Object{m}' for m in members)}]")
+    lines.append('')
+
+    lines.append('class Query(Object):')
+    for i in range(n_objects):
+        lines.append(f"    object{i}: Optional[Object{i}] = None")
+    for i in range(n_unions):
+        lines.append(f"    union{i}: Optional[Union{i}] = None")
+    return '\n'.join(lines) + '\n'
+
+def load(source: str, name: str) -> types.ModuleType:
+    """Import `source` as the module `name`, replacing any module of that name."""
+    module = types.ModuleType(name)
+    sys.modules[name] = module
+    exec(compile(source, f'<{name}>', 'exec'), module.__dict__)
+    return module
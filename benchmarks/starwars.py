@@ -0,0 +1,96 @@
+"""A Star Wars schema like the one in tests/starwars, with many more
+characters, for measuring nested queries.
+
+Each of `CHARACTERS` characters has `FRIENDS` friends, so `QUERY` (friends
+of friends of friends of the hero) resolves some hundreds of objects, many
+of them more than once.
+"""
+# typing caches Optional['Character'] and the like, with the forward
+# reference already evaluated, across modules; string annotations keep this
+# module's Character from being mistaken for tests/starwars' one.
+from __future__ import annotations
+
+from dataclasses import dataclass
+import enum
+import random
+from typing import Dict, List, Optional
+
+from graphotype import Interface, Object, make_schema
+
+CHARACTERS = 1000
+FRIENDS = 5
+
+class Episode(enum.Enum):
+    NEWHOPE = 4
+    EMPIRE = 5
+    JEDI = 6
+
+@dataclass
+class Character(Interface):
+    id: str
+    name: Optional[str]
+    _friends: List[str]
+    appearsIn: Optional[List[Optional[Episode]]]
+
+    def friends(self) -> Optional[List[Optional[Character]]]:
+        return [characters[id] for id in self._friends]
+
+@dataclass
+class Human(Object, Character):
+    homePlanet: Optional[str]
+
+@dataclass
+class Droid(Object, Character):
+    primaryFunction: Optional[str]
+
+characters: Dict[str, Character] = {}
+
+def _populate(seed: int = 0) -> None:
+    rng = random.Random(seed)
+    ids = [str(1000 + i) for i in range(CHARACTERS)]
+    for i, id in enumerate(ids):
+        friends = rng.sample(ids, FRIENDS)
+        episodes = [e for e in Episode if rng.random() < 0.7]
+        if i % 3:
+            characters[id] = Human(id, f'Human {i}', friends, episodes, f'Planet {i % 17}')
+        else:
+            characters[id] = Droid(id, f'Droid {i}', friends, episodes, 'Astromech')
+
+_populate()
+
+class Query(Object):
+    def hero(self, episode: Optional[Episode] = None) -> Optional[Character]:
+        return characters['1000' if episode is None else str(1000 + episode.value)]
+
+    def human(self, id: str) -> Optional[Human]:
+        character = characters.get(id)
+        return character if isinstance(character, Human) else None
+
+    def droid(self, id: str) -> Optional[Droid]:
+        character = characters.get(id)
+        return character if isinstance(character, Droid) else None
+
+schema = make_schema(Query)
+
+QUERY = '''
+query NestedFriends($episode: Episode) {
+  hero(episode: $episode) {
+    id
+    name
+    friends {
+      name
+      appearsIn
+      friends {
+        name
+        ... on Human { homePlanet }
+        ... on Droid { primaryFunction }
+        friends {
+          id
+          name
+          appearsIn
+        }
+      }
+    }
+  }
+}
+'''
@@ -2,6 +2,7 @@ from collections import OrderedDict
 import dataclasses
 import enum
 import functools
+import threading
 from typing import (
     Type, Generic, List, Dict, TypeVar, Any, Callable,
     Union, NewType, Set, Optional, Iterable, FrozenSet
@@ -27,11 +28,19 @@ from graphql import (
     GraphQLInputObjectField,
     ResolveInfo
 )
-from graphql.type.definition import GraphQLNamedType
+from graphql.type.definition import GraphQLNamedType, get_named_type
+from graphql.type.introspection import IntrospectionSchema
 from graphql.language import ast
 
-from graphotype.types import AnnotationOrigin
+from graphotype.types import AnnotationOrigin, Connection, Context, Inject
 from . import types
+from .execution import CacheHint, EntityCache, EntityKey, Request, Schema, execute, inject
+from .lazy import LazyTypeMap, once
+from .live import invalidate
+from .metrics import Metrics
+from .processes import Offload, ProcessPool
+from . import connections, directives
+from .resources import ResourcePool
 
 class SchemaError(Exception):
     """Indicates that the supplied schema was invalid."""
@@ -43,6 +52,13 @@ BUILTIN_SCALARS: Dict[Type, GraphQLScalarType] = {
     bool: GraphQLBoolean
 }
 
+CONNECTION_ARGS = {
+    'first': GraphQLArgument(type=GraphQLInt),
+    'after': GraphQLArgument(type=GraphQLString),
+    'last': GraphQLArgument(type=GraphQLInt),
+    'before': GraphQLArgument(type=GraphQLString),
+}
+
 T = TypeVar('T')
 class Scalar(Generic[T]):
     t: Type[T]
@@ -58,6 +74,51 @@ class Scalar(Generic[T]):
 class Object:
     pass
 
+F = TypeVar('F', bound=Callable)
+def serial(f: F) -> F:
+    """Don't hand this method (or property getter) to the worker pool.
+
+    Only matters for schemas made with `execution='threads'`: the resolver
+    runs inline, on the thread that completed its parent object (for root
+    fields, the thread that called `execute`). Use it for resolvers that
+    aren't thread-safe or are too cheap to be worth the hand-off."""
+    f._graphotype_serial = True # type: ignore
+    return f
+
+def is_serial(f: Any) -> bool:
+    return getattr(f, '_graphotype_serial', False)
+
+def cpu_bound(
+    f: Optional[F] = None,
+    *,
+    timeout: Optional[float] = None,
+    fields: Optional[Iterable[str]] = None
+) -> Any:
+    """Run this method in a worker process; see `graphotype.processes`.
+
+    Use either as `@cpu_bound` or with options, e.g.
+    `@cpu_bound(timeout=5, fields=['points'])` (see `processes.Offload`).
+    Arguments, the parent object (or the listed `fields` of it) and the
+    result must be picklable."""
+    def mark(f: F) -> F:
+        f._graphotype_cpu_bound = Offload(timeout, list(fields) if fields is not None else None) # type: ignore
+        return f
+    return mark(f) if f is not None else mark
+
+def cache_hint(max_age: int, scope: str = 'public') -> Callable[[F], F]:
+    """Declare how long this method's (or property getter's) value may be cached.
+
+    A response may be cached for the shortest `max_age` of the fields it
+    contains, and only privately if any of them has `scope='private'`. Fields
+    without a hint that return objects have a max_age of 0, so that a
+    response is only cacheable if every object in it has been considered;
+    those returning scalars just go with their parent. See `Request.cache_policy`."""
+    hint = CacheHint(max_age, scope)
+    def mark(f: F) -> F:
+        f._graphotype_cache_hint = hint # type: ignore
+        return f
+    return mark
+
 class Interface:
     pass
 
@@ -112,53 +173,211 @@ def make_scalar_map(scalars: List[Type[Scalar]]) -> Dict[Type, GraphQLScalarType
         add_scalar_type(scalar)
     return result
 
+@dataclasses.dataclass
+class Translations:
+    """The GraphQL types SchemaCreators have translated Python types into,
+    and what went into translating them. Shared between the SchemaCreators
+    of a TypeRegistry which would translate the same way."""
+    py2gql_types: Dict[Type, GraphQLScalarType]
+    process_pool: ProcessPool
+    metrics: Optional[Metrics]
+    type_map: Dict[Type, GraphQLNamedType] = dataclasses.field(default_factory=dict)
+    # Object types with an `id: ID` field, see execution.EntityCache
+    entity_types: Dict[Type, str] = dataclasses.field(default_factory=dict)
+    # the Interface subclass each GraphQLInterfaceType was translated from
+    interfaces: Dict[GraphQLInterfaceType, Type[Interface]] = dataclasses.field(default_factory=dict)
+    # held while translating, and while running shared (or lazy) thunks
+    lock: threading.RLock = dataclasses.field(default_factory=threading.RLock)
+
+class TypeRegistry:
+    """Translated types for `make_schema` to reuse across schemas.
+
+    Pass the same registry to several `make_schema` calls (say, one schema
+    per API version or role, mostly made of the same classes) and each
+    class, enum, NewType and input dataclass is translated once: the
+    resulting GraphQL types, fields and resolvers are shared by every schema
+    reaching them. Only builds which would translate them the same way share
+    them, so builds with different `scalars`, `processes`, `metrics` or
+    `subscription` roots get types of their own.
+
+    Shared types must not be changed, and lazy schemas can't use a registry,
+    since their types would have to find their way into every schema's type
+    map as they're reached.
+    """
+    def __init__(self) -> None:
+        self._translations: Dict[Any, Translations] = {}
+        self._lock = threading.Lock()
+
+    def translations(
+        self,
+        scalars: List[Type[Scalar]],
+        processes: Optional[int],
+        metrics: Optional[Metrics],
+        subscription: Optional[Type[Object]],
+    ) -> Translations:
+        key = (frozenset(scalars), processes, metrics, subscription)
+        with self._lock:
+            if key not in self._translations:
+                self._translations[key] = Translations(make_scalar_map(scalars), ProcessPool(processes), metrics)
+            return self._translations[key]
+
 class SchemaCreator:
     def __init__(
         self,
         query: Type[Object],
         mutation: Optional[Type[Object]],
         scalars: List[Type[Scalar]],
+        subscription: Optional[Type[Object]] = None,
+        execution: str = 'sync',
+        max_workers: Optional[int] = None,
+        processes: Optional[int] = None,
+        metrics: Optional[Metrics] = None,
+        introspection: str = 'cache',
+        lazy: bool = False,
+        freeze: bool = False,
+        registry: Optional[TypeRegistry] = None,
     ) -> None:
-        self.py2gql_types = make_scalar_map(scalars)
-        self.type_map: Dict[Type, GraphQLNamedType] = {}
+        if lazy and freeze:
+            raise ValueError("A schema can't be both lazy and frozen")
+        if lazy and registry is not None:
+            raise ValueError("A lazy schema can't share types through a TypeRegistry")
+        if registry is None:
+            translations = Translations(make_scalar_map(scalars), ProcessPool(processes), metrics)
+        else:
+            translations = registry.translations(scalars, processes, metrics, subscription)
+        self.shared = registry is not None
+        self.py2gql_types = translations.py2gql_types
+        self.process_pool = translations.process_pool
+        self.metrics = translations.metrics
+        self.type_map = translations.type_map
+        self.entity_types = translations.entity_types
+        self.interfaces = translations.interfaces
+        self.lock = translations.lock
+        self.execution = execution
+        self.max_workers = max_workers
+        self.introspection = introspection
+        self.lazy = lazy
+        self.freeze = freeze
+        # the schema's types by name, if lazy or freezing; see graphotype.lazy
+        self.types: Optional[LazyTypeMap] = None
         self.query = query
         self.mutation = mutation
-
-    def build(self) -> GraphQLSchema:
-        query = self.translate_annotation_unwrapped(types.AClass(None, self.query, origin=None))
-        mutation = self.translate_annotation_unwrapped(types.AClass(None, self.mutation, origin=None)) if self.mutation else None
-        # Interface implementations may not have been explicitly referenced in
-        # the schema. But their interface must have been--so we want to
-        # traverse all interfaces, find their subclasses and explicitly supply
-        # them to the schema.
-        #
-        # To traverse all instances, we hackily construct a temporary schema,
-        # then check self.type_map to see what the schema found.
-        tmp_schema = GraphQLSchema(
+        self.subscription = subscription
+
+    def build(self) -> Schema:
+        if self.lazy:
+            return self.build_lazy()
+        if self.freeze:
+            return self.build_frozen()
+        # Other schemas' builds may be translating (and building fields of)
+        # shared types at the same time
+        with self.lock:
+            query = self.translate_annotation_unwrapped(types.AClass(None, self.query, origin=None))
+            mutation = self.translate_annotation_unwrapped(types.AClass(None, self.mutation, origin=None)) if self.mutation else None
+            subscription = self.translate_annotation_unwrapped(types.AClass(None, self.subscription, origin=None)) if self.subscription else None
+            # Interface implementations may not have been explicitly referenced in
+            # the schema. But their interface must have been--so we want to
+            # traverse all interfaces, find their subclasses and explicitly supply
+            # them to the schema.
+            #
+            # To traverse all instances, we hackily construct a temporary schema,
+            # then check its type map to see what the schema found. (Not
+            # self.type_map, which may have other schemas' types too.)
+            tmp_schema = GraphQLSchema(
+                query=query,
+                mutation=mutation,
+                subscription=subscription,
+            )
+            extra_types = []
+            for gt in list(tmp_schema.get_type_map().values()):
+                extra_types += self.implementations(gt)
+        return Schema(
             query=query,
             mutation=mutation,
+            subscription=subscription,
+            types=extra_types,
+            directives=directives.DIRECTIVES,
+            execution=self.execution,
+            max_workers=self.max_workers,
+            process_pool=self.process_pool,
+            metrics=self.metrics,
+            introspection=self.introspection,
         )
-        extra_types = []
-        for interface in list(self.type_map):
-            if isinstance(interface, type) and issubclass(interface, Interface):
-                for impl in interface.__subclasses__():
-                    ann = types.AClass(None, impl, origin=None)
-                    extra_types.append(self.translate_annotation_unwrapped(ann))
-        return GraphQLSchema(
+
+    def build_lazy(self) -> Schema:
+        """Build a schema of the roots alone, whose other types are translated
+        as they're reached; see graphotype.lazy."""
+        with self.lock:
+            self.types = LazyTypeMap([], self.lock, self.implementations)
+            query = self.translate_annotation_unwrapped(types.AClass(None, self.query, origin=None))
+            mutation = self.translate_annotation_unwrapped(types.AClass(None, self.mutation, origin=None)) if self.mutation else None
+            subscription = self.translate_annotation_unwrapped(types.AClass(None, self.subscription, origin=None)) if self.subscription else None
+            # (already translated by another schema's build, if shared)
+            for root in (query, mutation, subscription, IntrospectionSchema):
+                if root is not None:
+                    self.types.add(root)
+        return Schema(
             query=query,
             mutation=mutation,
-            types=extra_types
+            subscription=subscription,
+            directives=directives.DIRECTIVES,
+            execution=self.execution,
+            max_workers=self.max_workers,
+            process_pool=self.process_pool,
+            metrics=self.metrics,
+            introspection=self.introspection,
+            type_map=self.types,
         )
 
+    def build_frozen(self) -> Schema:
+        """Build every type up front, under the lock, then check the schema
+        and make its types read-only. The seconds each type's fields took to
+        build go in the schema's `build_timings`."""
+        timings: Dict[str, float] = {}
+        with self.lock:
+            schema = self.build_lazy()
+            assert self.types is not None
+            self.types.complete(timings)
+            try:
+                self.types.check()
+            except AssertionError as e:
+                raise SchemaError(str(e)) from e
+            self.types.freeze()
+        schema.build_timings = timings
+        return schema
 
     def translate_annotation(self, ann: types.Annotation) -> GraphQLNamedType:
-        if ann.t in self.type_map:
-            if isinstance(ann, types.AUnion):
-                self.check_union_name(ann)
-            return self.type_map[ann.t]
-        gt = self._translate_annotation_impl(ann)
-        self.type_map[ann.t] = gt
-        return gt
+        with self.lock:
+            if ann.t in self.type_map:
+                if isinstance(ann, types.AUnion):
+                    self.check_union_name(ann)
+                return self.type_map[ann.t]
+            gt = self._translate_annotation_impl(ann)
+            self.type_map[ann.t] = gt
+            self.register(ann.t, gt)
+            return gt
+
+    def register(self, t: Any, gt: GraphQLNamedType) -> None:
+        """Add a newly translated type to the lazy schema, if building one."""
+        if self.types is not None:
+            self.types.add(gt)
+
+    def implementations(self, gt: GraphQLNamedType) -> List[GraphQLNamedType]:
+        """The translated subclasses of `gt`'s class, if it's an interface.
+
+        Interface implementations needn't be referenced anywhere else, so
+        `build` looks for them in the types it found, and a LazyTypeMap as
+        it adds each interface."""
+        cls = self.interfaces.get(gt) if isinstance(gt, GraphQLInterfaceType) else None
+        if cls is None:
+            return []
+        return [self.translate_annotation_unwrapped(types.AClass(None, impl, origin=None)) for impl in cls.__subclasses__()]
+
+    def thunk(self, f: Callable[[], T]) -> Callable[[], T]:
+        """`f` as a thunk for graphql-core to run when it first needs it;
+        run only once, under the lock, if lazy (and so possibly during
+        concurrent operations), freezing or shared."""
+        return once(f, self.lock) if self.lazy or self.freeze or self.shared else f
 
     def _translate_annotation_impl(self, ann: types.Annotation) -> GraphQLNamedType:
         if isinstance(ann, types.AList):
@@ -171,9 +390,17 @@ class SchemaCreator:
             return GraphQLNonNull(self.map_union(ann))
         elif isinstance(ann, types.ANewType):
             return GraphQLNonNull(self.map_newtype(ann))
+        elif isinstance(ann, types.AConnection):
+            return GraphQLNonNull(self.map_connection(ann))
+        elif isinstance(ann, types.AInjected):
+            defined_at = f" (at {ann.origin.classname}.{ann.origin.fieldname})" if ann.origin else ""
+            raise SchemaError(f"Context[...] and Inject[...] may only annotate method parameters{defined_at}")
+        elif isinstance(ann, types.AStream):
+            defined_at = f" (at {ann.origin.classname}.{ann.origin.fieldname})" if ann.origin else ""
+            raise SchemaError(f"AsyncIterator[...] may only annotate the methods of the Subscription root{defined_at}")
         assert isinstance(ann, types.AClass)
         t = ann.t
-        if issubclass(t, Object):
+        if issubclass(t, Object) or t is connections.PageInfo:
             return GraphQLNonNull(self.map_type(t))
         elif issubclass(t, Interface):
             return GraphQLNonNull(self.map_interface(t))
@@ -200,26 +427,65 @@ class SchemaCreator:
         return GraphQLObjectType(
             name=cls.__name__,
             description=cls.__doc__,
-            fields=lambda: self.map_fields(cls),
-            interfaces=lambda: [self.translate_annotation_unwrapped(t) for t in interfaces],
+            fields=self.thunk(lambda: self.map_object_fields(cls)),
+            interfaces=self.thunk(lambda: [self.translate_annotation_unwrapped(t) for t in interfaces]),
             is_type_of=lambda obj, info: isinstance(obj, cls)
         )
 
+    def map_object_fields(self, cls: Type) -> Dict[str, GraphQLField]:
+        # No resolver runs before its type's fields are built, so this is
+        # soon enough for entity_key.
+        id_hint = types.get_annotations(cls).get('id')
+        if isinstance(id_hint, types.ANewType) and id_hint.t is ID:
+            self.entity_types[cls] = cls.__name__
+        return self.map_fields(cls)
+
+    def map_connection(self, ann: types.AConnection) -> GraphQLObjectType:
+        node_type = self.translate_annotation(ann.of_type)
+        named_type = getattr(node_type, 'of_type', node_type)
+        if not isinstance(named_type, GraphQLNamedType):
+            raise SchemaError(f"Connection items must be named types, not {named_type}")
+        # the two can't share a name, as their nodes' types differ
+        name = named_type.name if isinstance(node_type, GraphQLNonNull) else f'Nullable{named_type.name}'
+        page_info = self.translate_annotation(types.AClass(None, connections.PageInfo, origin=None))
+        edge = GraphQLObjectType(
+            name=f'{name}Edge',
+            fields={
+                'node': GraphQLField(node_type, resolver=self.property_resolver('node')),
+                'cursor': GraphQLField(GraphQLNonNull(GraphQLString), resolver=self.property_resolver('cursor')),
+            }
+        )
+        return GraphQLObjectType(
+            name=f'{name}Connection',
+            fields={
+                'edges': GraphQLField(
+                    GraphQLNonNull(GraphQLList(GraphQLNonNull(edge))),
+                    resolver=self.property_resolver('edges')
+                ),
+                'pageInfo': GraphQLField(
+                    page_info,
+                    resolver=self.property_resolver('pageInfo')
+                ),
+            }
+        )
+
     def map_enum(self, cls: Type[enum.Enum]) -> GraphQLEnumType:
         return WorkingEnumType(cls)
 
     def map_interface(self, cls: Type[Interface]) -> GraphQLInterfaceType:
-        return GraphQLInterfaceType(
+        gt = GraphQLInterfaceType(
             name=cls.__name__,
             description=cls.__doc__,
-            fields=lambda: self.map_fields(cls),
+            fields=self.thunk(lambda: self.map_fields(cls)),
         )
+        self.interfaces[gt] = cls
+        return gt
 
     def map_input(self, cls: Type) -> GraphQLInputObjectType:
         return GraphQLInputObjectType(
             name=cls.__name__,
             description=cls.__doc__,
-            fields=lambda: self.map_input_fields(cls),
+            fields=self.thunk(lambda: self.map_input_fields(cls)),
             container_type=lambda data: cls(**data) # type: ignore
         )
 
@@ -237,9 +503,9 @@ class SchemaCreator:
             # 3. a hardcoded value
             if hasattr(value, 'fget'):
                 # property
-                fields[name] = self.property_field(name, value)
+                fields[name] = self.property_field(name, value, cls.__name__)
             elif callable(value):
-                fields[name] = self.function_field(name, value)
+                fields[name] = self.function_field(name, value, cls.__name__)
             else:
                 if name in hints:
                     # explicitly annotated assignment; will be handled below
@@ -251,6 +517,11 @@ class SchemaCreator:
             if name.startswith('_'):
                 continue
             fields[name] = self.attribute_field(name, typ)
+        if cls is self.subscription:
+            for name, field in fields.items():
+                if not hasattr(field.resolver, 'subscribe'):
+                    raise SchemaError(f"""Subscription field '{name}' must be an async generator method.
+Suggestion: declare it as `async def {name}(self, ...) -> AsyncIterator[...]`.""")
         return fields
 
     def map_input_fields(self, cls: Type) -> Dict[str, GraphQLInputObjectField]:
@@ -263,34 +534,117 @@ Suggestion: add a type hint (e.g., ': {field.type or '<type>'} = ...' to your de
             fields[field.name] = GraphQLInputObjectField(type=self.translate_annotation(hints[field.name]))
         return fields
 
-    def property_field(self, name: str, p: property) -> GraphQLField:
+    def property_field(self, name: str, p: property, owner: Optional[str] = None) -> GraphQLField:
         return_type = types.get_annotations(p.fget)['return']
+        gql_type = self.translate_annotation(return_type)
         return GraphQLField(
-            self.translate_annotation(return_type),
+            gql_type,
             description=p.__doc__,
-            resolver=self.property_resolver(name)
+            resolver=self.wrap_resolver(
+                self.instrument(owner, name, self.property_resolver(name)),
+                memoize=True,
+                concurrent=not is_serial(p.fget),
+                streamable=types.is_lazy_list(return_type),
+                cache_hint=self.cache_hint(p.fget, gql_type)
+            )
         )
 
     def attribute_field(self, name: str, t: types.Annotation) -> GraphQLField:
+        gql_type = self.translate_annotation(t)
         return GraphQLField(
-            self.translate_annotation(t),
-            resolver=self.property_resolver(name)
+            gql_type,
+            resolver=self.wrap_resolver(
+                self.property_resolver(name),
+                memoize=False,
+                streamable=types.is_lazy_list(t),
+                cache_hint=self.cache_hint(None, gql_type)
+            )
         )
 
-    def function_field(self, name: str, f: Callable) -> GraphQLField:
+    def function_field(self, name: str, f: Callable, owner: Optional[str] = None) -> GraphQLField:
         hints = types.get_annotations(f)
         return_type = hints.pop('return')
+        # Context[...]/Inject[...] parameters aren't GraphQL arguments
+        injected: Dict[str, types.AInjected] = {}
+        for arg, t in list(hints.items()):
+            if isinstance(t, types.AInjected):
+                injected[arg] = t
+                del hints[arg]
+        # Connection[...] fields get pagination arguments instead of a Page
+        is_connection = isinstance(return_type, types.AConnection)
+        page_param: Optional[str] = None
+        if is_connection:
+            for arg, t in list(hints.items()):
+                if isinstance(t, types.AClass) and t.t is connections.Page:
+                    page_param = arg
+                    del hints[arg]
+                elif arg in CONNECTION_ARGS:
+                    raise SchemaError(f"""{types.type_repr(f)} returns a Connection, so it can't have a parameter named '{arg}'.
+Suggestion: declare a parameter annotated `graphotype.connections.Page` to receive the requested page.""")
+        offload: Optional[Offload] = getattr(f, '_graphotype_cpu_bound', None)
+        process_pool = self.process_pool
         def resolver(self_: Any, info: ResolveInfo, **gql_args: Any) -> Any:
             py_args = {}
-            for name, value in gql_args.items():
-                py_args[name] = value
-            return f(self_, **py_args)
+            page_args = {}
+            for arg, value in gql_args.items():
+                if is_connection and arg in CONNECTION_ARGS:
+                    page_args[arg] = value
+                else:
+                    py_args[arg] = value
+            for arg, ann in injected.items():
+                py_args[arg] = inject(info, ann)
+            def call(page: Optional[connections.Page] = None) -> Any:
+                if page_param is not None:
+                    py_args[page_param] = page
+                if offload is not None:
+                    return process_pool.call(f, self_, py_args, offload)
+                return f(self_, **py_args)
+            if is_connection:
+                return connections.resolve(call, page_param is not None, **page_args)
+            return call()
+        args = {
+            arg:
+            GraphQLArgument(type=self.translate_annotation(t))
+            for arg, t in hints.items()}
+        if is_connection:
+            args.update(CONNECTION_ARGS)
+        if isinstance(return_type, types.AStream):
+            return self.subscription_field(name, f, return_type, args, resolver)
+        gql_type = self.translate_annotation(return_type)
         return GraphQLField(
-            self.translate_annotation(return_type),
-            args={
-                name:
-                GraphQLArgument(type=self.translate_annotation(t))
-                for name, t in hints.items()},
+            gql_type,
+            args=args,
+            description=f.__doc__,
+            resolver=self.wrap_resolver(
+                self.instrument(owner, name, resolver),
+                memoize=True,
+                concurrent=not is_serial(f),
+                streamable=types.is_lazy_list(return_type),
+                cache_hint=self.cache_hint(f, gql_type),
+                shareable=not injected
+            )
+        )
+
+    def subscription_field(
+        self,
+        name: str,
+        f: Callable,
+        return_type: types.AStream,
+        args: Dict[str, GraphQLArgument],
+        subscribe: Callable,
+    ) -> GraphQLField:
+        """A field of the Subscription root, see `graphotype.subscriptions`.
+
+        `subscribe` starts the async iterator of events; the field itself
+        resolves to each event in turn, which is the root value."""
+        if self.subscription is None or getattr(self.subscription, name, None) is not f:
+            raise SchemaError(f"{types.type_repr(f)} returns an AsyncIterator, but only methods of the Subscription root may.")
+        def resolver(event: Any, info: ResolveInfo, **gql_args: Any) -> Any:
+            return event
+        resolver.subscribe = subscribe # type: ignore
+        return GraphQLField(
+            self.translate_annotation(return_type.of_type),
+            args=args,
             description=f.__doc__,
             resolver=resolver
         )
@@ -348,9 +702,90 @@ forward-referenced, e.g.:
     def property_resolver(self, name: str) -> Callable:
         return lambda self, info: getattr(self, name)
 
+    def entity_key(self, obj: Any) -> Optional[EntityKey]:
+        typename = self.entity_types.get(type(obj))
+        return None if typename is None else (typename, obj.id)
+
+    def instrument(self, owner: Optional[str], name: str, resolver: Callable) -> Callable:
+        """Wrap the resolver of `owner.name` to record metrics, if the schema
+        has any; otherwise leave it be."""
+        if self.metrics is None or owner is None:
+            return resolver
+        return self.metrics.instrument(owner, name, resolver)
+
+    def cache_hint(self, f: Optional[Callable], gql_type: Any) -> Optional[CacheHint]:
+        """The `@cache_hint` of `f`, defaulting to 0 for fields returning objects."""
+        hint = getattr(f, '_graphotype_cache_hint', None)
+        if hint is None and isinstance(
+            get_named_type(gql_type),
+            (GraphQLObjectType, GraphQLInterfaceType, GraphQLUnionType)
+        ):
+            return CacheHint(0)
+        return hint
+
+    def wrap_resolver(
+        self,
+        resolver: Callable,
+        memoize: bool,
+        concurrent: bool = False,
+        streamable: bool = False,
+        cache_hint: Optional[CacheHint] = None,
+        shareable: bool = True,
+    ) -> Callable:
+        """Route `resolver` through the Request, if `execute` provided one.
+
+        The Request deduplicates resolutions and consults the entity cache.
+        `memoize` says whether results may be remembered at all; it's
+        pointless for plain attributes, which only need canonicalizing.
+        `concurrent` allows PoolExecutor to run the resolver on a thread.
+        `streamable` allows `@stream` on the field. `cache_hint` goes into
+        the Request's cache policy whenever the field is resolved. Results
+        of resolvers that aren't `shareable` are only remembered per request."""
+        entity_key = self.entity_key
+        def wrapped(self_: Any, info: ResolveInfo, **gql_args: Any) -> Any:
+            request = info.context
+            if not isinstance(request, Request):
+                return resolver(self_, info, **gql_args)
+            return request.resolve(
+                entity_key, self_, info, gql_args,
+                lambda: resolver(self_, info, **gql_args),
+                memoize=memoize,
+                cache_hint=cache_hint,
+                shareable=shareable
+            )
+        wrapped.concurrent = concurrent # type: ignore
+        wrapped.streamable = streamable # type: ignore
+        return wrapped
+
 def make_schema(
     query: Type[Object],
     mutation: Optional[Type[Object]] = None,
     scalars: List[Type[Scalar]] = None,
-) -> GraphQLSchema:
-    return SchemaCreator(query, mutation, scalars or []).build()
+    subscription: Optional[Type[Object]] = None,
+    execution: str = 'sync',
+    max_workers: Optional[int] = None,
+    processes: Optional[int] = None,
+    metrics: Optional[Metrics] = None,
+    introspection: str = 'cache',
+    lazy: bool = False,
+    freeze: bool = False,
+    registry: Optional[TypeRegistry] = None,
+) -> Schema:
+    """Build the schema rooted at `query`, `mutation` and `subscription`.
+
+    `execution` and `max_workers` configure how `graphotype.execute` runs
+    operations against it, see `Schema`. `processes` is the number of worker
+    processes for `@cpu_bound` methods (default: one per CPU, 0 to run
+    them in-process). `metrics` instruments every resolver, see
+    `graphotype.metrics`. `introspection` says whether to answer the
+    standard introspection query from the schema's cached `introspect()`
+    result, execute it, or refuse it, see `Schema`. With `lazy`, types are
+    only translated once operations reach them, see `graphotype.lazy`. With
+    `freeze`, they're all translated and checked before this returns, and
+    can't be changed after; the schema's `build_timings` says how long each
+    took. `registry`, a `TypeRegistry`, shares translated types with other
+    schemas made with it."""
+    return SchemaCreator(
+        query, mutation, scalars or [], subscription, execution, max_workers, processes, metrics, introspection,
+        lazy, freeze, registry
+    ).build()
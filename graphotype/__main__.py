@@ -1,7 +1,9 @@
-from typing import IO, List, Tuple
+from typing import IO, Any, Dict, List, Optional, Tuple
 
 import argparse
 import importlib
+import os
+import sys
 
 from graphql import GraphQLSchema, graphql, build_ast_schema, parse as gql_parse
 from graphql.error.syntax_error import GraphQLSyntaxError
@@ -30,26 +32,149 @@ def _rename_type(s: str) -> Tuple[str, str]:
 
 
 def dump(schema: GraphQLSchema, json: bool, pretty: bool, file: IO[str]) -> None:
+    from .execution import Schema
     if json:
         import json as mjson
-        data = graphql(schema, introspection_query).data
+        if isinstance(schema, Schema):
+            data = schema.introspect()
+        else:
+            data = graphql(schema, introspection_query).data
         mjson.dump(
             {'data': data}, file, indent=2 if pretty else None
         )
     else:
-        file.write(print_schema(schema))
+        file.write(schema.print_schema() if isinstance(schema, Schema) else print_schema(schema))
 
-def serve(schema: GraphQLSchema, port: int) -> None:
+def _compression_level(s: str) -> Tuple[str, int]:
+    coding, level = s.split('=')
+    return coding, int(level)
+
+
+def serve(
+    schema: GraphQLSchema,
+    port: int,
+    stream: bool,
+    ws_port: Optional[int],
+    compress: bool,
+    compression_level: List[Tuple[str, int]],
+    compression_min_size: int,
+    trace_dir: Optional[str],
+    trace_extensions: bool,
+    trace_sample_rate: float,
+    slow_query_log: Optional[str],
+    slow_query_threshold: float,
+    max_nodes: Optional[int],
+    max_bytes: Optional[int],
+    memory_sample_rate: float,
+    record: Optional[str],
+    record_sample_rate: float,
+    record_redact: List[str],
+    block_introspection: bool,
+) -> None:
     try:
-        import flask
-        from flask_graphql import GraphQLView
+        from .server import make_app
     except ImportError:
         raise ImportError('flask_graphql must be installed')
-    app = flask.Flask('graphotype')
-    app.add_url_rule('/', view_func=GraphQLView.as_view(
-        'graphql', schema=schema, graphiql=True
-    ))
-    app.run(port=port)
+    from .compression import Compression
+    compression = Compression(
+        levels=dict(compression_level),
+        min_size=compression_min_size
+    ) if compress else None
+    from .querylog import SlowQueryLog
+    from .tracing import Tracer
+    tracer: Optional[Tracer] = None
+    if slow_query_log is not None:
+        tracer = SlowQueryLog(
+            slow_query_log,
+            threshold=slow_query_threshold,
+            directory=trace_dir,
+            extensions=trace_extensions
+        )
+    elif trace_dir is not None or trace_extensions:
+        tracer = Tracer(
+            sample_rate=trace_sample_rate,
+            directory=trace_dir,
+            extensions=trace_extensions
+        )
+    from .limits import Limits
+    limits = Limits(
+        max_nodes=max_nodes,
+        max_bytes=max_bytes,
+        memory_sample_rate=memory_sample_rate
+    ) if max_nodes is not None or max_bytes is not None or memory_sample_rate > 0 else None
+    if block_introspection:
+        from .execution import Schema
+        if not isinstance(schema, Schema):
+            raise ValueError('--block-introspection needs a schema made by graphotype.make_schema')
+        schema.introspection = 'block'
+    recorder = None
+    if record is not None:
+        import atexit
+        from .recording import Recorder
+        recorder = Recorder(record, sample_rate=record_sample_rate, redact=record_redact)
+        atexit.register(recorder.close)
+    if ws_port is not None:
+        from .websocket import serve_in_thread
+        serve_in_thread(schema, port=ws_port)
+    make_app(
+        schema, stream=stream, compression=compression, tracer=tracer, limits=limits, recorder=recorder
+    ).run(port=port)
+
+
+def _variables(s: str) -> List[Dict[str, Any]]:
+    import json
+    if os.path.exists(s):
+        with open(s) as f:
+            value = json.load(f)
+    else:
+        value = json.loads(s)
+    values = value if isinstance(value, list) else [value]
+    if not all(isinstance(v, dict) for v in values):
+        raise ValueError(f"{s} is not a JSON object or list of objects")
+    return values
+
+
+def bench(
+    schema: GraphQLSchema,
+    operations: List[str],
+    variables: List[List[Dict[str, Any]]],
+    requests: int,
+    concurrency: int,
+    mode: str,
+    warmup: int,
+    memory_samples: int,
+    json: bool,
+    file: IO[str],
+) -> None:
+    from .bench import benchmark, format_json, format_table, load_operations
+    measurements = benchmark(
+        schema,
+        load_operations(operations, [v for vs in variables for v in vs]),
+        requests=requests,
+        concurrency=concurrency,
+        mode=mode,
+        warmup=warmup,
+        memory_samples=memory_samples
+    )
+    file.write(format_json(measurements) if json else format_table(measurements))
+
+
+def replay(
+    schema: GraphQLSchema,
+    recording: str,
+    speed: float,
+    concurrency: int,
+    json: bool,
+    file: IO[str],
+) -> None:
+    import json as mjson
+    from .recording import compare, format_comparison, load, replay as replay_operations
+    comparisons = compare(replay_operations(schema, load(recording), speed=speed, concurrency=concurrency))
+    if json:
+        mjson.dump([c.to_dict() for c in comparisons], file, indent=2)
+        file.write('\n')
+    else:
+        file.write(format_comparison(comparisons))
 
 
 def import_schema(
@@ -133,8 +258,165 @@ def main(argv: List[str]) -> None:
     serve_parser = subparsers.add_parser('serve', help='Start a local GQL server')
     _add_schema_obj(serve_parser)
     serve_parser.add_argument('-p', '--port', type=int, default=8123)
+    serve_parser.add_argument(
+        '--stream',
+        action='store_true',
+        help='Stream responses with chunked transfer encoding as they are produced'
+    )
+    serve_parser.add_argument(
+        '--ws-port',
+        type=int,
+        help='Also serve subscriptions over WebSocket (graphql-transport-ws) on this port'
+    )
+    serve_parser.add_argument(
+        '--compress',
+        action='store_true',
+        help='Compress responses for clients which accept that'
+    )
+    serve_parser.add_argument(
+        '--compression-level',
+        type=_compression_level,
+        action='append',
+        default=[],
+        help='Compression level for a content coding (example: --compression-level gzip=9)'
+    )
+    serve_parser.add_argument(
+        '--compression-min-size',
+        type=int,
+        default=1024,
+        help='Send responses smaller than this many bytes uncompressed'
+    )
+    serve_parser.add_argument(
+        '--trace-dir',
+        help='Write traces of operations to this directory, as Chrome trace_event JSON'
+    )
+    serve_parser.add_argument(
+        '--trace-extensions',
+        action='store_true',
+        help='Include traces of operations in responses, as Apollo tracing extensions'
+    )
+    serve_parser.add_argument(
+        '--trace-sample-rate',
+        type=float,
+        default=1.0,
+        help='The fraction of operations to trace (default: all)'
+    )
+    serve_parser.add_argument(
+        '--slow-query-log',
+        help='Append operations slower than --slow-query-threshold to this file, as JSON lines. '
+        'Every operation is then traced, and --trace-dir only gets the slow ones'
+    )
+    serve_parser.add_argument(
+        '--slow-query-threshold',
+        type=float,
+        default=1.0,
+        help='Seconds (default: 1)'
+    )
+    serve_parser.add_argument(
+        '--max-nodes',
+        type=int,
+        help='Answer operations whose results have more fields and list items than this with an error'
+    )
+    serve_parser.add_argument(
+        '--max-bytes',
+        type=int,
+        help='Answer operations whose results are larger than this many bytes with an error'
+    )
+    serve_parser.add_argument(
+        '--memory-sample-rate',
+        type=float,
+        default=0.0,
+        help='The fraction of operations to measure allocations of with tracemalloc, '
+        'reported in extensions.usage (slow; for debugging)'
+    )
+    serve_parser.add_argument(
+        '--record',
+        help='Append operations to this gzipped JSON lines file, for `replay`'
+    )
+    serve_parser.add_argument(
+        '--record-sample-rate',
+        type=float,
+        default=1.0,
+        help='The fraction of operations to record (default: all)'
+    )
+    serve_parser.add_argument(
+        '--record-redact',
+        action='append',
+        default=[],
+        help='Record placeholders for variables or input fields of this name'
+    )
+    serve_parser.add_argument(
+        '--block-introspection',
+        action='store_true',
+        help='Answer operations selecting __schema or __type with an error (this breaks GraphiQL)'
+    )
     serve_parser.set_defaults(func=serve)
 
+    # bench
+    bench_parser = subparsers.add_parser('bench', help='Measure how fast operations execute, in-process')
+    _add_schema_obj(bench_parser)
+    bench_parser.add_argument(
+        'operations',
+        nargs='+',
+        help='.graphql files; each operation in them is measured separately'
+    )
+    bench_parser.add_argument(
+        '-v',
+        '--variables',
+        type=_variables,
+        action='append',
+        default=[],
+        help='A JSON object of variables, or a file holding one or a list of them; '
+        'every operation is measured with each'
+    )
+    bench_parser.add_argument('-n', '--requests', type=int, default=100, help='Executions per operation')
+    bench_parser.add_argument('-c', '--concurrency', type=int, default=1, help='Executions at a time')
+    bench_parser.add_argument(
+        '-m',
+        '--mode',
+        choices=['sync', 'thread', 'asyncio'],
+        default='sync',
+        help='Execute one after another, on a thread pool, or from asyncio tasks'
+    )
+    bench_parser.add_argument('--warmup', type=int, default=10, help='Executions before measuring')
+    bench_parser.add_argument(
+        '--memory-samples',
+        type=int,
+        default=3,
+        help='Executions to measure allocations of with tracemalloc (0 to skip)'
+    )
+    bench_parser.add_argument('-j', '--json', action='store_true', help='Write JSON instead of a table')
+    bench_parser.add_argument(
+        '-o',
+        '--output',
+        dest='file',
+        type=argparse.FileType('w'),
+        default=sys.stdout
+    )
+    bench_parser.set_defaults(func=bench)
+
+    # replay
+    replay_parser = subparsers.add_parser('replay', help='Replay recorded operations and compare their latency')
+    _add_schema_obj(replay_parser)
+    replay_parser.add_argument('recording', help='A file written by `serve --record`')
+    replay_parser.add_argument(
+        '-s',
+        '--speed',
+        type=float,
+        default=1.0,
+        help='Replay this many times faster than recorded; 0 for as fast as possible'
+    )
+    replay_parser.add_argument('-c', '--concurrency', type=int, default=8, help='Operations at a time, at most')
+    replay_parser.add_argument('-j', '--json', action='store_true', help='Write JSON instead of a table')
+    replay_parser.add_argument(
+        '-o',
+        '--output',
+        dest='file',
+        type=argparse.FileType('w'),
+        default=sys.stdout
+    )
+    replay_parser.set_defaults(func=replay)
+
     # import
     import_parser = subparsers.add_parser('import', help='Import existing GQL schema and convert to Graphotype Python code')
     import_parser.add_argument(
@@ -160,5 +442,4 @@ def main(argv: List[str]) -> None:
 
 
 if __name__ == '__main__':
-    import sys
     main(sys.argv[1:])
@@ -0,0 +1,189 @@
+"""Benchmarking operations in-process, behind `python -m graphotype bench`.
+
+Each operation is executed `requests` times, `concurrency` at a time, in
+one of these modes:
+
+- 'sync': one after another on the calling thread (`concurrency` is
+  ignored);
+- 'thread': on a pool of `concurrency` threads, as a threaded WSGI server
+  would;
+- 'asyncio': from `concurrency` tasks on an event loop, each handing
+  `execute` to a thread pool with `run_in_executor`, as an asyncio server would.
+
+Latencies are measured around each `execute` call, throughput over the
+whole run. Allocations are measured separately afterwards, running each
+operation a few times alone with tracemalloc on (see `graphotype.limits`),
+since tracing allocations slows everything down.
+"""
+import asyncio
+import concurrent.futures
+from dataclasses import dataclass
+import json
+import os
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from graphql import GraphQLSchema, parse
+from graphql.language import ast
+
+from .execution import execute
+from .limits import Limits
+from .querylog import percentile, text_table
+
+MODES = ('sync', 'thread', 'asyncio')
+
+@dataclass
+class Operation:
+    """One operation to benchmark, with one set of variables."""
+    name: str
+    document: ast.Document
+    operation_name: Optional[str] = None
+    variables: Optional[Dict[str, Any]] = None
+
+def load_operations(
+    paths: Iterable[str],
+    variable_sets: Optional[List[Dict[str, Any]]] = None,
+) -> List[Operation]:
+    """The operations defined in the `.graphql` files at `paths`, each with
+    each of `variable_sets`. Operations are named after their file, plus
+    their operation name if it defines several and the index of the
+    variable set if there are several."""
+    variable_sets = variable_sets or [{}]
+    operations = []
+    for path in paths:
+        with open(path) as f:
+            document = parse(f.read())
+        stem = os.path.splitext(os.path.basename(path))[0]
+        names = [
+            d.name.value if d.name is not None else None
+            for d in document.definitions if isinstance(d, ast.OperationDefinition)
+        ]
+        for operation_name in names:
+            name = f'{stem}:{operation_name}' if len(names) > 1 else stem
+            for i, variables in enumerate(variable_sets):
+                operations.append(Operation(
+                    f'{name}[{i}]' if len(variable_sets) > 1 else name,
+                    document,
+                    operation_name if len(names) > 1 else None,
+                    variables,
+                ))
+    return operations
+
+@dataclass
+class Measurement:
+    """How one operation did. Latencies are in seconds, sorted."""
+    name: str
+    seconds: float
+    latencies: List[float]
+    errors: int
+    # per operation, from graphotype.limits.MemoryMeasurement
+    peak: Optional[int] = None
+    blocks: Optional[int] = None
+    nodes: Optional[int] = None
+
+    @property
+    def throughput(self) -> float:
+        """Operations per second."""
+        return len(self.latencies) / self.seconds if self.seconds else 0.0
+
+    def percentiles(self) -> Dict[str, float]:
+        return {f'p{p}': percentile(self.latencies, p) for p in (50, 95, 99)}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(
+            operation=self.name,
+            requests=len(self.latencies),
+            errors=self.errors,
+            seconds=self.seconds,
+            throughput=self.throughput,
+            **self.percentiles(),
+            peak=self.peak,
+            blocks=self.blocks,
+            nodes=self.nodes,
+        )
+
+def _timed(schema: GraphQLSchema, operation: Operation) -> Any:
+    start = time.perf_counter()
+    result = execute(schema, operation.document, variables=operation.variables, operation_name=operation.operation_name)
+    return time.perf_counter() - start, bool(result.errors)
+
+def _run(schema: GraphQLSchema, operation: Operation, requests: int, concurrency: int, mode: str) -> List[Any]:
+    if mode == 'sync':
+        return [_timed(schema, operation) for _ in range(requests)]
+    if mode == 'thread':
+        with concurrent.futures.ThreadPoolExecutor(concurrency, thread_name_prefix='graphotype-bench') as pool:
+            return list(pool.map(lambda _: _timed(schema, operation), range(requests)))
+    loop = asyncio.new_event_loop()
+    pool = concurrent.futures.ThreadPoolExecutor(concurrency, thread_name_prefix='graphotype-bench')
+    async def run_all() -> List[Any]:
+        pending = iter(range(requests))
+        timings: List[Any] = []
+        async def worker() -> None:
+            for _ in pending:
+                timings.append(await loop.run_in_executor(pool, _timed, schema, operation))
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return timings
+    try:
+        return loop.run_until_complete(run_all())
+    finally:
+        pool.shutdown()
+        loop.close()
+
+def benchmark(
+    schema: GraphQLSchema,
+    operations: List[Operation],
+    requests: int = 100,
+    concurrency: int = 1,
+    mode: str = 'sync',
+    warmup: int = 10,
+    memory_samples: int = 3,
+) -> List[Measurement]:
+    """Execute each of `operations` `warmup` times, then `requests` times
+    more, measuring each; then `memory_samples` times with tracemalloc on,
+    keeping the median peak and blocks (0 to skip that)."""
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of {MODES}, not {mode!r}")
+    if requests < 1 or concurrency < 1:
+        raise ValueError("requests and concurrency must be at least 1")
+    measurements = []
+    for operation in operations:
+        _run(schema, operation, warmup, concurrency, mode)
+        start = time.perf_counter()
+        timings = _run(schema, operation, requests, concurrency, mode)
+        measurement = Measurement(
+            operation.name,
+            time.perf_counter() - start,
+            sorted(seconds for seconds, _ in timings),
+            sum(error for _, error in timings),
+        )
+        if memory_samples:
+            samples = []
+            for _ in range(memory_samples):
+                result = execute(
+                    schema, operation.document, variables=operation.variables,
+                    operation_name=operation.operation_name, limits=Limits(memory_sample_rate=1.0)
+                )
+                samples.append(result.extensions['usage'])
+            samples.sort(key=lambda usage: usage['peak'])
+            median = samples[len(samples) // 2]
+            measurement.peak, measurement.blocks, measurement.nodes = median['peak'], median['blocks'], median['nodes']
+        measurements.append(measurement)
+    return measurements
+
+def format_table(measurements: List[Measurement]) -> str:
+    """The measurements as a plain text table."""
+    header = ['operation', 'requests', 'errors', 'ops/s', 'p50 ms', 'p95 ms', 'p99 ms', 'nodes', 'peak KiB', 'blocks']
+    rows = [header]
+    for m in measurements:
+        p = m.percentiles()
+        rows.append([
+            m.name, str(len(m.latencies)), str(m.errors), f'{m.throughput:.1f}',
+            *(f'{p[k] * 1000:.2f}' for k in ('p50', 'p95', 'p99')),
+            '' if m.nodes is None else str(m.nodes),
+            '' if m.peak is None else f'{m.peak / 1024:.1f}',
+            '' if m.blocks is None else str(m.blocks),
+        ])
+    return text_table(rows)
+
+def format_json(measurements: List[Measurement]) -> str:
+    return json.dumps([m.to_dict() for m in measurements], indent=2) + '\n'
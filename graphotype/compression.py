@@ -0,0 +1,189 @@
+"""Compressing response bodies.
+
+GraphQL responses are repetitive JSON and compress well. `Compression` holds
+the settings `serve` uses: which content codings to offer (gzip always; br
+with brotli installed, zstd with zstandard installed), their levels, and the
+size below which bodies are sent as they are.
+
+Complete bodies are compressed in one go, except for large ones: those are
+compressed a piece at a time on a worker thread, each piece while the one
+before it is being sent. Chunked bodies are compressed as they are produced,
+flushing after each chunk so that the client isn't kept waiting for data the
+server has already produced.
+"""
+import concurrent.futures
+import importlib.util
+import threading
+import zlib
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+class Compressor:
+    """Compresses one stream of data."""
+    def compress(self, data: bytes) -> bytes:
+        raise NotImplementedError()
+
+    def flush(self) -> bytes:
+        """Everything compressed so far, so the client can decompress it."""
+        raise NotImplementedError()
+
+    def finish(self) -> bytes:
+        raise NotImplementedError()
+
+class Coding:
+    """A content coding, e.g. gzip, implemented by the library `module` (if any)."""
+    name: str
+    module: Optional[str] = None
+    default_level: int
+
+    def available(self) -> bool:
+        return self.module is None or importlib.util.find_spec(self.module) is not None
+
+    def compressor(self, level: int) -> Compressor:
+        raise NotImplementedError()
+
+class _ZlibCompressor(Compressor):
+    def __init__(self, level: int) -> None:
+        # wbits 16 + 15: gzip header and trailer, largest window
+        self.compressobj = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self.compressobj.compress(data)
+
+    def flush(self) -> bytes:
+        return self.compressobj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self.compressobj.flush()
+
+class Gzip(Coding):
+    name = 'gzip'
+    default_level = 6
+
+    def compressor(self, level: int) -> Compressor:
+        return _ZlibCompressor(level)
+
+class _BrotliCompressor(Compressor):
+    def __init__(self, level: int) -> None:
+        import brotli
+        self.compressobj = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self.compressobj.process(data)
+
+    def flush(self) -> bytes:
+        return self.compressobj.flush()
+
+    def finish(self) -> bytes:
+        return self.compressobj.finish()
+
+class Brotli(Coding):
+    name = 'br'
+    module = 'brotli'
+    # brotli's own default, 11, is far too slow to do per response
+    default_level = 4
+
+    def compressor(self, level: int) -> Compressor:
+        return _BrotliCompressor(level)
+
+class _ZstdCompressor(Compressor):
+    def __init__(self, level: int) -> None:
+        import zstandard
+        self.flush_block = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        self.compressobj = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self.compressobj.compress(data)
+
+    def flush(self) -> bytes:
+        return self.compressobj.flush(self.flush_block)
+
+    def finish(self) -> bytes:
+        return self.compressobj.flush()
+
+class Zstd(Coding):
+    name = 'zstd'
+    module = 'zstandard'
+    default_level = 3
+
+    def compressor(self, level: int) -> Compressor:
+        return _ZstdCompressor(level)
+
+# In order of preference, for clients that accept any of them equally
+CODINGS: List[Coding] = [Zstd(), Brotli(), Gzip()]
+
+_pool: Optional[concurrent.futures.ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+def _get_pool() -> concurrent.futures.ThreadPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = concurrent.futures.ThreadPoolExecutor(thread_name_prefix='graphotype-compression')
+        return _pool
+
+class Compression:
+    """Settings for compressing responses.
+
+    - levels: compression level by coding name, e.g. `{'gzip': 9}`; codings
+      not listed use their `default_level`.
+    - min_size: bodies smaller than this many bytes are sent uncompressed.
+    - thread_size: bodies at least this large are compressed on a worker
+      thread, `piece_size` bytes at a time.
+    - codings: the codings to offer, by default those of `CODINGS` which are
+      available.
+    """
+    def __init__(
+        self,
+        levels: Optional[Dict[str, int]] = None,
+        min_size: int = 1024,
+        thread_size: int = 1024 * 1024,
+        piece_size: int = 256 * 1024,
+        codings: Optional[Iterable[Coding]] = None,
+    ) -> None:
+        self.codings = {
+            coding.name: coding
+            for coding in (codings if codings is not None else CODINGS)
+            if coding.available()
+        }
+        self.levels = {name: coding.default_level for name, coding in self.codings.items()}
+        for name, level in (levels or {}).items():
+            if name not in self.codings:
+                raise ValueError(f"Unknown or unavailable content coding {name!r}")
+            self.levels[name] = level
+        self.min_size = min_size
+        self.thread_size = thread_size
+        self.piece_size = piece_size
+
+    def compressor(self, coding: str) -> Compressor:
+        return self.codings[coding].compressor(self.levels[coding])
+
+    def compress(self, data: bytes, coding: str) -> bytes:
+        compressor = self.compressor(coding)
+        return compressor.compress(data) + compressor.finish()
+
+    def compress_in_thread(self, data: bytes, coding: str) -> Iterator[bytes]:
+        """Compress `data` piece by piece on a worker thread, yielding each
+        compressed piece while the next one is compressed."""
+        pool = _get_pool()
+        compressor = self.compressor(coding)
+        pieces = range(0, len(data), self.piece_size)
+        future: Any = None
+        for start in pieces:
+            piece = data[start:start + self.piece_size]
+            output = future.result() if future is not None else b''
+            future = pool.submit(compressor.compress, piece)
+            if output:
+                yield output
+        output = future.result() if future is not None else b''
+        yield output + pool.submit(compressor.finish).result()
+
+    def compress_chunks(self, chunks: Iterable[bytes], coding: str) -> Iterator[bytes]:
+        """Compress chunks as they come, flushing after each one."""
+        compressor = self.compressor(coding)
+        for chunk in chunks:
+            if not chunk:
+                continue
+            output = compressor.compress(chunk) + compressor.flush()
+            if output:
+                yield output
+        yield compressor.finish()
@@ -0,0 +1,157 @@
+"""Relay-style pagination for `Connection[T]` fields.
+
+A method annotated `-> Connection[T]` gets `first`, `after`, `last` and
+`before` arguments and returns a `TConnection` type with `edges` and
+`pageInfo`, as described in https://relay.dev/graphql/connections.htm.
+(For `Connection[Optional[T]]`, whose nodes may be null, it's
+`NullableTConnection`.)
+Cursors encode the offset of an item in the full list.
+
+The method itself never sees those four arguments. It either returns the
+full list lazily, as anything that can be sliced (a list, a `range`, a
+database query object supporting `q[start:stop]`) or iterated (a generator),
+in which case graphotype slices out just the requested page; or it declares
+a parameter annotated `Page` and returns only that page itself.
+"""
+import base64
+import binascii
+from dataclasses import dataclass
+import itertools
+from typing import Any, Callable, Iterable, List, Optional, Tuple
+
+from graphql.error import GraphQLError
+
+CURSOR_PREFIX = 'offset:'
+
+@dataclass
+class Page:
+    """The part of a connection a method should return, if it asks for it.
+
+    Return the items at `offset`, `offset + 1`, ...: at most `limit` of them,
+    or all remaining ones if `limit` is None. `limit` counts one item more
+    than the client asked for, which tells graphotype whether there's a next
+    page.
+    """
+    offset: int
+    limit: Optional[int]
+
+@dataclass
+class PageInfo:
+    hasNextPage: bool
+    hasPreviousPage: bool
+    startCursor: Optional[str]
+    endCursor: Optional[str]
+
+@dataclass
+class Edge:
+    node: Any
+    cursor: str
+
+@dataclass
+class ConnectionValue:
+    edges: List[Edge]
+    pageInfo: PageInfo
+
+def encode_cursor(offset: int) -> str:
+    return base64.b64encode(f'{CURSOR_PREFIX}{offset}'.encode()).decode()
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        decoded = base64.b64decode(cursor.encode(), validate=True).decode()
+        if decoded.startswith(CURSOR_PREFIX):
+            offset = int(decoded[len(CURSOR_PREFIX):])
+            if offset >= 0:
+                return offset
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        pass
+    raise GraphQLError(f"Invalid cursor: {cursor!r}")
+
+def _length(source: Any) -> int:
+    if hasattr(source, '__len__'):
+        return len(source)
+    count = getattr(source, 'count', None)
+    if callable(count):
+        return count()
+    raise GraphQLError("`last` without `before` needs a field whose source has a length")
+
+def _slice(source: Any, start: int, stop: Optional[int]) -> List[Any]:
+    if hasattr(source, '__getitem__') and not isinstance(source, dict):
+        return list(source[start:stop])
+    return list(itertools.islice(source, start, stop))
+
+def bounds(
+    first: Optional[int],
+    after: Optional[str],
+    last: Optional[int],
+    before: Optional[str],
+    length: Callable[[], int],
+) -> Tuple[int, Optional[int]]:
+    """Return the [start, end) offsets of the requested page.
+
+    `end` is None if the page runs to the end of the list. `length` is only
+    called if it's needed to find the end, i.e. for `last` without `before`.
+    """
+    if (first is not None and first < 0) or (last is not None and last < 0):
+        raise GraphQLError("`first` and `last` must not be negative")
+    start = decode_cursor(after) + 1 if after is not None else 0
+    end = decode_cursor(before) if before is not None else None
+    if first is not None:
+        end = start + first if end is None else min(end, start + first)
+    if last is not None:
+        if end is None:
+            end = length()
+        start = max(start, end - last)
+    if end is not None:
+        end = max(start, end)
+    return start, end
+
+def paginate(
+    source: Iterable[Any],
+    start: int,
+    end: Optional[int],
+    already_sliced: bool = False,
+) -> ConnectionValue:
+    """Build the connection for the items of `source` in [start, end).
+
+    If `already_sliced`, `source` starts at `start` (see `Page`)."""
+    stop = None if end is None else end + 1
+    if already_sliced:
+        items = _slice(source, 0, None if stop is None else stop - start)
+    else:
+        items = _slice(source, start, stop)
+    has_next = False
+    if end is not None and len(items) > end - start:
+        has_next = True
+        del items[end - start:]
+    edges = [Edge(node, encode_cursor(start + i)) for i, node in enumerate(items)]
+    return ConnectionValue(
+        edges=edges,
+        pageInfo=PageInfo(
+            hasNextPage=has_next,
+            hasPreviousPage=start > 0,
+            startCursor=edges[0].cursor if edges else None,
+            endCursor=edges[-1].cursor if edges else None,
+        )
+    )
+
+def resolve(
+    call: Callable[[Optional[Page]], Any],
+    wants_page: bool,
+    first: Optional[int] = None,
+    after: Optional[str] = None,
+    last: Optional[int] = None,
+    before: Optional[str] = None,
+) -> ConnectionValue:
+    """Resolve a connection field whose method is `call(page)`.
+
+    `page` is None unless `wants_page`, i.e. the method declared a `Page`
+    parameter."""
+    if wants_page:
+        def no_length() -> int:
+            raise GraphQLError("This field does not support `last` without `before`")
+        start, end = bounds(first, after, last, before, no_length)
+        page = Page(start, None if end is None else end + 1 - start)
+        return paginate(call(page), start, end, already_sliced=True)
+    source = call(None)
+    start, end = bounds(first, after, last, before, lambda: _length(source))
+    return paginate(source, start, end)
@@ -0,0 +1,150 @@
+"""A deduplicated ("crunched") response format.
+
+Graph-shaped results repeat identical subtrees: in `friends { friends { name } }`
+the same people come up again and again. A crunched result stores every
+distinct value once, in a flat table, with objects and lists referring to
+their members by index:
+
+    {"a": {"x": 1}, "b": {"x": 1}}  ->  [1, {"x": 0}, {"a": 1, "b": 1}]
+
+Members always come before whatever refers to them, and the root comes
+last. This is the format of the graphql-crunch JavaScript library (version
+2), so its `uncrunch` decodes it; so does `uncrunch` here.
+
+`execute_crunched` builds the table while executing, without making the
+full result first; `crunch` converts an existing result.
+"""
+from typing import Any, Dict, Hashable, List, Optional, Union
+
+from graphql import GraphQLSchema
+from graphql.error import GraphQLError, format_error
+from graphql.execution.base import ExecutionResult
+from graphql.execution.executors.sync import SyncExecutor
+from graphql.execution.utils import ExecutionContext, get_operation_root_type
+from graphql.language import ast
+
+from .execution import Request
+from .incremental import Executor
+
+class Table:
+    """The table of distinct values being built up."""
+    def __init__(self) -> None:
+        self.values: List[Any] = []
+        self.indices: Dict[Hashable, int] = {}
+
+    def add(self, key: Hashable, value: Any) -> int:
+        index = self.indices.get(key)
+        if index is None:
+            index = self.indices[key] = len(self.values)
+            self.values.append(value)
+        return index
+
+    def leaf(self, value: Any) -> int:
+        # a custom scalar may serialize to a list or object; store it as
+        # one, as it would be if crunched after executing
+        if isinstance(value, dict):
+            return self.object({k: self.leaf(v) for k, v in value.items()})
+        if isinstance(value, list):
+            return self.list([self.leaf(v) for v in value])
+        try:
+            # 1, 1.0 and True are equal but must stay distinct
+            return self.add((type(value), value), value)
+        except TypeError:
+            # unhashable, so not shared
+            self.values.append(value)
+            return len(self.values) - 1
+
+    def object(self, fields: Dict[str, Optional[int]]) -> int:
+        members = {name: self.leaf(None) if index is None else index for name, index in fields.items()}
+        return self.add(('object', tuple(members.items())), members)
+
+    def list(self, items: List[Optional[int]]) -> int:
+        members = [self.leaf(None) if index is None else index for index in items]
+        return self.add(('list', tuple(members)), members)
+
+    def finish(self, root: int) -> List[Any]:
+        """The table, with `root` (moved) to the end."""
+        if root != len(self.values) - 1:
+            self.values.append(self.values[root])
+        return self.values
+
+def crunch(value: Any) -> List[Any]:
+    """Crunch a JSON-like value."""
+    table = Table()
+    return table.finish(table.leaf(value))
+
+def uncrunch(values: Optional[List[Any]]) -> Any:
+    """Expand a crunched table back into the value it represents."""
+    if values is None:
+        return None
+    expanded: List[Any] = []
+    for value in values:
+        if isinstance(value, dict):
+            value = {k: expanded[i] for k, i in value.items()}
+        elif isinstance(value, list):
+            value = [expanded[i] for i in value]
+        expanded.append(value)
+    return expanded[-1]
+
+class _CrunchingExecutor(Executor):
+    def __init__(self, exe_context: ExecutionContext) -> None:
+        super().__init__(exe_context)
+        self.table = Table()
+
+    def directive_args(self, directive: Any, directives: Any) -> Optional[Dict[str, Any]]:
+        # deliver everything at once
+        return None
+
+    def make_object(self, fields: Dict[str, Any]) -> int:
+        return self.table.object(fields)
+
+    def make_list(self, items: List[Any]) -> int:
+        return self.table.list(items)
+
+    def make_leaf(self, value: Any) -> int:
+        return self.table.leaf(value)
+
+def execute_crunched(
+    schema: GraphQLSchema,
+    source: Union[str, ast.Document],
+    root: Any = None,
+    context: Any = None,
+    variables: Optional[Dict[str, Any]] = None,
+    operation_name: Optional[str] = None,
+    **request_options: Any
+) -> Dict[str, Any]:
+    """Like `graphotype.execute`, but return a result dict with crunched `data`.
+
+    `@defer` and `@stream` are ignored. `request_options` are passed on to
+    `Request`."""
+    request = Request(context, **request_options)
+    try:
+        document = request.prepare(schema, source, operation_name)
+        if isinstance(document, ExecutionResult):
+            return document.to_dict()
+        try:
+            exe_context = ExecutionContext(
+                schema, document, root, request, variables or {}, operation_name,
+                SyncExecutor(), None, False
+            )
+        except GraphQLError as e:
+            return {'errors': [format_error(e)]}
+        operation = exe_context.operation
+        if operation.operation == 'subscription':
+            return {'errors': [{'message': 'Subscriptions cannot be executed here'}]}
+        executor = _CrunchingExecutor(exe_context)
+        root_type = get_operation_root_type(schema, operation)
+        fields = executor.collect(root_type, [operation.selection_set], [], root)
+        data: Optional[List[Any]]
+        try:
+            data = executor.table.finish(executor.execute_fields(root_type, root, fields, []))
+        except Exception as e:
+            executor.report(e, [], [])
+            data = None
+        if request.usage is not None and request.usage.error is not None:
+            return {'data': None, 'errors': [format_error(request.usage.error)]}
+        result: Dict[str, Any] = {'data': data}
+        result.update(executor.errors_since(0))
+        return result
+    finally:
+        request.close()
@@ -0,0 +1,66 @@
+"""Directives which graphotype adds to every schema it makes.
+
+`@defer` and `@stream` request incremental delivery, see
+`graphotype.incremental`, and `@live` marks a query to be kept up to date,
+see `graphotype.live`. `graphotype.execute` ignores all three and returns
+the result once, all at once.
+"""
+from typing import Any, List
+
+from graphql import GraphQLArgument, GraphQLBoolean, GraphQLInt, GraphQLString
+from graphql.error import GraphQLError
+from graphql.language import ast
+from graphql.type.directives import DirectiveLocation, GraphQLDirective, specified_directives
+from graphql.validation.rules import specified_rules
+from graphql.validation.rules.base import ValidationRule
+
+DeferDirective = GraphQLDirective(
+    name='defer',
+    description='Deliver this fragment in a later payload.',
+    args={
+        'if': GraphQLArgument(GraphQLBoolean, default_value=True),
+        'label': GraphQLArgument(GraphQLString),
+    },
+    locations=[DirectiveLocation.FRAGMENT_SPREAD, DirectiveLocation.INLINE_FRAGMENT],
+)
+
+StreamDirective = GraphQLDirective(
+    name='stream',
+    description='Deliver the items of this list after the first `initialCount` in later payloads.',
+    args={
+        'if': GraphQLArgument(GraphQLBoolean, default_value=True),
+        'label': GraphQLArgument(GraphQLString),
+        'initialCount': GraphQLArgument(GraphQLInt, default_value=0),
+    },
+    locations=[DirectiveLocation.FIELD],
+)
+
+LiveDirective = GraphQLDirective(
+    name='live',
+    description='Keep the result of this query up to date.',
+    locations=[DirectiveLocation.QUERY],
+)
+
+DIRECTIVES = specified_directives + [DeferDirective, StreamDirective, LiveDirective]
+
+class StreamOnlyStreamableFields(ValidationRule):
+    """`@stream` only applies to fields whose resolver produces items lazily.
+
+    graphotype marks the resolvers of fields annotated `Iterator[...]` or
+    `Iterable[...]` as `streamable`; a `List[...]` is already complete by
+    the time it's returned, so there's nothing to gain from streaming it.
+    """
+    def enter_Field(self, node: ast.Field, key: Any, parent: Any, path: List[Any], ancestors: List[Any]) -> None:
+        if not any(d.name.value == StreamDirective.name for d in node.directives or []):
+            return
+        field_def = self.context.get_field_def()
+        if field_def is None or getattr(field_def.resolver, 'streamable', False):
+            return
+        parent_type = self.context.get_parent_type()
+        self.context.report_error(GraphQLError(
+            f'@stream can\'t be used on "{parent_type}.{node.name.value}": '
+            'only fields annotated Iterator[...] or Iterable[...] can be streamed.',
+            [node]
+        ))
+
+RULES = specified_rules + [StreamOnlyStreamableFields]
@@ -0,0 +1,96 @@
+"""Encoding results for the wire.
+
+An `Encoder` turns a result dict into the bytes of one media type. `serve`
+picks one by the request's `Accept` header from the `ENCODERS` whose
+libraries are installed:
+
+- application/json: with orjson if it's installed, else the standard library
+- application/msgpack: needs msgpack
+- application/cbor: needs cbor2
+
+Scalar serializers may return `bytes`, `datetime`, `date` and `time` values
+rather than formatting them as strings. MessagePack and CBOR encode bytes as
+binary and datetimes as timestamps (naive ones are taken to be UTC); JSON,
+and MessagePack for dates and times, fall back to `to_json`: base64 and ISO
+8601 strings. Floats are always encoded natively.
+"""
+import base64
+import datetime
+import importlib.util
+import json
+from typing import Any, List, Optional
+
+def to_json(value: Any) -> Any:
+    """A JSON representation of a value json can't encode itself."""
+    if isinstance(value, bytes):
+        return base64.b64encode(value).decode('ascii')
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+class Encoder:
+    """Encodes results as `media_type`, using the library `module` (if any)."""
+    media_type: str
+    module: Optional[str] = None
+
+    def available(self) -> bool:
+        return self.module is None or importlib.util.find_spec(self.module) is not None
+
+    def encode(self, value: Any, pretty: bool = False) -> bytes:
+        raise NotImplementedError()
+
+class JSONEncoder(Encoder):
+    media_type = 'application/json'
+
+    def encode(self, value: Any, pretty: bool = False) -> bytes:
+        try:
+            import orjson
+        except ImportError:
+            pass
+        else:
+            try:
+                return orjson.dumps(value, default=to_json, option=orjson.OPT_INDENT_2 if pretty else 0)
+            except orjson.JSONEncodeError:
+                # e.g. integers beyond 64 bits, which json can handle
+                pass
+        if pretty:
+            text = json.dumps(value, default=to_json, indent=2)
+        else:
+            text = json.dumps(value, default=to_json, separators=(',', ':'))
+        return text.encode('utf-8')
+
+def _utc(value: datetime.datetime) -> datetime.datetime:
+    return value if value.tzinfo is not None else value.replace(tzinfo=datetime.timezone.utc)
+
+class MessagePackEncoder(Encoder):
+    media_type = 'application/msgpack'
+    module = 'msgpack'
+
+    def encode(self, value: Any, pretty: bool = False) -> bytes:
+        import msgpack
+        def default(value: Any) -> Any:
+            if isinstance(value, datetime.datetime):
+                return msgpack.Timestamp.from_datetime(_utc(value))
+            return to_json(value)
+        return msgpack.packb(value, default=default, use_bin_type=True, datetime=True)
+
+class CBOREncoder(Encoder):
+    media_type = 'application/cbor'
+    module = 'cbor2'
+
+    def encode(self, value: Any, pretty: bool = False) -> bytes:
+        import cbor2
+        def default(encoder: Any, value: Any) -> None:
+            encoder.encode(to_json(value))
+        return cbor2.dumps(
+            value, default=default, timezone=datetime.timezone.utc, date_as_datetime=True
+        )
+
+JSON = JSONEncoder()
+
+# In order of preference, for clients that accept any of them equally
+ENCODERS: List[Encoder] = [JSON, MessagePackEncoder(), CBOREncoder()]
+
+def available_encoders() -> List[Encoder]:
+    """The `ENCODERS` whose libraries are installed."""
+    return [encoder for encoder in ENCODERS if encoder.available()]
@@ -0,0 +1,782 @@
+"""Executing operations against a graphotype schema.
+
+`execute` is a thin layer over graphql-core's parse, validate and execute
+steps. It creates a `Request` for the duration of one operation and passes it
+to graphql-core as the context value, which is how graphotype's resolver
+wrappers find per-request state such as the entity cache, the table of
+already-resolved fields and injected resources.
+
+Schemas built by `make_schema` still work with plain `graphql.graphql`; the
+per-request features are simply inactive there.
+"""
+from collections import Counter, OrderedDict
+import concurrent.futures
+import dataclasses
+import enum
+import functools
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional, Set, Tuple, Type, Union
+
+from graphql import GraphQLSchema, ResolveInfo, graphql, parse, validate
+from graphql.error import GraphQLError
+from graphql.execution import ExecutionResult, execute as gql_execute
+from graphql.execution.executors.sync import SyncExecutor
+from graphql.language import ast
+from graphql.language.printer import print_ast
+from graphql.type.directives import specified_directives
+from graphql.utils.get_operation_ast import get_operation_ast
+from graphql.utils.introspection_query import introspection_query
+from graphql.utils.schema_printer import print_schema
+from promise import Promise, is_thenable
+
+from . import directives, types
+from .lazy import LazyTypeMap
+from .limits import Limits, Usage
+from .metrics import Metrics
+from .processes import ProcessPool
+from .recording import Recorder
+from .tracing import Tracer
+
+EntityKey = Tuple[str, Any]
+KeyFunction = Callable[[Any], Optional[EntityKey]]
+
+# Process-wide totals of every Request's `stats`, e.g. 'dedupe_hits'.
+stats: Counter = Counter()
+_stats_lock = threading.Lock()
+
+def freeze_args(args: Dict[str, Any]) -> Optional[Hashable]:
+    """Turn resolver arguments into a hashable key, or None if we can't."""
+    try:
+        key = _freeze(args)
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        # input objects are (unhashable) dataclasses
+        return (type(value), tuple(
+            (f.name, _freeze(getattr(value, f.name)))
+            for f in dataclasses.fields(value)
+        ))
+    if isinstance(value, (str, int, float, bool, enum.Enum)) or value is None:
+        return value
+    # Custom scalars: only trust objects that promise a value-based hash.
+    if type(value).__hash__ is object.__hash__:
+        raise TypeError(f"{type(value)} is hashed by identity")
+    return value
+
+def _is_memoizable(value: Any) -> bool:
+    # Iterators and coroutines can only be consumed once; Promises are fine.
+    if isinstance(value, Promise):
+        return True
+    return not isinstance(value, Iterator) and not hasattr(value, '__await__')
+
+class _Entity:
+    __slots__ = ('obj', 'fields')
+
+    def __init__(self, obj: Any) -> None:
+        self.obj = obj
+        self.fields: Dict[Tuple[str, Hashable], Any] = {}
+
+class EntityCache:
+    """Canonical entity instances and their resolved fields.
+
+    An entity is an `Object` type with an `id: ID` field; it is identified by
+    its (typename, id) pair. The first instance seen for a key becomes the
+    canonical one: later references to the same entity are replaced by it,
+    and its resolved function and property fields are remembered so that the
+    same entity is only resolved once, however often it appears in the result.
+
+    A fresh cache is used for each request by default. Pass the same instance
+    to several `execute` calls to share it across requests; in that case you
+    are responsible for calling `invalidate` when entities change. Fields
+    taking `Context[...]` or `Inject[...]` parameters aren't remembered in a
+    shared cache, as their results may differ between requests. `max_size`
+    bounds the number of entities kept, evicting the least recently used.
+    """
+    def __init__(self, max_size: Optional[int] = None) -> None:
+        self.max_size = max_size
+        self._entries: 'OrderedDict[EntityKey, _Entity]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: EntityKey) -> bool:
+        return key in self._entries
+
+    def _entry(self, key: EntityKey, obj: Any) -> _Entity:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _Entity(obj)
+                if self.max_size is not None and len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+            else:
+                self._entries.move_to_end(key)
+            return entry
+
+    def canonical(self, obj: Any, key_of: KeyFunction) -> Any:
+        """Return the canonical instance for `obj` (or a list of them)."""
+        if type(obj) is list:
+            return [self.canonical(o, key_of) for o in obj]
+        key = key_of(obj)
+        if key is None:
+            return obj
+        return self._entry(key, obj).obj
+
+    def resolve(
+        self,
+        key_of: KeyFunction,
+        parent: Any,
+        name: str,
+        args: Dict[str, Any],
+        resolve: Callable[[], Any],
+        memoize: bool = True,
+    ) -> Any:
+        """Resolve field `name` of `parent`, using the cache where possible."""
+        key = key_of(parent) if memoize else None
+        args_key = freeze_args(args) if key is not None else None
+        if key is None or args_key is None:
+            return self.canonical(resolve(), key_of)
+        fields = self._entry(key, parent).fields
+        field_key = (name, args_key)
+        if field_key in fields:
+            return fields[field_key]
+        value = self.canonical(resolve(), key_of)
+        if _is_memoizable(value):
+            fields[field_key] = value
+        return value
+
+    def invalidate(self, typename: str, id: Any = None) -> None:
+        """Forget one entity, or every entity of `typename` if `id` is None."""
+        with self._lock:
+            if id is not None:
+                self._entries.pop((typename, id), None)
+                return
+            for key in [k for k in self._entries if k[0] == typename]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+EXECUTION_MODES = ('sync', 'threads')
+
+class PoolExecutor:
+    """A graphql-core executor that resolves sibling fields on a thread pool.
+
+    Only resolvers marked `concurrent` (graphotype's method and property
+    resolvers, unless declared `@serial`) are submitted to the pool. Other
+    resolvers, and the root fields of mutations, which must run one after
+    another, run on the calling thread.
+
+    The pool only runs the resolvers themselves: their promises are settled
+    on the calling thread, in `wait_until_finished`, as the promise library
+    isn't thread-safe. (Settled from pool threads, concurrent requests could
+    lose a callback and wait forever.)
+    """
+    def __init__(self, pool: concurrent.futures.Executor) -> None:
+        self.pool = pool
+        self.futures: Dict[concurrent.futures.Future, Promise] = {}
+        self._lock = threading.Lock()
+
+    def execute(self, fn: Callable, *args: Any, **kwargs: Any) -> Any:
+        info: ResolveInfo = args[1]
+        if not getattr(fn, 'concurrent', False) or (
+            info.operation.operation == 'mutation' and len(info.path) == 1
+        ):
+            return fn(*args, **kwargs)
+        promise: Promise = Promise()
+        future = self.pool.submit(fn, *args, **kwargs)
+        with self._lock:
+            self.futures[future] = promise
+        return promise
+
+    def wait_until_finished(self) -> None:
+        # Completing a field may submit more work, so loop until it's all done.
+        pending: Dict[concurrent.futures.Future, Promise] = {}
+        while True:
+            with self._lock:
+                pending.update(self.futures)
+                self.futures = {}
+            if not pending:
+                return
+            done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                _settle(pending.pop(future), future)
+
+    def clean(self) -> None:
+        with self._lock:
+            self.futures = {}
+
+def _settle(promise: Promise, future: concurrent.futures.Future) -> None:
+    """Settle `promise` with the outcome of `future`, as graphql-core's
+    `process` would have."""
+    error = future.exception()
+    if error is None:
+        promise.do_resolve(future.result())
+    elif isinstance(error, Exception):
+        error.stack = error.__traceback__ # type: ignore
+        promise.do_reject(error, traceback=error.__traceback__)
+    else:
+        raise error
+
+INTROSPECTION_POLICIES = ('cache', 'execute', 'block')
+
+# source texts (and operation names) remembered by Schema.answer_introspection
+MAX_OPERATION_KINDS = 1000
+
+_INTROSPECTION_FIELD = re.compile(r'__(schema|type)\b')
+
+# graphql-core's introspection_query, as print_ast prints it
+_introspection_printed: Optional[str] = None
+
+def _root_field_names(document: ast.Document, operation: ast.OperationDefinition) -> Set[str]:
+    """The names of the fields `operation` selects on its root type,
+    including through inline fragments and fragment spreads."""
+    fragments = {
+        d.name.value: d for d in document.definitions if isinstance(d, ast.FragmentDefinition)
+    }
+    names: Set[str] = set()
+    seen: Set[str] = set()
+    selection_sets = [operation.selection_set]
+    while selection_sets:
+        for selection in selection_sets.pop().selections:
+            if isinstance(selection, ast.Field):
+                names.add(selection.name.value)
+            elif isinstance(selection, ast.InlineFragment):
+                selection_sets.append(selection.selection_set)
+            elif isinstance(selection, ast.FragmentSpread) and selection.name.value not in seen:
+                seen.add(selection.name.value)
+                fragment = fragments.get(selection.name.value)
+                if fragment is not None:
+                    selection_sets.append(fragment.selection_set)
+    return names
+
+def _introspection_kind(document: ast.Document, operation_name: Optional[str]) -> str:
+    """'standard' for the standard introspection query, 'introspection' for
+    other operations selecting `__schema` or `__type`, 'other' otherwise."""
+    global _introspection_printed
+    operation = get_operation_ast(document, operation_name)
+    if operation is None or not _root_field_names(document, operation) & {'__schema', '__type'}:
+        return 'other'
+    if _introspection_printed is None:
+        _introspection_printed = print_ast(parse(introspection_query))
+    # Exactly: aliases and arguments (say, includeDeprecated) change the result
+    if print_ast(document) == _introspection_printed:
+        return 'standard'
+    return 'introspection'
+
+class Schema(GraphQLSchema):
+    """A GraphQLSchema that also knows how graphotype should execute it.
+
+    `make_schema` returns these. `execution` is one of EXECUTION_MODES:
+    - 'sync' resolves every field on the calling thread.
+    - 'threads' resolves sibling fields concurrently on a shared pool of
+      `max_workers` threads; see `PoolExecutor`.
+    `process_pool` runs the schema's `@cpu_bound` methods. `metrics`, if
+    given, is the `graphotype.metrics.Metrics` its resolvers record to.
+
+    `introspection` is one of INTROSPECTION_POLICIES, for what
+    `graphotype.execute` does with introspection operations:
+    - 'cache' answers the standard introspection query (graphql-core's
+      `introspection_query`, formatted any way, but otherwise exactly the
+      same) with `introspect()`, without executing it. Other introspection operations
+      run as usual.
+    - 'execute' runs every operation as usual.
+    - 'block' answers any operation selecting `__schema` or `__type` with
+      an error, as a production server might.
+
+    `type_map`, if given, is a `graphotype.lazy.LazyTypeMap` of the types
+    reached so far, which replaces the one GraphQLSchema would build. If the
+    schema was made with `freeze=True`, it's `frozen`, and `build_timings`
+    has the seconds each of its types took to build, by name.
+    """
+    def __init__(
+        self,
+        *args: Any,
+        execution: str = 'sync',
+        max_workers: Optional[int] = None,
+        process_pool: Optional[ProcessPool] = None,
+        metrics: Optional[Metrics] = None,
+        introspection: str = 'cache',
+        type_map: Optional[LazyTypeMap] = None,
+        **kwargs: Any
+    ) -> None:
+        if type_map is None:
+            super().__init__(*args, **kwargs)
+        else:
+            # GraphQLSchema.__init__ would build its own type map, walking
+            # every type reachable from the roots
+            self._query = kwargs['query']
+            self._mutation = kwargs.get('mutation')
+            self._subscription = kwargs.get('subscription')
+            self._directives = kwargs.get('directives') or specified_directives
+            self._type_map = type_map
+        self.process_pool = process_pool or ProcessPool(0)
+        self.metrics = metrics
+        if execution not in EXECUTION_MODES:
+            raise ValueError(f"execution must be one of {EXECUTION_MODES}, not {execution!r}")
+        if introspection not in INTROSPECTION_POLICIES:
+            raise ValueError(f"introspection must be one of {INTROSPECTION_POLICIES}, not {introspection!r}")
+        self.execution = execution
+        self.max_workers = max_workers
+        self.introspection = introspection
+        self.build_timings: Dict[str, float] = {}
+        self._pool: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        self._introspection: Optional[Dict[str, Any]] = None
+        self._sdl: Optional[str] = None
+        # (source text, operation name) -> what kind of operation it is, see _introspection_kind
+        self._operation_kinds: 'OrderedDict[Tuple[str, Optional[str]], str]' = OrderedDict()
+        self._introspection_lock = threading.Lock()
+        self._kinds_lock = threading.Lock()
+
+    @property
+    def frozen(self) -> bool:
+        return isinstance(self._type_map, LazyTypeMap) and self._type_map.frozen
+
+    def get_type_map(self) -> Dict[str, Any]:
+        if isinstance(self._type_map, LazyTypeMap):
+            self._type_map.complete()
+        return self._type_map
+
+    def introspect(self) -> Dict[str, Any]:
+        """The data of the standard introspection query, computed once.
+        Don't modify it."""
+        with self._introspection_lock:
+            if self._introspection is None:
+                result = graphql(self, introspection_query)
+                if result.errors:
+                    raise result.errors[0]
+                self._introspection = result.data
+            return self._introspection
+
+    def print_schema(self) -> str:
+        """The schema in SDL, as `graphql.print_schema` prints it, computed once."""
+        with self._introspection_lock:
+            if self._sdl is None:
+                self._sdl = print_schema(self)
+            return self._sdl
+
+    def answer_introspection(
+        self,
+        source: Union[str, ast.Document],
+        operation_name: Optional[str] = None,
+    ) -> Optional[ExecutionResult]:
+        """The result of `source` according to the `introspection` policy,
+        or None if it should be executed."""
+        if self.introspection == 'execute':
+            return None
+        text = source if isinstance(source, str) else source.loc.source.body if source.loc is not None else None
+        if text is not None and not _INTROSPECTION_FIELD.search(text):
+            return None
+        kind = None
+        if text is not None:
+            with self._kinds_lock:
+                kind = self._operation_kinds.get((text, operation_name))
+        if kind is None:
+            try:
+                document = parse(source) if isinstance(source, str) else source
+            except GraphQLError:
+                return None
+            kind = _introspection_kind(document, operation_name)
+            if text is not None:
+                with self._kinds_lock:
+                    self._operation_kinds[(text, operation_name)] = kind
+                    if len(self._operation_kinds) > MAX_OPERATION_KINDS:
+                        self._operation_kinds.popitem(last=False)
+        if kind == 'standard' and self.introspection == 'cache':
+            return ExecutionResult(data=self.introspect())
+        if kind != 'other' and self.introspection == 'block':
+            return ExecutionResult(errors=[GraphQLError("Introspection is disabled")], invalid=True)
+        return None
+
+    def make_executor(self) -> Any:
+        """Return a graphql-core executor for one operation."""
+        if self.execution == 'sync':
+            return SyncExecutor()
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix='graphotype'
+                )
+        return PoolExecutor(self._pool)
+
+    def shutdown(self) -> None:
+        """Stop the schema's worker threads and processes, if it started any."""
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown()
+        self.process_pool.shutdown()
+
+CACHE_SCOPES = ('public', 'private')
+
+class CacheHint:
+    """How long a field's value may be cached, as given to `@cache_hint`.
+
+    - max_age: in seconds.
+    - scope: 'public' if shared caches (CDNs) may keep it, 'private' if only
+      the client's own cache may.
+    """
+    def __init__(self, max_age: int, scope: str = 'public') -> None:
+        if scope not in CACHE_SCOPES:
+            raise ValueError(f"scope must be one of {CACHE_SCOPES}, not {scope!r}")
+        self.max_age = max_age
+        self.scope = scope
+
+    def merge(self, other: Optional['CacheHint']) -> 'CacheHint':
+        """The hint for a response containing both fields: the shorter
+        max_age, private if either is."""
+        if other is None:
+            return self
+        return CacheHint(
+            min(self.max_age, other.max_age),
+            'private' if 'private' in (self.scope, other.scope) else 'public'
+        )
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, CacheHint) and (self.max_age, self.scope) == (other.max_age, other.scope)
+
+    def __repr__(self) -> str:
+        return f'CacheHint({self.max_age!r}, {self.scope!r})'
+
+class Request:
+    """State for a single operation, available to resolvers via `info.context`.
+
+    `context` is the application's own context object.
+
+    Unless `dedupe` is False, resolving the same field with the same arguments
+    on the same parent object more than once (through aliases, repeated
+    fragments or shared parents) only calls the resolver the first time.
+    Mutations are never deduplicated, since their fields have side effects.
+
+    `providers` supplies the values of `Inject[T]` resolver parameters: it maps
+    T to either a pool (anything with `acquire()` and `release(resource)`,
+    such as `graphotype.ResourcePool`) or a zero-argument factory. Each is used
+    at most once per request; pooled resources are released by `close`.
+
+    `cache_policy` is the merged `CacheHint` of every field resolved so far,
+    or None if none had one.
+
+    With a `tracer` (see `graphotype.tracing`), the request may be sampled
+    for tracing: `trace` is then a Trace recording every resolver call, and
+    `run` hands it to the tracer when the operation is done.
+
+    With `limits` (see `graphotype.limits`), `usage` counts the nodes and
+    bytes of the result as it's resolved, and `run` replaces the result
+    with an error if it grows past them.
+
+    With a `recorder` (see `graphotype.recording`), `run` records a sample
+    of operations, their variables and how long they took.
+    """
+    def __init__(
+        self,
+        context: Any = None,
+        entity_cache: Union[bool, EntityCache, None] = None,
+        dedupe: bool = True,
+        providers: Optional[Dict[Type, Any]] = None,
+        tracer: Optional[Tracer] = None,
+        limits: Optional[Limits] = None,
+        recorder: Optional[Recorder] = None,
+    ) -> None:
+        self.context = context
+        self.tracer = tracer
+        self.trace = tracer.sample() if tracer is not None else None
+        self.limits = limits
+        self.usage = Usage(limits) if limits is not None else None
+        self.recorder = recorder if recorder is not None and recorder.sample() else None
+        self.providers = providers or {}
+        self._resources: Dict[Type, Any] = {}
+        self._releases: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+        # updated from pool threads; `_lock` may be held while acquiring a resource
+        self._stats_lock = threading.Lock()
+        self.stats: Counter = Counter()
+        # names of the types whose fields were resolved, see `graphotype.live`
+        self.touched: Set[str] = set()
+        # the document `prepare` parsed, once it has
+        self.document: Optional[ast.Document] = None
+        self.cache_policy: Optional[CacheHint] = None
+        # (id(parent), field name, args) -> (parent, value); we keep `parent`
+        # alive so that its id can't be reused while the request is running.
+        self.resolved: Optional[Dict[Tuple[int, str, Hashable], Tuple[Any, Any]]] = {} if dedupe else None
+        self.entities: Optional[EntityCache]
+        if isinstance(entity_cache, EntityCache):
+            self.entities = entity_cache
+            self._owns_entities = False
+        else:
+            self.entities = EntityCache() if entity_cache else None
+            self._owns_entities = True
+
+    def resolve(
+        self,
+        key_of: KeyFunction,
+        parent: Any,
+        info: ResolveInfo,
+        args: Dict[str, Any],
+        resolve: Callable[[], Any],
+        memoize: bool = True,
+        cache_hint: Optional[CacheHint] = None,
+        shareable: bool = True,
+    ) -> Any:
+        """Resolve a field of `parent`, reusing earlier results where possible.
+
+        `key_of` returns the entity key of an object, if it is an entity.
+        `cache_hint` is merged into `cache_policy`. Unless `shareable`, the
+        result depends on the request (e.g. on its context), so it's only
+        remembered for this request, never in an entity cache shared with
+        others."""
+        usage = self.usage
+        if usage is None:
+            return self._resolve(key_of, parent, info, args, resolve, memoize, cache_hint, shareable)
+        usage.check()
+        value = self._resolve(key_of, parent, info, args, resolve, memoize, cache_hint, shareable)
+        if is_thenable(value):
+            return Promise.resolve(value).then(functools.partial(usage.add, info))
+        return usage.add(info, value)
+
+    def _resolve(
+        self,
+        key_of: KeyFunction,
+        parent: Any,
+        info: ResolveInfo,
+        args: Dict[str, Any],
+        resolve: Callable[[], Any],
+        memoize: bool,
+        cache_hint: Optional[CacheHint],
+        shareable: bool = True,
+    ) -> Any:
+        self.touched.add(info.parent_type.name)
+        if self.trace is not None:
+            resolve = functools.partial(self.trace.resolve, info, resolve)
+        if cache_hint is not None:
+            with self._lock:
+                self.cache_policy = cache_hint.merge(self.cache_policy)
+        memoize = memoize and info.operation.operation != 'mutation'
+        entities = self.entities
+        if entities is not None and (shareable or self._owns_entities) and key_of(parent) is not None:
+            return entities.resolve(key_of, parent, info.field_name, args, resolve, memoize)
+        args_key = freeze_args(args) if memoize and self.resolved is not None else None
+        if args_key is None:
+            value = resolve()
+            return value if entities is None else entities.canonical(value, key_of)
+
+        assert self.resolved is not None
+        key = (id(parent), info.field_name, args_key)
+        hit = self.resolved.get(key)
+        if hit is not None:
+            self.count('dedupe_hits')
+            return hit[1]
+        self.count('dedupe_misses')
+        value = resolve()
+        if entities is not None:
+            value = entities.canonical(value, key_of)
+        if _is_memoizable(value):
+            self.resolved[key] = (parent, value)
+        return value
+
+    def count(self, name: str) -> None:
+        """Add one to `stats[name]`, safely from any thread."""
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def inject(self, t: Type) -> Any:
+        """Return this request's instance of `t`, acquiring it on first use."""
+        with self._lock:
+            if t in self._resources:
+                return self._resources[t]
+            provider = self.providers.get(t)
+            if provider is None:
+                raise LookupError(f"No provider for Inject[{types.type_repr(t)}]; pass one to execute(providers=...)")
+            if hasattr(provider, 'acquire'):
+                value = provider.acquire()
+                self._releases.append(lambda: provider.release(value))
+            else:
+                value = provider()
+            self._resources[t] = value
+            return value
+
+    def prepare(
+        self,
+        schema: GraphQLSchema,
+        source: Union[str, ast.Document],
+        operation_name: Optional[str] = None,
+    ) -> Union[ast.Document, ExecutionResult]:
+        """Parse and validate `source`; on failure, return the error result.
+
+        Introspection is refused here if the schema blocks it, so every way
+        of executing an operation honours that. If `schema` has metrics, the
+        time taken is recorded for `operation_name`."""
+        if isinstance(schema, Schema) and schema.introspection == 'block':
+            blocked = schema.answer_introspection(source, operation_name)
+            if blocked is not None:
+                return blocked
+        metrics: Optional[Metrics] = getattr(schema, 'metrics', None)
+        start = time.perf_counter()
+        try:
+            document = parse(source) if isinstance(source, str) else source
+        except GraphQLError as e:
+            return ExecutionResult(errors=[e], invalid=True)
+        self.document = document
+        if isinstance(source, str):
+            parsed = time.perf_counter()
+            self.record_phase(metrics, 'parse', operation_name, start, parsed)
+            start = parsed
+        validation_errors = validate(schema, document, directives.RULES)
+        self.record_phase(metrics, 'validate', operation_name, start, time.perf_counter())
+        if validation_errors:
+            return ExecutionResult(errors=validation_errors, invalid=True)
+        return document
+
+    def record_phase(
+        self,
+        metrics: Optional[Metrics],
+        phase: str,
+        operation_name: Optional[str],
+        start: float,
+        end: float,
+    ) -> None:
+        if metrics is not None:
+            metrics.observe_phase(phase, operation_name, end - start)
+        if self.trace is not None:
+            self.trace.phase(phase, start, end)
+
+    def run(
+        self,
+        schema: GraphQLSchema,
+        source: Union[str, ast.Document],
+        root: Any = None,
+        variables: Optional[Dict[str, Any]] = None,
+        operation_name: Optional[str] = None,
+    ) -> ExecutionResult:
+        memory = self.limits.sample_memory() if self.limits is not None else None
+        if memory is not None:
+            memory.start()
+        at = self.recorder.now() if self.recorder is not None else 0.0
+        start = time.perf_counter()
+        try:
+            result = self._run(schema, source, root, variables, operation_name)
+        finally:
+            measured = memory.stop() if memory is not None else None
+        if self.recorder is not None:
+            self.recorder.record(source, operation_name, variables, at, time.perf_counter() - start, result)
+        if self.usage is not None:
+            if self.usage.error is not None:
+                result = ExecutionResult(errors=[self.usage.error])
+            if measured is not None:
+                result.extensions['usage'] = dict(nodes=self.usage.nodes, bytes=self.usage.bytes, **measured)
+        if self.trace is not None and self.tracer is not None:
+            self.tracer.finish(self.trace, result, operation_name, self.document)
+        return result
+
+    def _run(
+        self,
+        schema: GraphQLSchema,
+        source: Union[str, ast.Document],
+        root: Any,
+        variables: Optional[Dict[str, Any]],
+        operation_name: Optional[str],
+    ) -> ExecutionResult:
+        if isinstance(schema, Schema):
+            answer = schema.answer_introspection(source, operation_name)
+            if answer is not None:
+                return answer
+        document = self.prepare(schema, source, operation_name)
+        if isinstance(document, ExecutionResult):
+            return document
+        metrics: Optional[Metrics] = getattr(schema, 'metrics', None)
+        start = time.perf_counter()
+        try:
+            return gql_execute(
+                schema,
+                document,
+                root=root,
+                context=self,
+                variables=variables,
+                operation_name=operation_name,
+                executor=schema.make_executor() if isinstance(schema, Schema) else None,
+            )
+        except GraphQLError as e:
+            # e.g. unknown operation name or bad variables
+            return ExecutionResult(errors=[e], invalid=True)
+        finally:
+            self.record_phase(metrics, 'execute', operation_name, start, time.perf_counter())
+
+    def close(self) -> None:
+        """Release per-request state. Called by `execute` when it is done."""
+        if self._owns_entities:
+            self.entities = None
+        if self.resolved is not None:
+            self.resolved = {}
+        releases, self._releases = self._releases, []
+        self._resources = {}
+        error: Optional[BaseException] = None
+        for release in reversed(releases):
+            try:
+                release()
+            except Exception as e:
+                error = error or e
+        with self._stats_lock:
+            counts, self.stats = self.stats, Counter()
+        with _stats_lock:
+            stats.update(counts)
+        if error is not None:
+            raise error
+
+def inject(info: ResolveInfo, ann: types.AInjected) -> Any:
+    """Return the value for a resolver parameter annotated with `ann`."""
+    request = info.context
+    if ann.marker is types.Context:
+        return request.context if isinstance(request, Request) else request
+    if not isinstance(request, Request):
+        raise RuntimeError(f"Inject[{types.type_repr(ann.of_type)}] parameters need graphotype.execute")
+    return request.inject(ann.of_type)
+
+def execute(
+    schema: GraphQLSchema,
+    source: Union[str, ast.Document],
+    root: Any = None,
+    context: Any = None,
+    variables: Optional[Dict[str, Any]] = None,
+    operation_name: Optional[str] = None,
+    entity_cache: Union[bool, EntityCache, None] = None,
+    dedupe: bool = True,
+    providers: Optional[Dict[Type, Any]] = None,
+    tracer: Optional[Tracer] = None,
+    limits: Optional[Limits] = None,
+    recorder: Optional[Recorder] = None,
+) -> ExecutionResult:
+    """Parse, validate and execute `source` against `schema`.
+
+    This takes the same arguments as `graphql.graphql`, plus:
+    - entity_cache: True to enable a per-request `EntityCache`, or an
+      `EntityCache` instance to share between requests.
+    - dedupe: False to call resolvers again for repeated (parent, field,
+      arguments), see `Request`.
+    - providers: where to get the values of `Inject[T]` parameters, see
+      `Request`.
+    - tracer: a `graphotype.tracing.Tracer` to trace (a sample of) operations.
+    - limits: `graphotype.limits.Limits` on the size of the result.
+    - recorder: a `graphotype.recording.Recorder` to record (a sample of)
+      operations with.
+    """
+    request = Request(
+        context, entity_cache=entity_cache, dedupe=dedupe, providers=providers, tracer=tracer, limits=limits,
+        recorder=recorder
+    )
+    try:
+        return request.run(schema, source, root, variables, operation_name)
+    finally:
+        request.close()
@@ -0,0 +1,384 @@
+"""Incremental delivery with `@defer` and `@stream`.
+
+`execute_incremental` yields the response as a series of payloads, following
+the GraphQL incremental delivery proposal: first everything that isn't
+deferred, `{"data": ..., "hasNext": true}`, then one payload per deferred
+fragment or streamed list item,
+
+    {"incremental": [{"data": ..., "path": [...], "label": ...}], "hasNext": ...}
+    {"incremental": [{"items": [...], "path": [..., index]}], "hasNext": ...}
+
+until one with `"hasNext": false`. Only fields annotated `Iterator[...]` or
+`Iterable[...]` may be streamed (see `directives.StreamOnlyStreamableFields`),
+since their items come out of the resolver one at a time anyway.
+
+Deferred work runs in the order it was found, after the initial payload has
+been yielded, so a slow field behind `@defer` no longer holds up the rest of
+the response. Work under a field which turned out null (because of an error)
+is dropped.
+"""
+from collections import OrderedDict, deque
+import itertools
+import sys
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Set, Union
+
+from graphql import GraphQLSchema
+from graphql.error import GraphQLError, GraphQLLocatedError, format_error
+from graphql.execution.base import ExecutionResult, ResolveInfo
+from graphql.execution.executor import complete_leaf_value, get_default_resolve_type_fn, resolve_or_error
+from graphql.execution.executors.sync import SyncExecutor
+from graphql.execution.utils import (
+    ExecutionContext,
+    default_resolve_fn,
+    does_fragment_condition_match,
+    get_field_def,
+    get_field_entry_key,
+    get_operation_root_type,
+    should_include_node,
+)
+from graphql.execution.values import get_argument_values
+from graphql.language import ast
+from graphql.language.visitor import Visitor, visit
+from graphql.pyutils.default_ordered_dict import DefaultOrderedDict
+from graphql.type import (
+    GraphQLDirective,
+    GraphQLEnumType,
+    GraphQLInterfaceType,
+    GraphQLList,
+    GraphQLNonNull,
+    GraphQLObjectType,
+    GraphQLScalarType,
+    GraphQLUnionType,
+)
+from promise import Promise, is_thenable
+
+from .directives import DeferDirective, StreamDirective
+from .execution import Request
+
+Path = List[Union[str, int]]
+
+class _FindIncremental(Visitor):
+    def __init__(self) -> None:
+        self.found = False
+
+    def enter_Directive(self, node: ast.Directive, *args: Any) -> None:
+        if node.name.value in (DeferDirective.name, StreamDirective.name):
+            self.found = True
+
+def is_incremental(document: ast.Document) -> bool:
+    """Whether `document` uses `@defer` or `@stream` anywhere."""
+    finder = _FindIncremental()
+    visit(document, finder)
+    return finder.found
+
+class _Deferred:
+    def __init__(self, path: Path, label: Optional[str], parent_type: GraphQLObjectType, source: Any, selection_set: ast.SelectionSet) -> None:
+        self.path = path
+        self.label = label
+        self.parent_type = parent_type
+        self.source = source
+        self.selection_set = selection_set
+
+    def run(self, executor: 'Executor') -> Optional[Dict[str, Any]]:
+        fields = executor.collect(self.parent_type, [self.selection_set], self.path, self.source)
+        try:
+            data: Optional[Dict[str, Any]] = executor.execute_fields(self.parent_type, self.source, fields, self.path)
+        except Exception as e:
+            executor.report(e, [], self.path)
+            data = None
+        return {'data': data, 'path': self.path}
+
+class _Stream:
+    def __init__(self, path: Path, label: Optional[str], items: Iterator[Any], item_type: Any, field_asts: List[ast.Field], info: ResolveInfo, index: int) -> None:
+        self.path = path
+        self.label = label
+        self.items = items
+        self.item_type = item_type
+        self.field_asts = field_asts
+        self.info = info
+        self.index = index
+
+    def run(self, executor: 'Executor') -> Optional[Dict[str, Any]]:
+        path = self.path + [self.index]
+        try:
+            item = next(self.items)
+        except StopIteration:
+            return None
+        except Exception as e:
+            executor.report(e, self.field_asts, self.path)
+            return None
+        try:
+            value = executor.complete_catching(self.item_type, self.field_asts, self.info, path, executor.wait(item))
+        except Exception as e:
+            # a non-null item failed
+            executor.report(e, self.field_asts, path)
+            value = None
+        self.index += 1
+        executor.pending.append(self)
+        return {'items': [value], 'path': path}
+
+class Executor:
+    """Executes an operation much as graphql-core does, but one field at a time.
+
+    Unlike graphql-core's executor, this one can set work aside for later
+    (`pending`), and subclasses can change how results are built by
+    overriding `make_object`, `make_list` and `make_leaf`.
+    """
+    def __init__(self, exe_context: ExecutionContext) -> None:
+        self.exe_context = exe_context
+        self.schema = exe_context.schema
+        self.pending: Deque[Union[_Deferred, _Stream]] = deque()
+        self.nulled: Set[tuple] = set()
+
+    def report(self, error: Exception, field_asts: List[ast.Field], path: Path) -> None:
+        if not isinstance(error, GraphQLError):
+            error = GraphQLLocatedError(field_asts, original_error=error, path=path)
+        self.exe_context.report_error(error, sys.exc_info()[2])
+
+    def wait(self, value: Any) -> Any:
+        if is_thenable(value):
+            try:
+                return Promise.resolve(value).get()
+            except Exception as e:
+                return e
+        return value
+
+    def directive_args(self, directive: GraphQLDirective, directives: Optional[List[ast.Directive]]) -> Optional[Dict[str, Any]]:
+        """The arguments of `directive` if it's present and not `if: false`."""
+        for node in directives or []:
+            if node.name.value == directive.name:
+                args = get_argument_values(directive.args, node.arguments, self.exe_context.variable_values)
+                return None if args.get('if') is False else args
+        return None
+
+    def collect(self, runtime_type: GraphQLObjectType, selection_sets: Iterable[ast.SelectionSet], path: Path, source: Any) -> DefaultOrderedDict:
+        """Like graphql-core's `collect_fields`, but set aside deferred fragments."""
+        fields = DefaultOrderedDict(list)
+        visited: Set[str] = set()
+        for selection_set in selection_sets:
+            self._collect(runtime_type, selection_set, fields, visited, path, source)
+        return fields
+
+    def _collect(self, runtime_type: GraphQLObjectType, selection_set: ast.SelectionSet, fields: DefaultOrderedDict, visited: Set[str], path: Path, source: Any) -> None:
+        ctx = self.exe_context
+        for selection in selection_set.selections:
+            if not should_include_node(ctx, selection.directives):
+                continue
+            if isinstance(selection, ast.Field):
+                fields[get_field_entry_key(selection)].append(selection)
+                continue
+            if isinstance(selection, ast.InlineFragment):
+                fragment = selection
+            else:
+                name = selection.name.value
+                if name in visited:
+                    continue
+                visited.add(name)
+                fragment = ctx.fragments[name]
+                if not should_include_node(ctx, fragment.directives):
+                    continue
+            if not does_fragment_condition_match(ctx, fragment, runtime_type):
+                continue
+            defer = self.directive_args(DeferDirective, selection.directives)
+            if defer is not None:
+                self.pending.append(_Deferred(path, defer.get('label'), runtime_type, source, fragment.selection_set))
+            else:
+                self._collect(runtime_type, fragment.selection_set, fields, visited, path, source)
+
+    def execute_fields(self, parent_type: GraphQLObjectType, source: Any, fields: DefaultOrderedDict, path: Path) -> Any:
+        result: Dict[str, Any] = OrderedDict()
+        for response_name, field_asts in fields.items():
+            field_def = get_field_def(self.schema, parent_type, field_asts[0].name.value)
+            if not field_def:
+                continue
+            result[response_name] = self.resolve_field(parent_type, source, field_asts, field_def, path + [response_name])
+        return self.make_object(result)
+
+    def make_object(self, fields: Dict[str, Any]) -> Any:
+        return fields
+
+    def make_list(self, items: List[Any]) -> Any:
+        return items
+
+    def make_leaf(self, value: Any) -> Any:
+        return value
+
+    def resolve_field(self, parent_type: GraphQLObjectType, source: Any, field_asts: List[ast.Field], field_def: Any, path: Path) -> Any:
+        exe_context = self.exe_context
+        info = ResolveInfo(
+            field_asts[0].name.value,
+            field_asts,
+            field_def.type,
+            parent_type,
+            schema=self.schema,
+            fragments=exe_context.fragments,
+            root_value=exe_context.root_value,
+            operation=exe_context.operation,
+            variable_values=exe_context.variable_values,
+            context=exe_context.context_value,
+            path=path,
+        )
+        try:
+            args = exe_context.get_argument_values(field_def, field_asts[0])
+        except Exception as e:
+            result: Any = e
+        else:
+            result = self.wait(resolve_or_error(
+                field_def.resolver or default_resolve_fn, source, info, args, exe_context.executor
+            ))
+        return self.complete_catching(field_def.type, field_asts, info, path, result)
+
+    def complete_catching(self, return_type: Any, field_asts: List[ast.Field], info: ResolveInfo, path: Path, result: Any) -> Any:
+        """Complete a value, nulling it on error unless it's non-null."""
+        if isinstance(return_type, GraphQLNonNull):
+            return self.complete(return_type, field_asts, info, path, result)
+        try:
+            return self.complete(return_type, field_asts, info, path, result)
+        except Exception as e:
+            self.report(e, field_asts, path)
+            self.nulled.add(tuple(path))
+            return None
+
+    def complete(self, return_type: Any, field_asts: List[ast.Field], info: ResolveInfo, path: Path, result: Any) -> Any:
+        if isinstance(result, Exception):
+            raise GraphQLLocatedError(field_asts, original_error=result, path=path)
+        if isinstance(return_type, GraphQLNonNull):
+            completed = self.complete(return_type.of_type, field_asts, info, path, result)
+            if completed is None:
+                raise GraphQLError(
+                    f"Cannot return null for non-nullable field {info.parent_type}.{info.field_name}.",
+                    field_asts,
+                    path=path,
+                )
+            return completed
+        if result is None:
+            return None
+        if isinstance(return_type, GraphQLList):
+            return self.complete_list(return_type, field_asts, info, path, result)
+        if isinstance(return_type, (GraphQLScalarType, GraphQLEnumType)):
+            return self.make_leaf(complete_leaf_value(return_type, path, result))
+        runtime_type = return_type
+        if isinstance(return_type, (GraphQLInterfaceType, GraphQLUnionType)):
+            if return_type.resolve_type:
+                runtime_type = return_type.resolve_type(result, info)
+            else:
+                runtime_type = get_default_resolve_type_fn(result, info, return_type)
+            if isinstance(runtime_type, str):
+                runtime_type = self.schema.get_type(runtime_type)
+            if not isinstance(runtime_type, GraphQLObjectType) or not self.schema.is_possible_type(return_type, runtime_type):
+                raise GraphQLError(
+                    f'Abstract type {return_type} must resolve to a possible Object type at runtime '
+                    f'for field {info.parent_type}.{info.field_name}, received "{runtime_type}".',
+                    field_asts,
+                )
+        if runtime_type.is_type_of and not runtime_type.is_type_of(result, info):
+            raise GraphQLError(
+                f'Expected value of type "{runtime_type}" but got: {type(result).__name__}.',
+                field_asts,
+            )
+        selection_sets = [f.selection_set for f in field_asts if f.selection_set]
+        subfields = self.collect(runtime_type, selection_sets, path, result)
+        return self.execute_fields(runtime_type, result, subfields, path)
+
+    def complete_list(self, list_type: GraphQLList, field_asts: List[ast.Field], info: ResolveInfo, path: Path, result: Any) -> Any:
+        item_type = list_type.of_type
+        stream = self.directive_args(StreamDirective, field_asts[0].directives)
+        items = iter(result)
+        if stream is not None:
+            items_now: Iterable[Any] = itertools.islice(items, stream.get('initialCount') or 0)
+        else:
+            items_now = items
+        completed = [
+            self.complete_catching(item_type, field_asts, info, path + [index], self.wait(item))
+            for index, item in enumerate(items_now)
+        ]
+        if stream is not None:
+            self.pending.append(_Stream(path, stream.get('label'), items, item_type, field_asts, info, len(completed)))
+        return self.make_list(completed)
+
+    def is_nulled(self, path: Path) -> bool:
+        return any(tuple(path[:i]) in self.nulled for i in range(len(path) + 1))
+
+    def errors_since(self, count: int) -> Dict[str, Any]:
+        errors = self.exe_context.errors[count:]
+        return {'errors': [format_error(e) for e in errors]} if errors else {}
+
+    def run(self, root_type: GraphQLObjectType, root: Any) -> Iterator[Dict[str, Any]]:
+        operation = self.exe_context.operation
+        fields = self.collect(root_type, [operation.selection_set], [], root)
+        try:
+            data: Optional[Dict[str, Any]] = self.execute_fields(root_type, root, fields, [])
+        except Exception as e:
+            self.report(e, [], [])
+            data = None
+        initial: Dict[str, Any] = {'data': data}
+        initial.update(self.errors_since(0))
+        self.prune()
+        if not self.pending:
+            yield initial
+            return
+        initial['hasNext'] = True
+        yield initial
+        has_next = True
+        while self.pending:
+            work = self.pending.popleft()
+            errors = len(self.exe_context.errors)
+            incremental = work.run(self)
+            self.prune()
+            if incremental is None:
+                continue
+            if work.label is not None:
+                incremental['label'] = work.label
+            incremental.update(self.errors_since(errors))
+            has_next = bool(self.pending)
+            yield {'incremental': [incremental], 'hasNext': has_next}
+        if has_next:
+            # the last of the pending work had nothing to deliver
+            yield {'hasNext': False}
+
+    def prune(self) -> None:
+        self.pending = deque(work for work in self.pending if not self.is_nulled(work.path))
+
+def execute_incremental(
+    schema: GraphQLSchema,
+    source: Union[str, ast.Document],
+    root: Any = None,
+    context: Any = None,
+    variables: Optional[Dict[str, Any]] = None,
+    operation_name: Optional[str] = None,
+    **request_options: Any
+) -> Iterator[Dict[str, Any]]:
+    """Like `graphotype.execute`, but yield the response in payloads.
+
+    Yields just one payload, the usual result dict, if nothing is deferred.
+    `request_options` are passed on to `Request`. If the result goes over
+    its `limits`, the payload that did so is replaced by the error, and is
+    the last.
+    """
+    request = Request(context, **request_options)
+    try:
+        document = request.prepare(schema, source, operation_name)
+        if isinstance(document, ExecutionResult):
+            yield document.to_dict()
+            return
+        try:
+            exe_context = ExecutionContext(
+                schema, document, root, request, variables or {}, operation_name,
+                SyncExecutor(), None, False
+            )
+        except GraphQLError as e:
+            yield {'errors': [format_error(e)]}
+            return
+        if exe_context.operation.operation == 'subscription':
+            yield {'errors': [{'message': 'Subscriptions cannot be delivered incrementally'}]}
+            return
+        root_type = get_operation_root_type(schema, exe_context.operation)
+        usage = request.usage
+        for index, payload in enumerate(Executor(exe_context).run(root_type, root)):
+            if usage is not None and usage.error is not None:
+                errors = [format_error(usage.error)]
+                yield {'data': None, 'errors': errors} if index == 0 else {'errors': errors, 'hasNext': False}
+                return
+            yield payload
+    finally:
+        request.close()
@@ -0,0 +1,193 @@
+"""Schemas whose types are built as they're used.
+
+graphql-core's GraphQLSchema walks every type reachable from its roots as
+it's constructed, building each type's fields (and so translating every
+annotation of every class) before the first operation runs. With
+`make_schema(..., lazy=True)` the schema's type map is a `LazyTypeMap`
+instead, which starts with the roots and grows as validation and execution
+reach further: building the fields of a type translates the types of its
+fields and arguments, but not their fields in turn.
+
+So a process that only serves part of a huge schema only builds that
+part. Things which need every type (introspection, `print_schema`, error
+messages suggesting type names) build the rest first, as does looking up a
+type by a name not reached yet, e.g. an input type named by a variable.
+
+`make_schema(..., freeze=True)` uses the same map the other way around:
+it builds every type up front, timing each, then `check`s and `freeze`s it.
+"""
+from collections import OrderedDict, defaultdict
+import threading
+import time
+from types import MappingProxyType
+from typing import Any, Callable, DefaultDict, Dict, Iterable, List, Optional, Set, TypeVar
+
+from graphql import GraphQLInputObjectType, GraphQLInterfaceType, GraphQLObjectType, GraphQLUnionType
+from graphql.type.definition import GraphQLNamedType, get_named_type
+from graphql.type.typemap import GraphQLTypeMap
+
+T = TypeVar('T')
+
+# types with fields, which may be thunks
+_COMPOSITE = (GraphQLObjectType, GraphQLInterfaceType, GraphQLInputObjectType)
+
+def once(f: Callable[[], T], lock: Any) -> Callable[[], T]:
+    """`f`, run at most once, holding `lock`; later calls return its result.
+
+    graphql-core runs the `fields` and `interfaces` thunks of a type the
+    first time they're accessed, without a lock, so two threads may both run
+    them. Wrapped like this, the second waits for the first and gets the same
+    fields."""
+    result: List[T] = []
+    def call() -> T:
+        if not result:
+            with lock:
+                if not result:
+                    result.append(f())
+        return result[0]
+    return call
+
+class LazyTypeMap(GraphQLTypeMap):
+    """The named types of a schema, found as they're reached rather than all
+    up front like GraphQLTypeMap.
+
+    Types are `add`ed when SchemaCreator translates them, and when `build`
+    builds the fields of a type referring to them. Adding an interface adds
+    its `implementations`, as GraphQLSchema can't find them itself. Looking up a name that
+    isn't here yet builds the fields of every type that is, a level at a
+    time, until it turns up or there's nothing left to build; `complete`
+    builds everything. `lock` is held while adding and building, and must be
+    the (reentrant) lock the schema's thunks run under.
+
+    Unlike GraphQLTypeMap, it doesn't check that objects implement their
+    interfaces correctly until asked to (`check`).
+    """
+    def __init__(
+        self,
+        types: Iterable[GraphQLNamedType],
+        lock: threading.RLock,
+        implementations: Callable[[GraphQLNamedType], Iterable[GraphQLNamedType]] = lambda t: [],
+    ) -> None:
+        OrderedDict.__init__(self)
+        self._possible_type_map: DefaultDict[str, Set[str]] = defaultdict(set)
+        self._implementations: DefaultDict[str, List[GraphQLObjectType]] = defaultdict(list)
+        self.lock = lock
+        self.implementations = implementations
+        self.completed = False
+        self.frozen = False
+        self._built: Set[str] = set()
+        with lock:
+            for t in types:
+                self.add(t)
+
+    def add(self, type: Any) -> None:
+        """Add the named type of `type`, and the types it can't be used
+        without: a union's members, an object's interfaces, and an
+        interface's implementations."""
+        named = get_named_type(type)
+        with self.lock:
+            if named.name in self:
+                assert self[named.name] is named, (
+                    f'Schema must contain unique named types but contains multiple types named "{named.name}".'
+                )
+                return
+            self[named.name] = named
+            if isinstance(named, GraphQLUnionType):
+                for t in named.types:
+                    self.add(t)
+            elif isinstance(named, GraphQLObjectType):
+                for interface in named.interfaces:
+                    self.add(interface)
+                    self._implementations[interface.name].append(named)
+            elif isinstance(named, GraphQLInterfaceType):
+                for t in self.implementations(named):
+                    self.add(t)
+
+    def build(self, type: Any) -> None:
+        """Build the fields of `type`, adding the types of their values and
+        arguments."""
+        with self.lock:
+            for field in type.fields.values():
+                self.add(field.type)
+                for arg in getattr(field, 'args', {}).values():
+                    self.add(arg.type)
+            self._built.add(type.name)
+
+    def build_level(self, timings: Optional[Dict[str, float]] = None) -> bool:
+        """Build every type here whose fields aren't built yet, recording
+        the seconds each took in `timings`. False if there were none: the map
+        is complete."""
+        with self.lock:
+            pending = [t for t in self.values() if isinstance(t, _COMPOSITE) and t.name not in self._built]
+            for t in pending:
+                start = time.perf_counter()
+                self.build(t)
+                if timings is not None:
+                    timings[t.name] = time.perf_counter() - start
+            if not pending:
+                self.completed = True
+            return bool(pending)
+
+    def complete(self, timings: Optional[Dict[str, float]] = None) -> None:
+        """Build every type reachable from the roots."""
+        while not self.completed and self.build_level(timings):
+            pass
+
+    def check(self) -> None:
+        """Raise AssertionError, as GraphQLTypeMap would have, if an object
+        doesn't implement one of its interfaces correctly."""
+        self.complete()
+        for t in list(self.values()):
+            if isinstance(t, GraphQLObjectType):
+                for interface in t.interfaces:
+                    self.assert_object_implements_interface(self, t, interface)
+
+    def freeze(self) -> None:
+        """Build everything, then make the map, and the fields, arguments
+        and interfaces of its types, read-only. (graphql-core's own
+        introspection types, which every schema shares, are left be.)"""
+        with self.lock:
+            self.complete()
+            for t in self.values():
+                if t.name.startswith('__'):
+                    continue
+                if isinstance(t, _COMPOSITE) and not isinstance(t.fields, MappingProxyType):
+                    for field in t.fields.values():
+                        if getattr(field, 'args', None):
+                            field.args = MappingProxyType(field.args)
+                    # replace the thunk too, so nothing can build them again
+                    t._fields = vars(t)['fields'] = MappingProxyType(t.fields)
+                if isinstance(t, GraphQLObjectType):
+                    t._provided_interfaces = vars(t)['interfaces'] = tuple(t.interfaces)
+            self.frozen = True
+
+    def _check_mutable(self) -> None:
+        if self.frozen:
+            raise TypeError("The types of a frozen schema can't be changed")
+
+    def __setitem__(self, name: str, type: Any) -> None:
+        self._check_mutable()
+        OrderedDict.__setitem__(self, name, type)
+
+    def __delitem__(self, name: str) -> None:
+        self._check_mutable()
+        OrderedDict.__delitem__(self, name)
+
+    def pop(self, *args: Any) -> Any:
+        self._check_mutable()
+        return OrderedDict.pop(self, *args)
+
+    def popitem(self, last: bool = True) -> Any:
+        self._check_mutable()
+        return OrderedDict.popitem(self, last)
+
+    def clear(self) -> None:
+        self._check_mutable()
+        OrderedDict.clear(self)
+
+    def get(self, name: str, default: Any = None) -> Any:
+        if name not in self and not self.completed:
+            with self.lock:
+                while name not in self and self.build_level():
+                    pass
+        return OrderedDict.get(self, name, default)
@@ -0,0 +1,223 @@
+"""Limits on the size of results, and what operations allocate.
+
+Pass `Limits` to `execute` (or to `serve`) and each request counts, as its
+fields are resolved, the nodes of its result (one per field, plus one per
+list item) and about how many bytes they'll take once encoded as JSON.
+Once either goes over `max_nodes` or `max_bytes`, no more resolvers are
+called, and the operation's result is a single error, with no data:
+
+    {"data": null, "errors": [{"message": "The result exceeds the limit of 10000 nodes", ...}]}
+
+`serve` also checks the size of each encoded response against `max_bytes`.
+
+For debugging, a `memory_sample_rate` of operations are run with
+`tracemalloc` snapshots taken before and after; those results get
+`extensions['usage']` with their node and byte counts, the memory they
+allocated (and which was still allocated when they finished), its peak,
+and the lines allocating the most of it. tracemalloc slows everything
+down a lot, and measures the whole process, so other threads' allocations
+are included too: it's meant for one-off measurements, not production.
+"""
+import enum
+import random
+import threading
+import tracemalloc
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+from graphql import GraphQLEnumType, GraphQLList, GraphQLNonNull, GraphQLScalarType, ResolveInfo
+from graphql.error import GraphQLError
+from graphql.type.definition import get_named_type
+
+# number of frames kept per allocation while measuring
+TRACEMALLOC_FRAMES = 1
+
+class LimitExceeded(GraphQLError):
+    """The error an operation's result is replaced with when it's too large."""
+    def __init__(self, message: str) -> None:
+        super().__init__(message, extensions={'code': 'RESULT_TOO_LARGE'})
+
+class Limits:
+    """Settings for `Usage`.
+
+    - max_nodes: the most fields and list items a result may have.
+    - max_bytes: about the most bytes a result may take, as JSON.
+    - memory_sample_rate: the fraction of operations whose allocations to
+      measure.
+
+    None means no limit.
+    """
+    def __init__(
+        self,
+        max_nodes: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        memory_sample_rate: float = 0.0,
+    ) -> None:
+        self.max_nodes = max_nodes
+        self.max_bytes = max_bytes
+        self.memory_sample_rate = memory_sample_rate
+
+    def check_bytes(self, size: int) -> Optional[LimitExceeded]:
+        """The error for an encoded result of `size` bytes, if it's too large."""
+        if self.max_bytes is not None and size > self.max_bytes:
+            return LimitExceeded(f"The result exceeds the limit of {self.max_bytes} bytes")
+        return None
+
+    def sample_memory(self) -> Optional['MemoryMeasurement']:
+        """A new MemoryMeasurement, if this operation is to be measured."""
+        if self.memory_sample_rate > 0 and random.random() < self.memory_sample_rate:
+            return MemoryMeasurement()
+        return None
+
+def _leaf_size(value: Any) -> int:
+    """About how many bytes a scalar or enum value takes as JSON."""
+    if value is None:
+        return 4
+    if isinstance(value, bool):
+        return 5
+    if isinstance(value, str):
+        return len(value) + 2
+    if isinstance(value, enum.Enum):
+        return len(value.name) + 2
+    if isinstance(value, (int, float)):
+        return len(str(value))
+    return len(str(value)) + 2
+
+class Usage:
+    """The nodes and bytes of one request's result so far. Thread-safe."""
+    def __init__(self, limits: Limits) -> None:
+        self.limits = limits
+        self.nodes = 0
+        self.bytes = 0
+        self.error: Optional[LimitExceeded] = None
+        self._lock = threading.Lock()
+
+    def check(self) -> None:
+        """Raise if the result is already over its limits."""
+        if self.error is not None:
+            raise self.error
+
+    def add(self, info: ResolveInfo, value: Any) -> Any:
+        """Count `value`, resolved for the field described by `info`, and
+        return it; raise LimitExceeded if that's one too many.
+
+        Lists produced lazily (say, by a generator) are returned wrapped, so
+        that their items are counted, and checked, as they're produced."""
+        leaf = isinstance(get_named_type(info.return_type), (GraphQLScalarType, GraphQLEnumType))
+        value, nodes, size = self._measure(value, _list_depth(info.return_type), leaf)
+        # "name": value,
+        self._count(nodes + 1, size + len(info.field_name) + 4)
+        return value
+
+    def _measure(self, value: Any, depth: int, leaf: bool) -> Tuple[Any, int, int]:
+        """`value` (wrapped, if it's a lazy list), and its nodes and bytes
+        but those of its lazy lists' items. `depth` says how many lists deep
+        it is."""
+        if value is None:
+            return value, 0, 4
+        if depth == 0:
+            # an object's braces; its fields are counted as they're resolved
+            return value, 0, _leaf_size(value) if leaf else 2
+        if not isinstance(value, (list, tuple)):
+            # brackets
+            return self._lazy(value, depth, leaf), 0, 2
+        # brackets and commas
+        nodes, size = len(value), len(value) + 1
+        if depth == 1:
+            for item in value:
+                size += _leaf_size(item) if leaf or item is None else 2
+            return value, nodes, size
+        items = []
+        for item in value:
+            item, item_nodes, item_size = self._measure(item, depth - 1, leaf)
+            items.append(item)
+            nodes += item_nodes
+            size += item_size
+        return items, nodes, size
+
+    def _lazy(self, items: Iterable[Any], depth: int, leaf: bool) -> Iterator[Any]:
+        for item in items:
+            item, nodes, size = self._measure(item, depth - 1, leaf)
+            # the item, and its comma
+            self._count(nodes + 1, size + 1)
+            yield item
+
+    def _count(self, nodes: int, size: int) -> None:
+        with self._lock:
+            self.nodes += nodes
+            self.bytes += size
+            limits = self.limits
+            if self.error is None:
+                if limits.max_nodes is not None and self.nodes > limits.max_nodes:
+                    self.error = LimitExceeded(f"The result exceeds the limit of {limits.max_nodes} nodes")
+                elif limits.max_bytes is not None and self.bytes > limits.max_bytes:
+                    self.error = LimitExceeded(f"The result exceeds the limit of {limits.max_bytes} bytes")
+        self.check()
+
+def _list_depth(gql_type: Any) -> int:
+    """How many lists deep the values of `gql_type` are."""
+    depth = 0
+    while isinstance(gql_type, (GraphQLNonNull, GraphQLList)):
+        if isinstance(gql_type, GraphQLList):
+            depth += 1
+        gql_type = gql_type.of_type
+    return depth
+
+_tracing_lock = threading.Lock()
+# MemoryMeasurements running, and whether we started tracemalloc for them
+_measuring = 0
+_started = False
+
+def _reset_peak() -> None:
+    """Make the current traced memory tracemalloc's peak, if possible.
+
+    Before Python 3.9 that needs restarting tracemalloc, losing the traces
+    other measurements use. The peak is fresh anyway if `start` has just
+    started tracing; otherwise it's the peak since tracing started, an
+    overestimate."""
+    reset_peak = getattr(tracemalloc, 'reset_peak', None)
+    if reset_peak is not None:
+        reset_peak()
+
+class MemoryMeasurement:
+    """What the process allocated between `start` and `stop`."""
+    def __init__(self) -> None:
+        self.before: Optional[tracemalloc.Snapshot] = None
+        self.start_size = 0
+
+    def start(self) -> None:
+        global _measuring, _started
+        with _tracing_lock:
+            if _measuring == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start(TRACEMALLOC_FRAMES)
+                _started = True
+            _measuring += 1
+            _reset_peak()
+            self.before = tracemalloc.take_snapshot()
+            self.start_size = tracemalloc.get_traced_memory()[0]
+
+    def stop(self, top: int = 5) -> Dict[str, Any]:
+        """Stop measuring; return the bytes and blocks allocated (and not
+        freed) since `start`, the peak above where we started, and the `top`
+        lines responsible for most of the allocated bytes."""
+        global _measuring, _started
+        assert self.before is not None
+        with _tracing_lock:
+            after = tracemalloc.take_snapshot()
+            peak = tracemalloc.get_traced_memory()[1]
+            _measuring -= 1
+            if _measuring == 0 and _started:
+                tracemalloc.stop()
+                _started = False
+        # leave out the snapshots' own bookkeeping
+        filters = [tracemalloc.Filter(False, tracemalloc.__file__)]
+        diff = after.filter_traces(filters).compare_to(self.before.filter_traces(filters), 'lineno')
+        return {
+            'allocated': sum(stat.size_diff for stat in diff),
+            'blocks': sum(stat.count_diff for stat in diff),
+            'peak': max(0, peak - self.start_size),
+            'top': [
+                {'line': str(stat.traceback), 'size': stat.size_diff, 'blocks': stat.count_diff}
+                for stat in sorted(diff, key=lambda stat: stat.size_diff, reverse=True)[:top]
+                if stat.size_diff > 0
+            ],
+        }
@@ -0,0 +1,177 @@
+"""Live queries: results kept up to date with JSON patches.
+
+`live(schema, query)` executes a query, yields its result, and then waits.
+Each execution records which types' fields it resolved; when application code
+calls `graphotype.invalidate('User')` after changing a User, every live query
+which touched User is executed again. If the result changed, it yields a JSON
+patch (RFC 6902) from the previous result to the new one, rather than the
+whole result again:
+
+    {"data": {...}, "revision": 0}
+    {"patch": [{"op": "replace", "path": "/data/user/name", "value": "Ann"}], "revision": 1}
+
+`apply_patch` applies such a patch on the receiving end. Over the WebSocket
+transport, queries marked `query @live { ... }` are run this way.
+"""
+import asyncio
+import copy
+import threading
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Union
+
+from graphql import GraphQLSchema
+from graphql.language import ast
+from graphql.utils.get_operation_ast import get_operation_ast
+
+from .directives import LiveDirective
+from .execution import Request
+
+Patch = List[Dict[str, Any]]
+
+class _LiveQuery:
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        self.loop = loop
+        self.changed = asyncio.Event()
+        # None until the first execution has finished: invalidating
+        # anything then may affect it
+        self.touched: Optional[Set[str]] = None
+
+    def invalidate(self, tags: Set[str]) -> None:
+        if self.touched is None or self.touched & tags:
+            self.loop.call_soon_threadsafe(self.changed.set)
+
+_live_queries: Set[_LiveQuery] = set()
+_live_lock = threading.Lock()
+
+def invalidate(*tags: str) -> None:
+    """Re-execute the live queries which resolved fields of any of these types.
+
+    Tags are GraphQL type names. Safe to call from any thread."""
+    tag_set = set(tags)
+    with _live_lock:
+        queries = list(_live_queries)
+    for query in queries:
+        query.invalidate(tag_set)
+
+def _escape(token: Union[str, int]) -> str:
+    return str(token).replace('~', '~0').replace('/', '~1')
+
+def _unescape(token: str) -> str:
+    return token.replace('~1', '/').replace('~0', '~')
+
+def diff(old: Any, new: Any, path: str = '') -> Patch:
+    """A JSON patch turning `old` into `new`; both are JSON-like values."""
+    if isinstance(old, dict) and isinstance(new, dict):
+        patch: Patch = []
+        for key in old:
+            if key not in new:
+                patch.append({'op': 'remove', 'path': f'{path}/{_escape(key)}'})
+        for key, value in new.items():
+            if key in old:
+                patch.extend(diff(old[key], value, f'{path}/{_escape(key)}'))
+            else:
+                patch.append({'op': 'add', 'path': f'{path}/{_escape(key)}', 'value': value})
+        return patch
+    if isinstance(old, list) and isinstance(new, list):
+        patch = []
+        for index in range(min(len(old), len(new))):
+            patch.extend(diff(old[index], new[index], f'{path}/{index}'))
+        for index in range(len(old), len(new)):
+            patch.append({'op': 'add', 'path': f'{path}/{index}', 'value': new[index]})
+        # remove from the end, so that earlier indices stay valid
+        for index in reversed(range(len(new), len(old))):
+            patch.append({'op': 'remove', 'path': f'{path}/{index}'})
+        return patch
+    if old == new and type(old) is type(new):
+        return []
+    return [{'op': 'replace', 'path': path, 'value': new}]
+
+def apply_patch(document: Any, patch: Patch) -> Any:
+    """Apply the add, remove and replace operations of a JSON patch.
+
+    Returns the patched document, which is a (partial) copy of `document`."""
+    document = copy.deepcopy(document)
+    for op in patch:
+        tokens = [_unescape(t) for t in op['path'].split('/')[1:]]
+        if not tokens:
+            document = op['value']
+            continue
+        target = document
+        for token in tokens[:-1]:
+            target = target[int(token)] if isinstance(target, list) else target[token]
+        last: Any = tokens[-1]
+        if isinstance(target, list):
+            last = len(target) if last == '-' else int(last)
+        if op['op'] == 'remove':
+            del target[last]
+        elif op['op'] == 'add' and isinstance(target, list):
+            target.insert(last, op['value'])
+        elif op['op'] in ('add', 'replace'):
+            target[last] = op['value']
+        else:
+            raise ValueError(f"Unsupported JSON patch operation {op['op']!r}")
+    return document
+
+def is_live(document: ast.Document, operation_name: Optional[str] = None) -> bool:
+    """Whether the operation to run is a query marked `@live`."""
+    operation = get_operation_ast(document, operation_name)
+    return (
+        operation is not None
+        and operation.operation == 'query'
+        and any(d.name.value == LiveDirective.name for d in operation.directives or [])
+    )
+
+async def live(
+    schema: GraphQLSchema,
+    source: Union[str, ast.Document],
+    root: Any = None,
+    context: Any = None,
+    variables: Optional[Dict[str, Any]] = None,
+    operation_name: Optional[str] = None,
+    min_interval: float = 0,
+    **request_options: Any
+) -> AsyncIterator[Dict[str, Any]]:
+    """Yield the result of a query, then patches whenever it changes.
+
+    Invalidations arriving while the query executes cause one more
+    execution afterwards; executions are at least `min_interval` seconds
+    apart. Executions run in the event loop's default executor, so
+    resolvers don't block the loop. Invalid queries yield one result with
+    errors and stop. `request_options` are passed on to each `Request`.
+    """
+    loop = asyncio.get_running_loop()
+    query = _LiveQuery(loop)
+
+    def run() -> Dict[str, Any]:
+        request = Request(context, **request_options)
+        try:
+            result = request.run(schema, source, root, variables, operation_name)
+            query.touched = set(request.touched)
+        finally:
+            request.close()
+        if result.invalid:
+            query.touched = set()
+        return result.to_dict()
+
+    with _live_lock:
+        _live_queries.add(query)
+    try:
+        query.changed.clear()
+        last = await loop.run_in_executor(None, run)
+        yield dict(last, revision=0)
+        if 'data' not in last:
+            return
+        revision = 0
+        while True:
+            await query.changed.wait()
+            if min_interval:
+                await asyncio.sleep(min_interval)
+            query.changed.clear()
+            result = await loop.run_in_executor(None, run)
+            patch = diff(last, result)
+            if patch:
+                revision += 1
+                yield {'patch': patch, 'revision': revision}
+            last = result
+    finally:
+        with _live_lock:
+            _live_queries.discard(query)
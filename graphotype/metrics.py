@@ -0,0 +1,177 @@
+"""Resolver and operation metrics, in Prometheus' text format.
+
+Pass a `Metrics` to `make_schema(..., metrics=Metrics())` and the resolver
+of every method and property is wrapped to count its calls and errors and
+time it, per `Type.field`. (Plain attributes aren't worth timing; calls
+answered by deduplication or the entity cache never reach the resolver, so
+aren't counted.) Resolvers returning promises (such as `@cpu_bound` methods)
+are timed until the promise settles. `graphotype.execute` also times each
+operation's parse, validate and execute phases. Without `metrics`, no
+wrappers are installed and nothing is recorded.
+
+`Metrics.render()` returns all of it, plus the process-wide
+`graphotype.execution.stats` counters, in the Prometheus exposition format;
+`serve` exposes it at `/metrics`.
+"""
+import bisect
+import functools
+import threading
+import time
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+from promise import Promise, is_thenable
+
+# Upper bounds in seconds, as Prometheus clients use by default
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PHASES = ('parse', 'validate', 'execute')
+
+class Histogram:
+    """Counts of observations falling in each of `buckets`, plus one bucket
+    for anything larger. Not thread-safe by itself."""
+    def __init__(self, buckets: Sequence[float] = BUCKETS) -> None:
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def copy(self) -> 'Histogram':
+        histogram = Histogram(self.buckets)
+        histogram.counts = list(self.counts)
+        histogram.sum = self.sum
+        histogram.count = self.count
+        return histogram
+
+class FieldMetrics:
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.lock = threading.Lock()
+        self.errors = 0
+        self.latency = Histogram(buckets)
+
+    @property
+    def calls(self) -> int:
+        return self.latency.count
+
+    def record(self, seconds: float, error: bool) -> None:
+        with self.lock:
+            self.latency.observe(seconds)
+            if error:
+                self.errors += 1
+
+    def snapshot(self) -> Tuple[int, Histogram]:
+        """The error count and latency histogram, as of now."""
+        with self.lock:
+            return self.errors, self.latency.copy()
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(labels: Dict[str, str]) -> str:
+    return ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+
+def _histogram(name: str, labels: Dict[str, str], histogram: Histogram) -> List[str]:
+    lines = []
+    cumulative = 0
+    bounds = [repr(float(b)) for b in histogram.buckets] + ['+Inf']
+    for bound, count in zip(bounds, histogram.counts):
+        cumulative += count
+        lines.append(f'{name}_bucket{{{_labels(dict(labels, le=bound))}}} {cumulative}')
+    lines.append(f'{name}_sum{{{_labels(labels)}}} {histogram.sum!r}')
+    lines.append(f'{name}_count{{{_labels(labels)}}} {histogram.count}')
+    return lines
+
+class Metrics:
+    """Metrics collected for one schema. Thread-safe."""
+    def __init__(self, buckets: Sequence[float] = BUCKETS) -> None:
+        self.buckets = tuple(buckets)
+        self.fields: Dict[Tuple[str, str], FieldMetrics] = {}
+        # (phase, operation name) -> Histogram
+        self.operations: Dict[Tuple[str, str], Histogram] = {}
+        self._lock = threading.Lock()
+
+    def field(self, type_name: str, field_name: str) -> FieldMetrics:
+        with self._lock:
+            key = (type_name, field_name)
+            if key not in self.fields:
+                self.fields[key] = FieldMetrics(self.buckets)
+            return self.fields[key]
+
+    def instrument(self, type_name: str, field_name: str, resolver: Callable) -> Callable:
+        """Wrap `resolver` of `type_name.field_name` to record its metrics."""
+        field = self.field(type_name, field_name)
+        @functools.wraps(resolver)
+        def instrumented(parent: Any, info: Any, **args: Any) -> Any:
+            start = time.perf_counter()
+            try:
+                result = resolver(parent, info, **args)
+            except Exception:
+                field.record(time.perf_counter() - start, True)
+                raise
+            if is_thenable(result):
+                def fulfilled(value: Any) -> Any:
+                    field.record(time.perf_counter() - start, isinstance(value, Exception))
+                    return value
+                def rejected(error: Exception) -> Any:
+                    field.record(time.perf_counter() - start, True)
+                    raise error
+                return Promise.resolve(result).then(fulfilled, rejected)
+            field.record(time.perf_counter() - start, isinstance(result, Exception))
+            return result
+        return instrumented
+
+    def observe_phase(self, phase: str, operation_name: Any, seconds: float) -> None:
+        """Record how long one phase (see PHASES) of an operation took."""
+        key = (phase, operation_name or '')
+        with self._lock:
+            histogram = self.operations.get(key)
+            if histogram is None:
+                histogram = self.operations[key] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def render(self) -> str:
+        """All metrics so far, in the Prometheus text exposition format."""
+        from .execution import stats, _stats_lock
+        with self._lock:
+            fields = sorted(self.fields.items())
+            operations = [(key, histogram.copy()) for key, histogram in sorted(self.operations.items())]
+        with _stats_lock:
+            counters = sorted(stats.items())
+        snapshots = []
+        for (type_name, field_name), field in fields:
+            errors, latency = field.snapshot()
+            if latency.count:
+                snapshots.append(({'type': type_name, 'field': field_name}, errors, latency))
+
+        lines = [
+            '# HELP graphotype_field_calls_total Resolver calls, by field.',
+            '# TYPE graphotype_field_calls_total counter',
+        ]
+        for labels, errors, latency in snapshots:
+            lines.append(f'graphotype_field_calls_total{{{_labels(labels)}}} {latency.count}')
+        lines += [
+            '# HELP graphotype_field_errors_total Resolver calls which raised or returned an error, by field.',
+            '# TYPE graphotype_field_errors_total counter',
+        ]
+        for labels, errors, latency in snapshots:
+            lines.append(f'graphotype_field_errors_total{{{_labels(labels)}}} {errors}')
+        lines += [
+            '# HELP graphotype_field_duration_seconds Resolver latency, by field.',
+            '# TYPE graphotype_field_duration_seconds histogram',
+        ]
+        for labels, errors, latency in snapshots:
+            lines += _histogram('graphotype_field_duration_seconds', labels, latency)
+        lines += [
+            '# HELP graphotype_operation_duration_seconds Time spent in each phase of an operation.',
+            '# TYPE graphotype_operation_duration_seconds histogram',
+        ]
+        for (phase, operation_name), histogram in operations:
+            labels = {'phase': phase, 'operation': operation_name}
+            lines += _histogram('graphotype_operation_duration_seconds', labels, histogram)
+        for name, value in counters:
+            lines += [f'# TYPE graphotype_{name}_total counter', f'graphotype_{name}_total {value}']
+        return '\n'.join(lines) + '\n'
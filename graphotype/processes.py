@@ -0,0 +1,136 @@
+"""Running CPU-bound resolvers in worker processes, see `graphotype.cpu_bound`.
+
+Pure-Python computation holds the GIL, so threads don't help with it. A
+method marked `@cpu_bound` is instead pickled, together with its arguments
+and its parent object, and run on a `ProcessPool` owned by the schema. The
+resolver returns a Promise, so sibling fields (including other CPU-bound
+ones) carry on while the worker computes.
+
+Whenever offloading isn't possible -- the schema has `processes=0`, the call
+can't be pickled, or the pool has died -- the method simply runs in-process.
+"""
+import concurrent.futures
+from concurrent.futures.process import BrokenProcessPool
+import pickle
+import threading
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+from promise import Promise
+
+class Offload:
+    """Options given to `@cpu_bound`.
+
+    - timeout: fail the field if the worker takes longer than this many
+      seconds. (The worker itself can't be interrupted and finishes anyway.)
+    - fields: ship only these attributes of the parent object to the worker,
+      rather than pickling all of it. The method then sees a bare instance of
+      the parent's class with just those attributes set.
+    """
+    def __init__(self, timeout: Optional[float] = None, fields: Optional[Sequence[str]] = None) -> None:
+        self.timeout = timeout
+        self.fields = tuple(fields) if fields is not None else None
+
+def _pack_parent(parent: Any, fields: Optional[Tuple[str, ...]]) -> Any:
+    if fields is None:
+        return (None, parent)
+    return (type(parent), {name: getattr(parent, name) for name in fields})
+
+def _unpack_parent(packed: Any) -> Any:
+    cls, state = packed
+    if cls is None:
+        return state
+    parent = cls.__new__(cls)
+    for name, value in state.items():
+        object.__setattr__(parent, name, value)
+    return parent
+
+def _run(payload: bytes) -> Any:
+    """Entry point in the worker process."""
+    f, packed, args = pickle.loads(payload)
+    return f(_unpack_parent(packed), **args)
+
+class ProcessPool:
+    """A lazily started ProcessPoolExecutor which restarts if it breaks.
+
+    `max_workers` of None means one per CPU; 0 means never to start any
+    processes and run everything in-process.
+    """
+    def __init__(self, max_workers: Optional[int] = None) -> None:
+        self.max_workers = max_workers
+        self._executor: Optional[concurrent.futures.ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def executor(self) -> Optional[concurrent.futures.ProcessPoolExecutor]:
+        if self.max_workers == 0:
+            return None
+        with self._lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ProcessPoolExecutor(self.max_workers)
+            return self._executor
+
+    def _discard(self, executor: concurrent.futures.Executor) -> None:
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+
+    def call(self, f: Callable, parent: Any, args: Dict[str, Any], offload: Offload) -> Any:
+        """Call `f(parent, **args)` in a worker, returning a Promise.
+
+        Returns the result directly if it ran in-process instead."""
+        def in_process() -> Any:
+            return f(parent, **args)
+        try:
+            payload = pickle.dumps((f, _pack_parent(parent, offload.fields), args))
+        except (pickle.PicklingError, AttributeError, TypeError):
+            return in_process()
+        executor = self.executor()
+        if executor is None:
+            return in_process()
+        try:
+            future = executor.submit(_run, payload)
+        except (BrokenProcessPool, RuntimeError):
+            # broken, or shut down under our feet
+            self._discard(executor)
+            return in_process()
+
+        promise: Promise = Promise()
+        settled = threading.Lock()
+        def settle(value: Any = None, error: Optional[Exception] = None) -> None:
+            if not settled.acquire(blocking=False):
+                return
+            if error is not None:
+                promise.do_reject(error)
+            else:
+                promise.do_resolve(value)
+
+        def done(future: concurrent.futures.Future) -> None:
+            error = future.exception()
+            if isinstance(error, BrokenProcessPool):
+                self._discard(executor)
+                try:
+                    settle(in_process())
+                except Exception as e:
+                    settle(error=e)
+            elif isinstance(error, Exception):
+                settle(error=error)
+            elif error is not None:
+                raise error
+            else:
+                settle(future.result())
+        future.add_done_callback(done)
+
+        if offload.timeout is not None:
+            timer = threading.Timer(offload.timeout, lambda: settle(error=TimeoutError(
+                f"{f.__qualname__} took longer than {offload.timeout}s"
+            )))
+            timer.daemon = True
+            timer.start()
+            future.add_done_callback(lambda _: timer.cancel())
+        return promise
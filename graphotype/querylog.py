@@ -0,0 +1,268 @@
+"""Operation fingerprints, latency percentiles per fingerprint, and a slow-query log.
+
+`normalize` rewrites an operation into a canonical form, so that requests
+differing only in literal values, field order, aliases, fragment structure
+or whitespace come out the same:
+
+    query Hero { b: hero(episode: JEDI, first: 3) { ...F } }  fragment F on Character { name id }
+    query Hero { hero(episode: JEDI, first: 0) { ... on Character { id name } } }
+
+Literals become 0, "", [] and {} (enum values and `$variables` stay, since
+they're part of the shape); fragment spreads are inlined; fields,
+arguments and variable definitions are sorted; operation and field names
+are kept. `fingerprint` is a hash of that.
+
+`SlowQueryLog` is a `graphotype.tracing.Tracer` that traces every operation
+to keep rolling latency percentiles per fingerprint, and appends operations
+slower than a threshold to a JSON lines file, with their five slowest
+resolver paths.
+"""
+from collections import OrderedDict, deque
+import hashlib
+import json
+import math
+import threading
+from typing import IO, Any, Deque, Dict, List, Optional, Set, Tuple, Union
+
+from graphql.execution import ExecutionResult
+from graphql.language import ast
+from graphql.language.printer import print_ast
+from graphql.utils.get_operation_ast import get_operation_ast
+
+from .tracing import Trace, Tracer
+
+def _value(value: ast.Node) -> ast.Node:
+    if isinstance(value, (ast.Variable, ast.EnumValue)):
+        return value
+    if isinstance(value, (ast.IntValue, ast.FloatValue)):
+        return ast.IntValue('0')
+    if isinstance(value, ast.StringValue):
+        return ast.StringValue('')
+    if isinstance(value, ast.BooleanValue):
+        return ast.BooleanValue(False)
+    if isinstance(value, ast.ListValue):
+        return ast.ListValue([])
+    if isinstance(value, ast.ObjectValue):
+        return ast.ObjectValue([])
+    return value
+
+def _arguments(arguments: Optional[List[ast.Argument]]) -> List[ast.Argument]:
+    return sorted(
+        (ast.Argument(argument.name, _value(argument.value)) for argument in arguments or []),
+        key=lambda argument: argument.name.value
+    )
+
+def _directives(directives: Optional[List[ast.Directive]]) -> List[ast.Directive]:
+    return [ast.Directive(d.name, _arguments(d.arguments)) for d in directives or []]
+
+def _selection_key(selection: ast.Node) -> Tuple[int, str]:
+    if isinstance(selection, ast.Field):
+        return (0, selection.name.value)
+    return (1, print_ast(selection))
+
+class _Normalizer:
+    def __init__(self, document: ast.Document) -> None:
+        self.fragments = {
+            d.name.value: d for d in document.definitions if isinstance(d, ast.FragmentDefinition)
+        }
+        # fragments being inlined, to stop at cycles in unvalidated documents
+        self.inlining: Set[str] = set()
+
+    def selection_set(self, selection_set: Optional[ast.SelectionSet]) -> Optional[ast.SelectionSet]:
+        if selection_set is None:
+            return None
+        selections = [self.selection(s) for s in selection_set.selections]
+        return ast.SelectionSet(sorted(
+            (s for s in selections if s is not None), key=_selection_key
+        ))
+
+    def selection(self, selection: ast.Node) -> Optional[ast.Node]:
+        if isinstance(selection, ast.Field):
+            return ast.Field(
+                selection.name,
+                arguments=_arguments(selection.arguments),
+                directives=_directives(selection.directives),
+                selection_set=self.selection_set(selection.selection_set),
+            )
+        if isinstance(selection, ast.InlineFragment):
+            return ast.InlineFragment(
+                selection.type_condition,
+                self.selection_set(selection.selection_set),
+                _directives(selection.directives),
+            )
+        name = selection.name.value
+        fragment = self.fragments.get(name)
+        if fragment is None or name in self.inlining:
+            return None
+        self.inlining.add(name)
+        try:
+            return ast.InlineFragment(
+                fragment.type_condition,
+                self.selection_set(fragment.selection_set),
+                _directives(selection.directives),
+            )
+        finally:
+            self.inlining.discard(name)
+
+def normalize(document: ast.Document, operation_name: Optional[str] = None) -> Optional[str]:
+    """The canonical text of the operation to run, or None if there's no such operation."""
+    operation = get_operation_ast(document, operation_name)
+    if operation is None:
+        return None
+    normalizer = _Normalizer(document)
+    variables = sorted(
+        (ast.VariableDefinition(v.variable, v.type) for v in operation.variable_definitions or []),
+        key=lambda v: v.variable.name.value
+    )
+    normalized = ast.OperationDefinition(
+        operation.operation,
+        normalizer.selection_set(operation.selection_set),
+        name=operation.name,
+        variable_definitions=variables,
+        directives=_directives(operation.directives),
+    )
+    return ' '.join(print_ast(normalized).split())
+
+def fingerprint(normalized: str) -> str:
+    """A short, stable hash of a `normalize`d operation."""
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()[:16]
+
+def percentile(values: List[float], p: float) -> float:
+    """The nearest-rank `p`th percentile (0-100) of sorted `values`."""
+    rank = math.ceil(p / 100 * len(values))
+    return values[max(0, min(len(values), rank) - 1)]
+
+def text_table(rows: List[List[str]]) -> str:
+    """`rows` (the first being the header) as plain text columns, the
+    first left-aligned and the rest right-aligned."""
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    return '\n'.join(
+        '  '.join(cell.ljust(width) if i == 0 else cell.rjust(width) for i, (cell, width) in enumerate(zip(row, widths)))
+        for row in rows
+    ) + '\n'
+
+class QueryStats:
+    """Rolling latencies per fingerprint: the last `window` of each, for
+    the `max_fingerprints` most recently seen. Thread-safe."""
+    def __init__(self, window: int = 1000, max_fingerprints: int = 10000) -> None:
+        self.window = window
+        self.max_fingerprints = max_fingerprints
+        self.latencies: 'OrderedDict[str, Deque[float]]' = OrderedDict()
+        self.counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, fingerprint: str, seconds: float) -> None:
+        with self._lock:
+            latencies = self.latencies.get(fingerprint)
+            if latencies is None:
+                latencies = self.latencies[fingerprint] = deque(maxlen=self.window)
+                if len(self.latencies) > self.max_fingerprints:
+                    evicted, _ = self.latencies.popitem(last=False)
+                    self.counts.pop(evicted, None)
+            else:
+                self.latencies.move_to_end(fingerprint)
+            latencies.append(seconds)
+            self.counts[fingerprint] = self.counts.get(fingerprint, 0) + 1
+
+    def count(self, fingerprint: str) -> int:
+        """How many times `fingerprint` has been observed (while tracked)."""
+        with self._lock:
+            return self.counts.get(fingerprint, 0)
+
+    def percentiles(self, fingerprint: str, ps: Tuple[float, ...] = (50, 95, 99)) -> Dict[str, float]:
+        """E.g. {'p50': 0.012, 'p95': ..., 'p99': ...}, in seconds; empty if unseen."""
+        with self._lock:
+            values = sorted(self.latencies.get(fingerprint, ()))
+        if not values:
+            return {}
+        return {f'p{p:g}': percentile(values, p) for p in ps}
+
+class SlowQueryLog(Tracer):
+    """Fingerprint and time every operation; log the slow ones.
+
+    - file: a path or text file to append JSON lines to.
+    - threshold: operations taking at least this many seconds are logged.
+    - window, max_fingerprints: see `QueryStats`.
+    - directory, extensions: as for `Tracer`, except that only slow
+      operations' traces are written to `directory`.
+
+    Each line has the time, operation name, fingerprint, normalized query,
+    duration, the fingerprint's rolling percentiles and count, and the five
+    slowest resolver calls. Variables are left out, since they may hold
+    personal data.
+    """
+    def __init__(
+        self,
+        file: Union[str, IO[str]],
+        threshold: float = 1.0,
+        window: int = 1000,
+        max_fingerprints: int = 10000,
+        directory: Optional[str] = None,
+        extensions: bool = False,
+    ) -> None:
+        super().__init__(1.0, directory, extensions)
+        self.file = open(file, 'a') if isinstance(file, str) else file
+        self.threshold = threshold
+        self.stats = QueryStats(window, max_fingerprints)
+        # (source text, operation name) -> (normalized, fingerprint)
+        self._normalized: 'OrderedDict[Tuple[str, Optional[str]], Tuple[str, str]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def fingerprint(self, document: ast.Document, operation_name: Optional[str]) -> Optional[Tuple[str, str]]:
+        """The normalized text and fingerprint of an operation, cached by source text."""
+        key = (document.loc.source.body, operation_name) if document.loc is not None else None
+        if key is not None:
+            with self._lock:
+                cached = self._normalized.get(key)
+                if cached is not None:
+                    self._normalized.move_to_end(key)
+                    return cached
+        normalized = normalize(document, operation_name)
+        if normalized is None:
+            return None
+        result = (normalized, fingerprint(normalized))
+        if key is not None:
+            with self._lock:
+                self._normalized[key] = result
+                if len(self._normalized) > self.stats.max_fingerprints:
+                    self._normalized.popitem(last=False)
+        return result
+
+    def finish(
+        self,
+        trace: Trace,
+        result: ExecutionResult,
+        operation_name: Optional[str] = None,
+        document: Optional[ast.Document] = None,
+    ) -> None:
+        trace.finish()
+        if self.extensions:
+            result.extensions['tracing'] = trace.to_apollo()
+        shape = self.fingerprint(document, operation_name) if document is not None else None
+        if shape is None:
+            return
+        normalized, fp = shape
+        assert trace.end is not None
+        seconds = trace.end / 1e9
+        self.stats.observe(fp, seconds)
+        if seconds < self.threshold:
+            return
+        entry = {
+            'time': trace.start_time.isoformat(),
+            'operation': operation_name,
+            'fingerprint': fp,
+            'query': normalized,
+            'duration': seconds,
+            'percentiles': self.stats.percentiles(fp),
+            'count': self.stats.count(fp),
+            'errors': len(result.errors or []),
+            'slowest': [
+                {'path': span.path, 'field': f'{span.parent_type}.{span.field_name}', 'duration': span.duration / 1e9}
+                for span in trace.slowest(5)
+            ],
+        }
+        line = json.dumps(entry)
+        with self._lock:
+            self.file.write(line + '\n')
+            self.file.flush()
+        self.write(trace, operation_name)
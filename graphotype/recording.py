@@ -0,0 +1,291 @@
+"""Recording operations as they're executed, and replaying them later.
+
+Pass a `Recorder` to `execute` (or run `serve --record capture.jsonl.gz`)
+and a sample of operations are appended to a gzipped JSON lines file:
+
+    {"type": "start", "time": "2020-01-01T12:00:00+00:00"}
+    {"type": "document", "hash": "3f2a...", "document": "query Hero { ... }"}
+    {"type": "operation", "at": 0.52, "hash": "3f2a...", "operation": "Hero",
+     "variables": {"episode": "JEDI"}, "duration": 0.012, "errors": 0}
+
+Each document is written once, the first time it's seen, and operations
+refer to it by hash. `at` is when the operation started, in seconds since
+recording started. Variables named in `redact` are replaced, at any depth,
+by placeholders of the same JSON type ("", 0, false), so that replaying
+them still passes validation.
+
+`load` reads a recording back, and `replay` executes its operations
+against a schema at the rate they were recorded (or faster), returning
+the recorded and replayed latencies of each; `python -m graphotype replay`
+prints them side by side.
+"""
+from dataclasses import dataclass, field
+import concurrent.futures
+import datetime
+import gzip
+import hashlib
+import json
+import random
+import threading
+import time
+from typing import IO, Any, Callable, Collection, Dict, List, Optional, Set, Union
+
+from graphql import GraphQLSchema, parse
+from graphql.error import GraphQLError
+from graphql.execution import ExecutionResult
+from graphql.language import ast
+from graphql.language.printer import print_ast
+from graphql.utils.get_operation_ast import get_operation_ast
+
+from .encoders import to_json
+from .querylog import percentile, text_table
+
+Redact = Union[Collection[str], Callable[[Dict[str, Any]], Dict[str, Any]]]
+
+def document_hash(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+
+def _placeholder(value: Any) -> Any:
+    if isinstance(value, bool):
+        return False
+    if isinstance(value, (int, float)):
+        return 0
+    if isinstance(value, str):
+        return ''
+    if isinstance(value, list):
+        return [_placeholder(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _placeholder(v) for k, v in value.items()}
+    return None
+
+def redact(value: Any, names: Collection[str]) -> Any:
+    """`value` with everything under keys in `names` replaced by placeholders."""
+    if isinstance(value, list):
+        return [redact(v, names) for v in value]
+    if isinstance(value, dict):
+        return {k: _placeholder(v) if k in names else redact(v, names) for k, v in value.items()}
+    return value
+
+class Recorder:
+    """Appends a sample of operations to a gzipped JSON lines file.
+
+    - file: a path, or a binary file to write gzipped data to.
+    - sample_rate: the fraction of operations to record.
+    - redact: names of variables (or input object fields) to redact, or a
+      function from the variables to what to record instead.
+    - flush_every: flush the file every this many operations; `close`
+      flushes the rest.
+    """
+    def __init__(
+        self,
+        file: Union[str, IO[bytes]],
+        sample_rate: float = 1.0,
+        redact: Optional[Redact] = None,
+        flush_every: int = 100,
+    ) -> None:
+        self.file = gzip.open(file, 'at') if isinstance(file, str) else gzip.open(file, 'wt')
+        self.sample_rate = sample_rate
+        self.redact = redact
+        self.flush_every = flush_every
+        self.start = time.perf_counter()
+        self._documents: Set[str] = set()
+        self._unflushed = 0
+        self._lock = threading.Lock()
+        self._write({'type': 'start', 'time': datetime.datetime.now(datetime.timezone.utc).isoformat()})
+
+    def sample(self) -> bool:
+        """Whether to record this operation."""
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    def now(self) -> float:
+        return time.perf_counter() - self.start
+
+    def record(
+        self,
+        source: Union[str, ast.Document],
+        operation_name: Optional[str],
+        variables: Optional[Dict[str, Any]],
+        at: float,
+        duration: float,
+        result: ExecutionResult,
+    ) -> None:
+        """Record an operation which started `at` (a `now()` value) and took
+        `duration` seconds."""
+        if isinstance(source, str):
+            text = source
+        elif source.loc is not None:
+            text = source.loc.source.body
+        else:
+            text = print_ast(source)
+        hash = document_hash(text)
+        variables = variables or {}
+        if callable(self.redact):
+            variables = self.redact(variables)
+        elif self.redact:
+            variables = redact(variables, self.redact)
+        entry = {
+            'type': 'operation',
+            'at': at,
+            'hash': hash,
+            'operation': operation_name,
+            'variables': variables,
+            'duration': duration,
+            'errors': len(result.errors or []),
+        }
+        with self._lock:
+            if hash not in self._documents:
+                self._documents.add(hash)
+                self._write({'type': 'document', 'hash': hash, 'document': text})
+            self._write(entry)
+            self._unflushed += 1
+            if self._unflushed >= self.flush_every:
+                self.flush()
+
+    def _write(self, entry: Dict[str, Any]) -> None:
+        self.file.write(json.dumps(entry, default=to_json) + '\n')
+
+    def flush(self) -> None:
+        self.file.flush()
+        self._unflushed = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self.file.close()
+
+@dataclass
+class RecordedOperation:
+    at: float
+    document: str
+    operation_name: Optional[str]
+    variables: Dict[str, Any]
+    duration: float
+    errors: int
+
+def load(file: Union[str, IO[bytes]]) -> List[RecordedOperation]:
+    """The operations in a recording, in the order they started. If it has
+    several (from Recorders appending to the same file), their operations'
+    `at` are made relative to the start of the first."""
+    documents: Dict[str, str] = {}
+    operations = []
+    first: Optional[datetime.datetime] = None
+    offset = 0.0
+    with gzip.open(file, 'rt') as f:
+        for line in f:
+            entry = json.loads(line)
+            if entry['type'] == 'start':
+                started = datetime.datetime.fromisoformat(entry['time'])
+                first = first or started
+                offset = (started - first).total_seconds()
+            elif entry['type'] == 'document':
+                documents[entry['hash']] = entry['document']
+            elif entry['type'] == 'operation':
+                operations.append(RecordedOperation(
+                    offset + entry['at'], documents[entry['hash']], entry['operation'],
+                    entry['variables'], entry['duration'], entry['errors']
+                ))
+    operations.sort(key=lambda operation: operation.at)
+    return operations
+
+@dataclass
+class Replayed:
+    """A recorded operation, and how it went this time: its latency, errors,
+    and how many seconds after its scheduled time it started."""
+    operation: RecordedOperation
+    duration: float
+    errors: int
+    lag: float
+
+def replay(
+    schema: GraphQLSchema,
+    operations: List[RecordedOperation],
+    speed: float = 1.0,
+    concurrency: int = 8,
+) -> List[Replayed]:
+    """Execute `operations` on `concurrency` threads, each `speed` times
+    sooner after the first than it was recorded; with `speed=0`, each as soon
+    as a thread is free."""
+    from .execution import execute
+    if not operations:
+        return []
+    first = operations[0].at
+    start = time.perf_counter()
+    def run(operation: RecordedOperation, due: float) -> Replayed:
+        began = time.perf_counter()
+        result = execute(
+            schema, operation.document, variables=operation.variables, operation_name=operation.operation_name
+        )
+        return Replayed(operation, time.perf_counter() - began, len(result.errors or []), max(0.0, began - due))
+    with concurrent.futures.ThreadPoolExecutor(concurrency, thread_name_prefix='graphotype-replay') as pool:
+        futures = []
+        for operation in operations:
+            due = start + ((operation.at - first) / speed if speed else 0.0)
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            futures.append(pool.submit(run, operation, due))
+        return [future.result() for future in futures]
+
+@dataclass
+class Comparison:
+    """The recorded and replayed latencies (sorted) of one operation."""
+    name: str
+    recorded: List[float] = field(default_factory=list)
+    replayed: List[float] = field(default_factory=list)
+    recorded_errors: int = 0
+    replayed_errors: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        result: Dict[str, Any] = dict(
+            operation=self.name,
+            count=len(self.recorded),
+            recorded_errors=self.recorded_errors,
+            replayed_errors=self.replayed_errors,
+        )
+        for p in (50, 95, 99):
+            result[f'recorded_p{p}'] = percentile(self.recorded, p)
+            result[f'replayed_p{p}'] = percentile(self.replayed, p)
+        return result
+
+def _name(document: str) -> str:
+    """The name of the only operation in `document`, or else its hash."""
+    try:
+        operation = get_operation_ast(parse(document))
+    except GraphQLError:
+        operation = None
+    if operation is not None and operation.name is not None:
+        return operation.name.value
+    return document_hash(document)
+
+def compare(replayed: List[Replayed]) -> List[Comparison]:
+    """Recorded and replayed latencies by operation name (or document hash,
+    for anonymous operations), most frequent first."""
+    comparisons: Dict[str, Comparison] = {}
+    names: Dict[str, str] = {}
+    for r in replayed:
+        name = r.operation.operation_name
+        if name is None:
+            if r.operation.document not in names:
+                names[r.operation.document] = _name(r.operation.document)
+            name = names[r.operation.document]
+        comparison = comparisons.setdefault(name, Comparison(name))
+        comparison.recorded.append(r.operation.duration)
+        comparison.replayed.append(r.duration)
+        comparison.recorded_errors += r.operation.errors
+        comparison.replayed_errors += r.errors
+    for comparison in comparisons.values():
+        comparison.recorded.sort()
+        comparison.replayed.sort()
+    return sorted(comparisons.values(), key=lambda c: len(c.recorded), reverse=True)
+
+def format_comparison(comparisons: List[Comparison]) -> str:
+    """`comparisons` as a plain text table of recorded -> replayed numbers."""
+    header = ['operation', 'count', 'errors', 'p50 ms', 'p95 ms', 'p99 ms']
+    rows = [header]
+    for c in comparisons:
+        cells = [c.name, str(len(c.recorded)), f'{c.recorded_errors} -> {c.replayed_errors}']
+        for p in (50, 95, 99):
+            before, after = percentile(c.recorded, p) * 1000, percentile(c.replayed, p) * 1000
+            change = f' ({(after - before) / before:+.0%})' if before else ''
+            cells.append(f'{before:.2f} -> {after:.2f}{change}')
+        rows.append(cells)
+    return text_table(rows)
@@ -0,0 +1,60 @@
+"""Pools for request-scoped resources, see `Inject`."""
+import threading
+from typing import Callable, Generic, List, Optional, TypeVar
+
+T = TypeVar('T')
+
+class ResourcePool(Generic[T]):
+    """A thread-safe pool of reusable resources, e.g. database connections.
+
+    Pass it as a provider to `graphotype.execute` and every request that
+    injects the resource checks one out on first use and returns it when the
+    request ends.
+
+    - create: makes a new resource when no idle one is available.
+    - max_size: at most this many resources exist at once; `acquire` blocks
+      until one is returned, raising TimeoutError after `timeout` seconds.
+    - dispose: called on idle resources by `close`.
+    """
+    def __init__(
+        self,
+        create: Callable[[], T],
+        max_size: int = 10,
+        timeout: Optional[float] = None,
+        dispose: Optional[Callable[[T], None]] = None,
+    ) -> None:
+        self.create = create
+        self.timeout = timeout
+        self.dispose = dispose
+        self._idle: List[T] = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+
+    def acquire(self) -> T:
+        if not self._slots.acquire(timeout=self.timeout):
+            raise TimeoutError(f"No resource became available within {self.timeout}s")
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        try:
+            return self.create()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, resource: T) -> None:
+        with self._lock:
+            self._idle.append(resource)
+        self._slots.release()
+
+    @property
+    def idle(self) -> int:
+        return len(self._idle)
+
+    def close(self) -> None:
+        """Dispose of all idle resources."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        if self.dispose is not None:
+            for resource in idle:
+                self.dispose(resource)
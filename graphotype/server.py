@@ -0,0 +1,294 @@
+"""The Flask view behind `python -m graphotype serve`.
+
+Requires flask and flask_graphql. `GraphotypeView` is flask_graphql's
+`GraphQLView` plus graphotype's own options; with none of them set, it
+responds to JSON clients just like the original.
+"""
+import json
+from functools import partial
+from typing import Any, Dict, Iterable, Iterator, Optional, Type, Union
+
+from flask import Flask, Response, make_response, request, stream_with_context
+from flask_graphql import GraphQLView
+from graphql import GraphQLSchema
+from graphql.error import GraphQLError
+from graphql.language import ast
+from graphql.language.parser import parse
+from graphql.utils.get_operation_ast import get_operation_ast
+from graphql_server import (
+    HttpQueryError,
+    encode_execution_results,
+    get_graphql_params,
+    run_http_query,
+)
+
+from .compression import Compression
+from .crunch import execute_crunched
+from .encoders import JSON, Encoder, available_encoders, to_json
+from .execution import Request
+from .incremental import execute_incremental, is_incremental
+from .limits import Limits
+from .recording import Recorder
+from .streaming import execute_streaming
+from .tracing import Tracer
+
+BOUNDARY = '-'
+CRUNCH_HEADER = 'X-GraphQL-Crunch'
+METRICS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+class GraphotypeView(GraphQLView):
+    """A GraphQLView with these additional options:
+
+    - stream: send responses with chunked transfer encoding as they are
+      produced, see `graphotype.streaming`. GraphiQL and batched requests
+      are answered as usual.
+    - compression: a `graphotype.compression.Compression` to compress
+      responses with, as negotiated with `Accept-Encoding`.
+    - tracer: a `graphotype.tracing.Tracer` to trace a sample of operations
+      with; with `extensions=True` the trace is included in the response.
+    - limits: `graphotype.limits.Limits` on the size of responses which
+      aren't batched. Only ordinary responses have their encoded size
+      checked too.
+    - recorder: a `graphotype.recording.Recorder` to record a sample of
+      those same operations with.
+    - providers: the values of `Inject[T]` resolver parameters, as for
+      `graphotype.execute`.
+
+    Independently of those, operations using `@defer` or `@stream` are
+    answered with a `multipart/mixed` response of incremental payloads (see
+    `graphotype.incremental`) if the client accepts one; and requests with an
+    `X-GraphQL-Crunch: 1` header get a deduplicated response (see
+    `graphotype.crunch`), marked with the same header.
+
+    Operations that aren't batched are executed through a
+    `graphotype.Request`, so resolvers see it as `info.context` (and the
+    view's context as `Context[...]` parameters). If the fields a GET
+    request resolves allow caching (see `graphotype.cache_hint`), the
+    response gets `Cache-Control` and `ETag` headers, and a request with a
+    matching `If-None-Match` gets 304 Not Modified.
+
+    Ordinary and crunched responses are encoded in the format the client
+    accepts best among `graphotype.encoders.available_encoders()`, falling
+    back to JSON; streamed and incremental responses are always JSON.
+    """
+    stream = False
+    compression: Optional[Compression] = None
+    tracer: Optional[Tracer] = None
+    limits: Optional[Limits] = None
+    recorder: Optional[Recorder] = None
+    providers: Optional[Dict[Type, Any]] = None
+
+    def dispatch_request(self) -> Any:
+        response = make_response(self.dispatch_graphql())
+        if self.compression is not None:
+            self.compress(response, self.compression)
+        return response
+
+    def dispatch_graphql(self) -> Any:
+        if request.method not in ('GET', 'POST') or (
+            request.method == 'GET' and self.should_display_graphiql()
+        ):
+            return super().dispatch_request()
+        encoder = self.negotiate()
+        incremental = bool(request.accept_mimetypes['multipart/mixed'])
+        crunched = bool(request.headers.get(CRUNCH_HEADER))
+        stream = self.stream and encoder is JSON
+        try:
+            data = self.parse_body()
+            if isinstance(data, list):
+                return self.respond(data, encoder)
+            params = get_graphql_params(data, request.args)
+            if not params.query:
+                raise HttpQueryError(400, "Must provide query string.")
+            document = self.parse_document(params.query, params.operation_name)
+        except HttpQueryError as e:
+            return self.error_response(e, encoder)
+        options = dict(
+            root=self.get_root_value(),
+            context=self.get_context(),
+            variables=params.variables,
+            operation_name=params.operation_name,
+            providers=self.providers,
+            limits=self.limits,
+        )
+        if incremental and document is not None and is_incremental(document):
+            payloads = execute_incremental(self.schema, document, **options)
+            return Response(
+                stream_with_context(encode_multipart(payloads)),
+                content_type=f'multipart/mixed; boundary="{BOUNDARY}"'
+            )
+        if crunched:
+            result = execute_crunched(self.schema, document or params.query, **options)
+            return Response(
+                encoder.encode(result),
+                status=200 if 'data' in result else 400,
+                headers={CRUNCH_HEADER: '1'},
+                content_type=encoder.media_type
+            )
+        if stream:
+            chunks = execute_streaming(self.schema, document or params.query, **options)
+            # no Content-Length, so this goes out chunked
+            return Response(stream_with_context(chunks), content_type='application/json')
+        return self.respond_single(document or params.query, options, encoder)
+
+    @staticmethod
+    def compress(response: Response, compression: Compression) -> None:
+        """Compress `response` in place, if the client accepts that and it's
+        worth doing."""
+        if 'Content-Encoding' in response.headers or response.status_code in (204, 304):
+            return
+        if not response.is_streamed and len(response.get_data()) < compression.min_size:
+            return
+        response.vary.add('Accept-Encoding')
+        if 'Accept-Encoding' not in request.headers:
+            return
+        coding = request.accept_encodings.best_match(list(compression.codings))
+        if coding is None:
+            return
+        if response.is_streamed:
+            response.response = compression.compress_chunks(response.iter_encoded(), coding)
+        else:
+            body = response.get_data()
+            if len(body) >= compression.thread_size:
+                response.response = compression.compress_in_thread(body, coding)
+                del response.headers['Content-Length']
+            else:
+                response.set_data(compression.compress(body, coding))
+        response.headers['Content-Encoding'] = coding
+
+    def negotiate(self) -> Encoder:
+        """The encoder for the media type the client accepts best (or JSON)."""
+        encoders = {encoder.media_type: encoder for encoder in available_encoders()}
+        best = request.accept_mimetypes.best_match(list(encoders))
+        return encoders[best] if best is not None else JSON
+
+    def respond(self, data: Any, encoder: Encoder) -> Response:
+        """Execute batched operations and respond as GraphQLView does."""
+        extra_options = {}
+        executor = self.get_executor()
+        if executor:
+            extra_options['executor'] = executor
+        try:
+            execution_results, _ = run_http_query(
+                self.schema,
+                request.method.lower(),
+                data,
+                query_data=request.args,
+                batch_enabled=self.batch,
+                backend=self.get_backend(),
+                root=self.get_root_value(),
+                context=self.get_context(),
+                middleware=self.get_middleware(),
+                **extra_options
+            )
+        except HttpQueryError as e:
+            return self.error_response(e, encoder)
+        result, status_code = encode_execution_results(
+            execution_results,
+            is_batch=isinstance(data, list),
+            format_error=self.format_error,
+            encode=partial(encoder.encode, pretty=bool(self.pretty or request.args.get('pretty')))
+        )
+        return Response(result, status=status_code, content_type=encoder.media_type)
+
+    def respond_single(
+        self,
+        source: Union[str, ast.Document],
+        options: Dict[str, Any],
+        encoder: Encoder
+    ) -> Response:
+        """Execute an operation through a `graphotype.Request`. For GET
+        requests, let HTTP caches keep the response as long as its cache
+        policy allows."""
+        gql_request = Request(
+            options['context'], providers=options['providers'], tracer=self.tracer, limits=options['limits'],
+            recorder=self.recorder
+        )
+        try:
+            result = gql_request.run(
+                self.schema, source, options['root'], options['variables'], options['operation_name']
+            )
+        finally:
+            gql_request.close()
+        pretty = bool(self.pretty or request.args.get('pretty'))
+        data = result.to_dict(format_error=self.format_error)
+        if result.extensions:
+            data['extensions'] = result.extensions
+        body = encoder.encode(data, pretty=pretty)
+        too_large = self.limits.check_bytes(len(body)) if self.limits is not None else None
+        if too_large is not None:
+            return Response(
+                encoder.encode({'data': None, 'errors': [self.format_error(too_large)]}, pretty=pretty),
+                content_type=encoder.media_type
+            )
+        response = Response(
+            body,
+            status=400 if result.invalid else 200,
+            content_type=encoder.media_type
+        )
+        policy = gql_request.cache_policy
+        if request.method != 'GET' or result.errors or policy is None or policy.max_age <= 0:
+            return response
+        response.cache_control.max_age = policy.max_age
+        if policy.scope == 'private':
+            response.cache_control.private = True
+        else:
+            response.cache_control.public = True
+        response.vary.add('Accept')
+        # weak, since compression changes the bytes but not the meaning
+        response.add_etag(weak=True)
+        response.make_conditional(request)
+        return response
+
+    def error_response(self, e: HttpQueryError, encoder: Encoder) -> Response:
+        return Response(
+            encoder.encode({'errors': [self.format_error(e)]}),
+            status=e.status_code,
+            headers=e.headers,
+            content_type=encoder.media_type
+        )
+
+    @staticmethod
+    def parse_document(query: str, operation_name: Optional[str]) -> Optional[ast.Document]:
+        """Parse `query`, which a GET request may only use for queries.
+
+        Returns None for syntax errors, which are reported when it's executed."""
+        try:
+            document = parse(query)
+        except GraphQLError:
+            return None
+        if request.method != 'GET':
+            return document
+        operation = get_operation_ast(document, operation_name)
+        if operation is not None and operation.operation != 'query':
+            raise HttpQueryError(
+                405,
+                f"Can only perform a {operation.operation} operation from a POST request.",
+                headers={'Allow': 'POST'},
+            )
+        return document
+
+def encode_multipart(payloads: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    """Encode incremental payloads as the parts of a multipart/mixed body."""
+    for payload in payloads:
+        yield f'\r\n--{BOUNDARY}\r\nContent-Type: application/json; charset=utf-8\r\n\r\n'
+        yield json.dumps(payload, default=to_json)
+    yield f'\r\n--{BOUNDARY}--\r\n'
+
+def make_app(schema: GraphQLSchema, **options: Any) -> Flask:
+    """Make a Flask app serving `schema` at `/`, and its metrics (if it
+    has any, see `graphotype.metrics`) at `/metrics`.
+
+    `options` are passed on to `GraphotypeView`; GraphiQL is on by default."""
+    view_options: Dict[str, Any] = dict(graphiql=True)
+    view_options.update(options)
+    app = Flask('graphotype')
+    app.add_url_rule('/', view_func=GraphotypeView.as_view(
+        'graphql', schema=schema, **view_options
+    ))
+    metrics = getattr(schema, 'metrics', None)
+    if metrics is not None:
+        app.add_url_rule('/metrics', 'metrics', lambda: Response(
+            metrics.render(), content_type=METRICS_CONTENT_TYPE
+        ))
+    return app
@@ -0,0 +1,240 @@
+"""Executing an operation straight into JSON text, a chunk at a time.
+
+`execute` builds the whole result as nested dicts before anything can be
+serialized, so a field returning an iterator over a million rows needs all of
+them in memory at once. `execute_streaming` instead walks the operation
+itself and encodes each list item as soon as the iterator produces it, so
+peak memory is bounded by the largest single item, not the whole response.
+
+Objects and lists are written out incrementally; each list item is completed
+with graphql-core's ordinary machinery and then discarded. Once part of an
+object has been sent it can't be retracted, so an error in a non-null field
+can't null out its (already partly sent) parent as the spec asks; the field
+itself is sent as null instead and the error is reported as usual.
+
+For the same reason, a result going over its `graphotype.limits.Limits`
+can't be replaced by a single error: the response stops growing instead,
+closing whatever it had started, and that error is its only one.
+"""
+import json
+import sys
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+from graphql import GraphQLSchema
+from graphql.error import GraphQLError, GraphQLLocatedError, format_error
+from graphql.execution.base import ExecutionResult, ResolveInfo
+from graphql.execution.executor import (
+    complete_value_catching_error,
+    get_default_resolve_type_fn,
+    resolve_or_error,
+)
+from graphql.execution.executors.sync import SyncExecutor
+from graphql.execution.utils import (
+    ExecutionContext,
+    collect_fields,
+    default_resolve_fn,
+    get_field_def,
+    get_operation_root_type,
+)
+from graphql.language import ast
+from graphql.pyutils.default_ordered_dict import DefaultOrderedDict
+from graphql.type import (
+    GraphQLInterfaceType,
+    GraphQLList,
+    GraphQLNonNull,
+    GraphQLObjectType,
+    GraphQLUnionType,
+)
+from promise import Promise, is_thenable
+
+from .encoders import to_json
+from .execution import Request
+
+CHUNK_SIZE = 64 * 1024
+
+def encode(value: Any) -> str:
+    return json.dumps(value, default=to_json, separators=(',', ':'))
+
+class _Streamer:
+    def __init__(self, exe_context: ExecutionContext) -> None:
+        self.exe_context = exe_context
+        self.schema = exe_context.schema
+        self.usage = exe_context.context_value.usage
+
+    @property
+    def stopped(self) -> bool:
+        """Whether the result has gone over its limits."""
+        return self.usage is not None and self.usage.error is not None
+
+    def fail(self, error: Exception, field_asts: List[ast.Field], path: List[Any]) -> str:
+        if not isinstance(error, GraphQLError):
+            error = GraphQLLocatedError(field_asts, original_error=error, path=path)
+        self.exe_context.report_error(error, sys.exc_info()[2])
+        return 'null'
+
+    def wait(self, value: Any) -> Any:
+        if is_thenable(value):
+            try:
+                return Promise.resolve(value).get()
+            except Exception as e:
+                return e
+        return value
+
+    def complete(self, return_type: Any, field_asts: List[ast.Field], info: ResolveInfo, path: List[Any], result: Any) -> str:
+        try:
+            value = self.wait(complete_value_catching_error(
+                self.exe_context, return_type, field_asts, info, path, result
+            ))
+        except Exception as e:
+            return self.fail(e, field_asts, path)
+        if isinstance(value, Exception):
+            return self.fail(value, field_asts, path)
+        return encode(value)
+
+    def fields(self, parent_type: GraphQLObjectType, source: Any, fields: DefaultOrderedDict, path: List[Any]) -> Iterator[str]:
+        yield '{'
+        separator = ''
+        for response_name, field_asts in fields.items():
+            if self.stopped:
+                break
+            field_def = get_field_def(self.schema, parent_type, field_asts[0].name.value)
+            if not field_def:
+                continue
+            yield f'{separator}{encode(response_name)}:'
+            separator = ','
+            yield from self.field(parent_type, source, field_asts, field_def, path + [response_name])
+        yield '}'
+
+    def field(self, parent_type: GraphQLObjectType, source: Any, field_asts: List[ast.Field], field_def: Any, path: List[Any]) -> Iterator[str]:
+        exe_context = self.exe_context
+        info = ResolveInfo(
+            field_asts[0].name.value,
+            field_asts,
+            field_def.type,
+            parent_type,
+            schema=self.schema,
+            fragments=exe_context.fragments,
+            root_value=exe_context.root_value,
+            operation=exe_context.operation,
+            variable_values=exe_context.variable_values,
+            context=exe_context.context_value,
+            path=path,
+        )
+        try:
+            args = exe_context.get_argument_values(field_def, field_asts[0])
+        except Exception as e:
+            yield self.fail(e, field_asts, path)
+            return
+        result = self.wait(resolve_or_error(
+            field_def.resolver or default_resolve_fn, source, info, args, exe_context.executor
+        ))
+        yield from self.value(field_def.type, field_asts, info, path, result)
+
+    def value(self, return_type: Any, field_asts: List[ast.Field], info: ResolveInfo, path: List[Any], result: Any) -> Iterator[str]:
+        """Stream lists and objects; complete everything else in one go."""
+        if isinstance(result, Exception):
+            yield self.fail(result, field_asts, path)
+            return
+        named = return_type.of_type if isinstance(return_type, GraphQLNonNull) else return_type
+        if result is None or not isinstance(named, (GraphQLList, GraphQLObjectType, GraphQLInterfaceType, GraphQLUnionType)):
+            yield self.complete(return_type, field_asts, info, path, result)
+        elif isinstance(named, GraphQLList):
+            yield from self.list(named, field_asts, info, path, result)
+        else:
+            runtime_type = named
+            if isinstance(named, (GraphQLInterfaceType, GraphQLUnionType)):
+                if named.resolve_type:
+                    runtime_type = named.resolve_type(result, info)
+                else:
+                    runtime_type = get_default_resolve_type_fn(result, info, named)
+                if isinstance(runtime_type, str):
+                    runtime_type = self.schema.get_type(runtime_type)
+            if not isinstance(runtime_type, GraphQLObjectType) or (
+                runtime_type.is_type_of and not runtime_type.is_type_of(result, info)
+            ):
+                # let graphql-core produce the usual error
+                yield self.complete(return_type, field_asts, info, path, result)
+                return
+            subfields = self.exe_context.get_sub_fields(runtime_type, field_asts)
+            yield from self.fields(runtime_type, result, subfields, path)
+
+    def list(self, list_type: GraphQLList, field_asts: List[ast.Field], info: ResolveInfo, path: List[Any], result: Any) -> Iterator[str]:
+        item_type = list_type.of_type
+        yield '['
+        try:
+            for index, item in enumerate(result):
+                if self.stopped:
+                    break
+                if index:
+                    yield ','
+                yield from self.value(item_type, field_asts, info, path + [index], self.wait(item))
+        except Exception as e:
+            # the iterator itself failed; close the list with what we have
+            self.fail(e, field_asts, path)
+        yield ']'
+
+def _chunks(pieces: Iterator[str], chunk_size: int) -> Iterator[str]:
+    buffer: List[str] = []
+    size = 0
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= chunk_size:
+            yield ''.join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield ''.join(buffer)
+
+def _stream_result(request: Request, schema: GraphQLSchema, document: ast.Document, root: Any, variables: Optional[Dict[str, Any]], operation_name: Optional[str]) -> Iterator[str]:
+    try:
+        exe_context = ExecutionContext(
+            schema, document, root, request, variables or {}, operation_name,
+            SyncExecutor(), None, False
+        )
+    except GraphQLError as e:
+        yield encode({'errors': [format_error(e)]})
+        return
+    operation = exe_context.operation
+    if operation.operation == 'subscription':
+        yield encode({'errors': [{'message': 'Subscriptions cannot be streamed'}]})
+        return
+    root_type = get_operation_root_type(schema, operation)
+    fields = collect_fields(exe_context, root_type, operation.selection_set, DefaultOrderedDict(list), set())
+    streamer = _Streamer(exe_context)
+    yield '{"data":'
+    yield from streamer.fields(root_type, root, fields, [])
+    errors = [streamer.usage.error] if streamer.stopped else exe_context.errors
+    if errors:
+        yield ',"errors":'
+        yield encode([format_error(e) for e in errors])
+    yield '}'
+
+def execute_streaming(
+    schema: GraphQLSchema,
+    source: Union[str, ast.Document],
+    root: Any = None,
+    context: Any = None,
+    variables: Optional[Dict[str, Any]] = None,
+    operation_name: Optional[str] = None,
+    chunk_size: int = CHUNK_SIZE,
+    **request_options: Any
+) -> Iterator[str]:
+    """Like `graphotype.execute`, but yield the JSON response in chunks.
+
+    The response is `{"data": ..., "errors": [...]}`, as from
+    `ExecutionResult.to_dict`. Chunks are about `chunk_size` characters.
+    `request_options` are passed on to `Request`; deduplication is off by
+    default, since the Request would keep every list item it resolved alive
+    until the end.
+    """
+    request_options.setdefault('dedupe', False)
+    request = Request(context, **request_options)
+    try:
+        document = request.prepare(schema, source, operation_name)
+        if isinstance(document, ExecutionResult):
+            yield encode(document.to_dict())
+            return
+        yield from _chunks(_stream_result(request, schema, document, root, variables, operation_name), chunk_size)
+    finally:
+        request.close()
@@ -0,0 +1,299 @@
+"""Running subscriptions: async generators of events, fanned out to clients.
+
+A method of the Subscription root is an async generator annotated
+`AsyncIterator[T]`. Subscribing calls it once to get its events; each event
+is then the root value for executing the rest of the operation, and the
+result goes to the subscriber.
+
+A `SubscriptionHub` shares that work between identical subscriptions (same
+document, variables and operation name): they have one source generator
+between them, and each event is executed once, however many subscribers
+receive the result. Each subscriber has its own bounded queue, so a slow
+client can't hold up the others; when its queue is full, the subscriber's
+`policy` decides what to give up:
+
+- 'drop_oldest': discard the oldest queued result to make room.
+- 'drop_newest': discard the new result.
+- 'coalesce': replace the most recently queued result with the new one, so
+  the client always ends up with the latest.
+"""
+import asyncio
+from collections import deque
+import json
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Set, Tuple, Union
+
+from graphql import GraphQLSchema
+from graphql.error import GraphQLError, GraphQLLocatedError, format_error
+from graphql.execution.base import ExecutionResult, ResolveInfo
+from graphql.execution.executor import execute_fields
+from graphql.execution.executors.sync import SyncExecutor
+from graphql.execution.utils import ExecutionContext, collect_fields, get_field_def
+from graphql.language import ast
+from graphql.language.printer import print_ast
+from graphql.pyutils.default_ordered_dict import DefaultOrderedDict
+from promise import Promise
+
+from .execution import Request
+
+POLICIES = ('drop_oldest', 'drop_newest', 'coalesce')
+
+class SubscriptionError(Exception):
+    """The operation couldn't be subscribed to; `errors` are formatted GraphQL errors."""
+    def __init__(self, errors: List[Dict[str, Any]]) -> None:
+        super().__init__('; '.join(e.get('message', '') for e in errors))
+        self.errors = errors
+
+class Subscriber:
+    """One client's subscription: an async iterator of result dicts.
+
+    Holds at most `max_size` undelivered results; see the module docstring
+    for `policy`. `dropped` counts the results it gave up.
+    """
+    def __init__(self, max_size: int = 100, policy: str = 'drop_oldest') -> None:
+        if policy not in POLICIES:
+            raise ValueError(f"policy must be one of {POLICIES}, not {policy!r}")
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.max_size = max_size
+        self.policy = policy
+        self.dropped = 0
+        self.closed = False
+        self._queue: Deque[Dict[str, Any]] = deque()
+        self._ready = asyncio.Event()
+        self._source: Optional['_Source'] = None
+
+    def put(self, result: Dict[str, Any]) -> None:
+        if self.closed:
+            return
+        if len(self._queue) >= self.max_size:
+            self.dropped += 1
+            if self.policy == 'drop_newest':
+                return
+            elif self.policy == 'drop_oldest':
+                self._queue.popleft()
+            else:
+                self._queue.pop()
+        self._queue.append(result)
+        self._ready.set()
+
+    def finish(self) -> None:
+        """Deliver what's queued, then stop."""
+        self.closed = True
+        self._ready.set()
+
+    def close(self) -> None:
+        """Stop receiving results; those already queued are still delivered."""
+        self.finish()
+        source, self._source = self._source, None
+        if source is not None:
+            source.remove(self)
+
+    def __aiter__(self) -> 'Subscriber':
+        return self
+
+    async def __anext__(self) -> Dict[str, Any]:
+        while not self._queue:
+            if self.closed:
+                raise StopAsyncIteration
+            self._ready.clear()
+            await self._ready.wait()
+        return self._queue.popleft()
+
+Key = Tuple[str, str, Optional[str]]
+
+class _Source:
+    """One source generator and the subscribers sharing its results."""
+    def __init__(self, hub: 'SubscriptionHub', key: Key, document: ast.Document, variables: Dict[str, Any], operation_name: Optional[str]) -> None:
+        self.hub = hub
+        self.key = key
+        self.document = document
+        self.variables = variables
+        self.operation_name = operation_name
+        self.subscribers: Set[Subscriber] = set()
+        self.task: Optional[asyncio.Task] = None
+        # the subscription method's Request (and any resources injected into
+        # it) stays open for as long as its generator runs
+        self.request = Request(hub.context, **hub.request_options)
+
+    def add(self, subscriber: Subscriber) -> None:
+        subscriber._source = self
+        self.subscribers.add(subscriber)
+
+    def remove(self, subscriber: Subscriber) -> None:
+        self.subscribers.discard(subscriber)
+        if not self.subscribers:
+            self.discard()
+            if self.task is not None:
+                self.task.cancel()
+
+    def discard(self) -> None:
+        """Stop sharing this source with new subscribers. (By now, an
+        identical subscription may have started another.)"""
+        if self.hub._sources.get(self.key) is self:
+            del self.hub._sources[self.key]
+
+    def context(self, request: Request, root: Any) -> ExecutionContext:
+        return ExecutionContext(
+            self.hub.schema, self.document, root, request, self.variables,
+            self.operation_name, SyncExecutor(), None, False
+        )
+
+    def start(self) -> AsyncIterator[Any]:
+        """Call the subscription method, returning its events.
+
+        Raises SubscriptionError if it can't be called."""
+        try:
+            return self._start()
+        except SubscriptionError:
+            self.request.close()
+            raise
+
+    def _start(self) -> AsyncIterator[Any]:
+        try:
+            exe_context = self.context(self.request, self.hub.root)
+        except GraphQLError as e:
+            raise SubscriptionError([format_error(e)])
+        operation = exe_context.operation
+        if operation.operation != 'subscription':
+            raise SubscriptionError([{'message': f'Expected a subscription, not a {operation.operation}'}])
+        root_type = self.hub.schema.get_subscription_type()
+        if root_type is None:
+            raise SubscriptionError([{'message': 'The schema has no Subscription root'}])
+        fields = collect_fields(exe_context, root_type, operation.selection_set, DefaultOrderedDict(list), set())
+        if len(fields) != 1:
+            raise SubscriptionError([{'message': 'A subscription must select exactly one root field'}])
+        [(response_name, field_asts)] = fields.items()
+        field_def = get_field_def(self.hub.schema, root_type, field_asts[0].name.value)
+        info = ResolveInfo(
+            field_asts[0].name.value,
+            field_asts,
+            field_def.type,
+            root_type,
+            schema=self.hub.schema,
+            fragments=exe_context.fragments,
+            root_value=self.hub.root,
+            operation=operation,
+            variable_values=exe_context.variable_values,
+            context=self.request,
+            path=[response_name],
+        )
+        try:
+            args = exe_context.get_argument_values(field_def, field_asts[0])
+            return field_def.resolver.subscribe(self.hub.root, info, **args)
+        except Exception as e:
+            if not isinstance(e, GraphQLError):
+                e = GraphQLLocatedError(field_asts, original_error=e, path=[response_name])
+            raise SubscriptionError([format_error(e)])
+
+    def execute(self, event: Any) -> Dict[str, Any]:
+        """Execute the operation for one event."""
+        request = Request(self.hub.context, **self.hub.request_options)
+        try:
+            exe_context = self.context(request, event)
+            root_type = self.hub.schema.get_subscription_type()
+            fields = collect_fields(
+                exe_context, root_type, exe_context.operation.selection_set,
+                DefaultOrderedDict(list), set()
+            )
+            try:
+                data = Promise.resolve(execute_fields(exe_context, root_type, event, fields, [], None)).get()
+            except GraphQLError as e:
+                exe_context.report_error(e)
+                data = None
+            return ExecutionResult(data=data, errors=exe_context.errors or None).to_dict()
+        finally:
+            request.close()
+
+    async def pump(self, events: AsyncIterator[Any]) -> None:
+        try:
+            async for event in events:
+                result = self.execute(event)
+                for subscriber in list(self.subscribers):
+                    subscriber.put(result)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            error = {'errors': [format_error(GraphQLError(str(e)))]}
+            for subscriber in list(self.subscribers):
+                subscriber.put(error)
+        finally:
+            try:
+                aclose = getattr(events, 'aclose', None)
+                if aclose is not None:
+                    await aclose()
+            finally:
+                self.discard()
+                for subscriber in list(self.subscribers):
+                    subscriber.finish()
+
+class SubscriptionHub:
+    """Subscriptions to one schema, sharing sources between identical ones.
+
+    Operations run with the given `root` and `context`, not per-client ones,
+    since their results go to everyone subscribed. `request_options` are
+    passed on to each `Request`. Must be used from within one event loop.
+    """
+    def __init__(self, schema: GraphQLSchema, root: Any = None, context: Any = None, **request_options: Any) -> None:
+        self.schema = schema
+        self.root = root
+        self.context = context
+        self.request_options = request_options
+        self._sources: Dict[Key, _Source] = {}
+
+    def __len__(self) -> int:
+        """The number of distinct running subscriptions."""
+        return len(self._sources)
+
+    def subscribe(
+        self,
+        source: Union[str, ast.Document],
+        variables: Optional[Dict[str, Any]] = None,
+        operation_name: Optional[str] = None,
+        max_size: int = 100,
+        policy: str = 'drop_oldest',
+    ) -> Subscriber:
+        """Subscribe to the operation in `source`.
+
+        Raises SubscriptionError if it's invalid or can't be subscribed to.
+        Close the returned Subscriber to unsubscribe."""
+        subscriber = Subscriber(max_size, policy)
+        document = Request().prepare(self.schema, source, operation_name)
+        if isinstance(document, ExecutionResult):
+            raise SubscriptionError([format_error(e) for e in document.errors])
+        key = (print_ast(document), json.dumps(variables, sort_keys=True), operation_name)
+        shared = self._sources.get(key)
+        if shared is None:
+            shared = _Source(self, key, document, variables or {}, operation_name)
+            events = shared.start()
+            self._sources[key] = shared
+            shared.task = asyncio.ensure_future(shared.pump(events))
+            # even if it's cancelled before it starts
+            shared.task.add_done_callback(lambda _: shared.request.close())
+        shared.add(subscriber)
+        return subscriber
+
+async def subscribe(
+    schema: GraphQLSchema,
+    source: Union[str, ast.Document],
+    root: Any = None,
+    context: Any = None,
+    variables: Optional[Dict[str, Any]] = None,
+    operation_name: Optional[str] = None,
+    **request_options: Any
+) -> AsyncIterator[Dict[str, Any]]:
+    """Subscribe to one operation on its own, yielding each result dict.
+
+    Invalid operations yield a single result with `errors`. As with any
+    `Subscriber`, at most 100 results wait for the caller to take them.
+    """
+    hub = SubscriptionHub(schema, root, context, **request_options)
+    try:
+        subscriber = hub.subscribe(source, variables, operation_name)
+    except SubscriptionError as e:
+        yield {'errors': e.errors}
+        return
+    try:
+        async for result in subscriber:
+            yield result
+    finally:
+        subscriber.close()
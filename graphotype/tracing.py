@@ -0,0 +1,217 @@
+"""Traces of single operations: a span for every resolver call.
+
+Pass a `Tracer` to `execute` (or to `serve`) and a sample of requests
+record, for every method, property and attribute they resolve, the field's
+path and parent type, when the resolver started, how long it took, the
+thread it ran on and how it ran:
+
+- 'sync': on the thread executing the operation;
+- 'thread': on a worker thread (schemas made with `execution='threads'`);
+- 'async': it returned a promise, e.g. a `@cpu_bound` method; the span
+  lasts until the promise settles.
+
+Parsing, validation and execution as a whole get spans too. A `Trace` can
+be written as Chrome `trace_event` JSON, which Perfetto and
+chrome://tracing show as a flame graph, or as Apollo tracing data for a
+response's `extensions.tracing`.
+"""
+from dataclasses import dataclass
+import datetime
+import itertools
+import json
+import os
+import random
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from graphql import ResolveInfo
+from graphql.execution import ExecutionResult
+from graphql.language import ast
+from promise import Promise, is_thenable
+
+MODES = ('sync', 'thread', 'async')
+
+@dataclass
+class Span:
+    """One resolver call. Times are in nanoseconds since the trace began."""
+    path: List[Union[str, int]]
+    parent_type: str
+    field_name: str
+    return_type: str
+    start: int
+    duration: int
+    thread: str
+    thread_id: int
+    mode: str
+
+class Trace:
+    """The spans of one operation."""
+    def __init__(self) -> None:
+        self.start_time = datetime.datetime.now(datetime.timezone.utc)
+        self.start = time.perf_counter_ns()
+        self.end: Optional[int] = None
+        self.thread_id = threading.get_ident()
+        self.spans: List[Span] = []
+        # name -> (start, duration), for parse, validate and execute
+        self.phases: Dict[str, Tuple[int, int]] = {}
+        self._lock = threading.Lock()
+
+    def now(self) -> int:
+        return time.perf_counter_ns() - self.start
+
+    def phase(self, name: str, start: float, end: float) -> None:
+        """Record a phase which took from `start` to `end` (`time.perf_counter()` values)."""
+        offset = int(start * 1e9) - self.start
+        self.phases[name] = (offset, int((end - start) * 1e9))
+
+    def resolve(self, info: ResolveInfo, resolve: Callable[[], Any]) -> Any:
+        """Call `resolve`, the resolver of the field described by `info`, recording a span."""
+        thread = threading.current_thread()
+        start = self.now()
+        def record(mode: str) -> None:
+            span = Span(
+                list(info.path), info.parent_type.name, info.field_name, str(info.return_type),
+                start, self.now() - start, thread.name, thread.ident or 0, mode
+            )
+            with self._lock:
+                self.spans.append(span)
+        mode = 'sync' if thread.ident == self.thread_id else 'thread'
+        try:
+            value = resolve()
+        except Exception:
+            record(mode)
+            raise
+        if is_thenable(value):
+            def fulfilled(result: Any) -> Any:
+                record('async')
+                return result
+            def rejected(error: Exception) -> Any:
+                record('async')
+                raise error
+            return Promise.resolve(value).then(fulfilled, rejected)
+        record(mode)
+        return value
+
+    def finish(self) -> None:
+        if self.end is None:
+            self.end = self.now()
+
+    def slowest(self, n: int) -> List[Span]:
+        """The `n` longest spans."""
+        with self._lock:
+            return sorted(self.spans, key=lambda span: span.duration, reverse=True)[:n]
+
+    def to_chrome(self, name: str = 'operation') -> Dict[str, Any]:
+        """The trace in Chrome's trace_event format, with `name` as the
+        operation's span. Times there are in microseconds."""
+        pid = os.getpid()
+        events: List[Dict[str, Any]] = [{
+            'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': self.thread_id,
+            'args': {'name': 'graphotype'},
+        }]
+        with self._lock:
+            spans = list(self.spans)
+        threads = {self.thread_id: threading.current_thread().name}
+        threads.update((span.thread_id, span.thread) for span in spans)
+        for thread_id, thread_name in threads.items():
+            events.append({
+                'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': thread_id,
+                'args': {'name': thread_name},
+            })
+        events.append({
+            'name': name, 'cat': 'operation', 'ph': 'X', 'pid': pid, 'tid': self.thread_id,
+            'ts': 0, 'dur': (self.end or self.now()) / 1000,
+        })
+        for phase, (start, duration) in self.phases.items():
+            events.append({
+                'name': phase, 'cat': 'phase', 'ph': 'X', 'pid': pid, 'tid': self.thread_id,
+                'ts': start / 1000, 'dur': duration / 1000,
+            })
+        for span in spans:
+            events.append({
+                'name': f'{span.parent_type}.{span.field_name}', 'cat': span.mode, 'ph': 'X',
+                'pid': pid, 'tid': span.thread_id, 'ts': span.start / 1000, 'dur': span.duration / 1000,
+                'args': {'path': '.'.join(str(p) for p in span.path), 'returnType': span.return_type},
+            })
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def to_apollo(self) -> Dict[str, Any]:
+        """The trace in the Apollo tracing format (version 1)."""
+        duration = self.end if self.end is not None else self.now()
+        end_time = self.start_time + datetime.timedelta(microseconds=duration / 1000)
+        with self._lock:
+            spans = list(self.spans)
+        result: Dict[str, Any] = {
+            'version': 1,
+            'startTime': self.start_time.isoformat(),
+            'endTime': end_time.isoformat(),
+            'duration': duration,
+        }
+        for phase, key in [('parse', 'parsing'), ('validate', 'validation')]:
+            if phase in self.phases:
+                start, phase_duration = self.phases[phase]
+                result[key] = {'startOffset': start, 'duration': phase_duration}
+        result['execution'] = {'resolvers': [
+            {
+                'path': span.path,
+                'parentType': span.parent_type,
+                'fieldName': span.field_name,
+                'returnType': span.return_type,
+                'startOffset': span.start,
+                'duration': span.duration,
+            }
+            for span in spans
+        ]}
+        return result
+
+class Tracer:
+    """Decides which operations to trace and what to do with their traces.
+
+    - sample_rate: the fraction of operations to trace.
+    - directory: write each trace there, as Chrome trace_event JSON.
+    - extensions: add each trace to its result's `extensions['tracing']`,
+      in the Apollo tracing format.
+    """
+    def __init__(
+        self,
+        sample_rate: float = 1.0,
+        directory: Optional[str] = None,
+        extensions: bool = False,
+    ) -> None:
+        self.sample_rate = sample_rate
+        self.directory = directory
+        self.extensions = extensions
+        self._counter = itertools.count()
+
+    def sample(self) -> Optional[Trace]:
+        """A new Trace, if this operation is to be traced."""
+        if self.sample_rate >= 1 or random.random() < self.sample_rate:
+            return Trace()
+        return None
+
+    def finish(
+        self,
+        trace: Trace,
+        result: ExecutionResult,
+        operation_name: Optional[str] = None,
+        document: Optional[ast.Document] = None,
+    ) -> None:
+        """Called by `Request.run` when a traced operation is done; `document`
+        is None if it couldn't be parsed."""
+        trace.finish()
+        if self.extensions:
+            result.extensions['tracing'] = trace.to_apollo()
+        self.write(trace, operation_name)
+
+    def write(self, trace: Trace, operation_name: Optional[str]) -> None:
+        """Write `trace` to `directory`, if there is one."""
+        if self.directory is None:
+            return
+        # operation_name comes from the client; keep it out of the path
+        name = re.sub(r'\W', '_', operation_name or 'operation')
+        stamp = trace.start_time.strftime('%Y%m%dT%H%M%S')
+        path = os.path.join(self.directory, f'{name}-{stamp}-{os.getpid()}-{next(self._counter)}.json')
+        with open(path, 'w') as f:
+            json.dump(trace.to_chrome(name), f)
@@ -1,4 +1,4 @@
-from typing import Type, List, Iterable, Iterator, Optional, Any, Dict, get_type_hints, Union, TYPE_CHECKING
+from typing import Type, List, Iterable, Iterator, Optional, Any, Dict, Generic, TypeVar, get_type_hints, Union, TYPE_CHECKING
 
 if TYPE_CHECKING:
     class ForwardRef:
@@ -9,6 +9,7 @@ else:
     except ImportError:
         from typing import _ForwardRef as ForwardRef
 
+import collections.abc
 from dataclasses import dataclass
 import typing_inspect
 
@@ -19,6 +20,28 @@ if TYPE_CHECKING:
 else:
     NoneType = type(None)
 
+T = TypeVar('T')
+
+class Context(Generic[T]):
+    """Annotates a resolver parameter that receives the request's context.
+
+    That's the `context` passed to `graphotype.execute` (or `graphql`)."""
+
+class Inject(Generic[T]):
+    """Annotates a resolver parameter that receives a request-scoped T.
+
+    The value comes from the provider registered for T in the `providers`
+    passed to `graphotype.execute`."""
+
+if TYPE_CHECKING:
+    # A method returning Connection[T] may return any iterable of T.
+    Connection = Iterable
+else:
+    class Connection(Generic[T]):
+        """Annotates a method returning a paginated list of T.
+
+        See `graphotype.connections`."""
+
 @dataclass
 class AnnotationOrigin:
     """Where did this Annotation come from? (classname.fieldname)
@@ -62,6 +85,22 @@ class ANewType(Annotation):
     def typename(self):
         return self.t.__name__
 
+@dataclass
+class AConnection(Annotation):
+    """Connection[x]"""
+    of_type: Annotation
+
+@dataclass
+class AStream(Annotation):
+    """AsyncIterator[x]; the events of a subscription."""
+    of_type: Annotation
+
+@dataclass
+class AInjected(Annotation):
+    """Context[x] or Inject[x]; supplied at runtime rather than by the client."""
+    marker: Type
+    of_type: Type
+
 @dataclass
 class AClass(Annotation):
     """Everything else (Python class -- this can be scalars and object types)"""
@@ -84,10 +123,18 @@ def _get_iterable_of(t: Type) -> Optional[Type]:
         return None
     origin = typing_inspect.get_origin(t)
     args = typing_inspect.get_args(t, evaluate=True)
-    if origin in (list, List, Iterable, Iterator):
+    if origin in (list, List, Iterable, Iterator, collections.abc.Iterable, collections.abc.Iterator):
         return args[0]
     return None
 
+def is_lazy_list(ann: Annotation) -> bool:
+    """Whether `ann` is an (optional) Iterator[x] or Iterable[x], rather than a List[x]."""
+    if isinstance(ann, AOptional):
+        ann = ann.of_type
+    return isinstance(ann, AList) and typing_inspect.get_origin(ann.t) in (
+        Iterable, Iterator, collections.abc.Iterable, collections.abc.Iterator
+    )
+
 def make_annotation(raw: Optional[Any], parsed: Type, origin: Optional[AnnotationOrigin] = None) -> Annotation:
     """Recursively transform a Python type hint into an Annotation for our schema.
 
@@ -134,6 +181,38 @@ def make_annotation(raw: Optional[Any], parsed: Type, origin: Optional[Annotatio
                 t_raw=raw, t=parsed, of_type=ann, origin=origin
             )
         return ann
+    if typing_inspect.get_origin(parsed) in (Context, Inject):
+        return AInjected(
+            t_raw=raw,
+            t=parsed,
+            marker=typing_inspect.get_origin(parsed),
+            of_type=typing_inspect.get_args(parsed, evaluate=True)[0],
+            origin=origin
+        )
+    if typing_inspect.get_origin(parsed) is Connection:
+        return AConnection(
+            t_raw=raw,
+            t=parsed,
+            of_type=make_annotation(
+                _unwrap_outer_nullable(raw),
+                typing_inspect.get_args(parsed, evaluate=True)[0],
+                origin
+            ),
+            origin=origin
+        )
+    if typing_inspect.get_origin(parsed) in (
+        collections.abc.AsyncIterator, collections.abc.AsyncIterable, collections.abc.AsyncGenerator
+    ):
+        return AStream(
+            t_raw=raw,
+            t=parsed,
+            of_type=make_annotation(
+                _unwrap_outer_nullable(raw),
+                typing_inspect.get_args(parsed, evaluate=True)[0],
+                origin
+            ),
+            origin=origin
+        )
     nt_of = _get_newtype_of(parsed)
     if nt_of is not None:
         return ANewType(
@@ -0,0 +1,282 @@
+"""A small WebSocket server for subscriptions, for `python -m graphotype serve`.
+
+Speaks the `graphql-transport-ws` protocol
+(https://github.com/enisdenjo/graphql-ws/blob/master/PROTOCOL.md) over a
+minimal, dependency-free implementation of RFC 6455 on asyncio streams. It's
+meant for local development, not for exposing to the internet: there's no
+TLS, no compression and no limit on connections.
+
+All connections share one `SubscriptionHub`, so identical subscriptions
+from different clients share their source and execution; each subscription
+gets its own bounded queue (`max_size`, `policy`). Queries marked `@live`
+may be subscribed to as well, see `graphotype.live`; each client gets its
+own patches.
+"""
+import asyncio
+import base64
+import hashlib
+import json
+import struct
+import threading
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from graphql import GraphQLSchema
+from graphql.error import GraphQLError, format_error
+from graphql.language.parser import parse
+
+from .encoders import to_json
+from .live import is_live, live
+from .subscriptions import Subscriber, SubscriptionError, SubscriptionHub
+
+PROTOCOL = 'graphql-transport-ws'
+GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+MAX_MESSAGE_SIZE = 1 << 20
+
+OP_CONTINUATION = 0x0
+OP_TEXT = 0x1
+OP_BINARY = 0x2
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+class ProtocolError(Exception):
+    """The client broke the WebSocket or graphql-transport-ws protocol."""
+    def __init__(self, code: int, reason: str) -> None:
+        super().__init__(reason)
+        self.code = code
+
+def accept_key(key: str) -> str:
+    return base64.b64encode(hashlib.sha1((key + GUID).encode()).digest()).decode()
+
+def encode_frame(opcode: int, payload: bytes, mask: Optional[bytes] = None) -> bytes:
+    """One complete frame; clients must give a 4-byte `mask`, servers mustn't."""
+    header = bytes([0x80 | opcode])
+    mask_bit = 0x80 if mask is not None else 0
+    length = len(payload)
+    if length < 126:
+        header += bytes([mask_bit | length])
+    elif length < 1 << 16:
+        header += bytes([mask_bit | 126]) + struct.pack('!H', length)
+    else:
+        header += bytes([mask_bit | 127]) + struct.pack('!Q', length)
+    if mask is not None:
+        payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+        header += mask
+    return header + payload
+
+async def read_frame(reader: asyncio.StreamReader) -> Tuple[bool, int, bytes]:
+    """Read one frame, returning (fin, opcode, unmasked payload)."""
+    first, second = await reader.readexactly(2)
+    length = second & 0x7F
+    if length == 126:
+        length, = struct.unpack('!H', await reader.readexactly(2))
+    elif length == 127:
+        length, = struct.unpack('!Q', await reader.readexactly(8))
+    if length > MAX_MESSAGE_SIZE:
+        raise ProtocolError(1009, 'Message too big')
+    mask = await reader.readexactly(4) if second & 0x80 else None
+    payload = await reader.readexactly(length)
+    if mask is not None:
+        payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+    return bool(first & 0x80), first & 0x0F, payload
+
+async def read_handshake(reader: asyncio.StreamReader) -> Dict[str, str]:
+    request = await reader.readuntil(b'\r\n\r\n')
+    lines = request.decode('latin-1').split('\r\n')
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+    return headers
+
+class Connection:
+    """One client connection and its subscriptions."""
+    def __init__(self, hub: SubscriptionHub, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, max_size: int, policy: str) -> None:
+        self.hub = hub
+        self.reader = reader
+        self.writer = writer
+        self.max_size = max_size
+        self.policy = policy
+        self.initialized = False
+        self.subscriptions: Dict[str, asyncio.Task] = {}
+        self._write_lock = asyncio.Lock()
+
+    async def send_frame(self, opcode: int, payload: bytes) -> None:
+        async with self._write_lock:
+            self.writer.write(encode_frame(opcode, payload))
+            await self.writer.drain()
+
+    async def send(self, message: Dict[str, Any]) -> None:
+        await self.send_frame(OP_TEXT, json.dumps(message, default=to_json).encode())
+
+    async def messages(self) -> AsyncIterator[str]:
+        """Yield the text messages the client sends, handling control frames."""
+        fragments: List[bytes] = []
+        while True:
+            fin, opcode, payload = await read_frame(self.reader)
+            if opcode == OP_CLOSE:
+                await self.send_frame(OP_CLOSE, payload[:2])
+                return
+            elif opcode == OP_PING:
+                await self.send_frame(OP_PONG, payload)
+                continue
+            elif opcode == OP_PONG:
+                continue
+            elif opcode == OP_BINARY:
+                raise ProtocolError(1003, 'Binary messages are not supported')
+            elif opcode not in (OP_TEXT, OP_CONTINUATION):
+                raise ProtocolError(1002, 'Unknown opcode')
+            fragments.append(payload)
+            if fin:
+                message, fragments = b''.join(fragments), []
+                yield message.decode()
+
+    async def run(self) -> None:
+        try:
+            async for text in self.messages():
+                try:
+                    message = json.loads(text)
+                    kind = message['type']
+                except (ValueError, KeyError, TypeError):
+                    raise ProtocolError(4400, 'Invalid message')
+                await self.handle(kind, message)
+        except ProtocolError as e:
+            await self.close(e.code, str(e))
+        finally:
+            for task in self.subscriptions.values():
+                task.cancel()
+            self.subscriptions = {}
+
+    async def close(self, code: int, reason: str) -> None:
+        await self.send_frame(OP_CLOSE, struct.pack('!H', code) + reason.encode())
+
+    async def handle(self, kind: str, message: Dict[str, Any]) -> None:
+        if kind == 'connection_init':
+            if self.initialized:
+                raise ProtocolError(4429, 'Too many initialisation requests')
+            self.initialized = True
+            await self.send({'type': 'connection_ack'})
+        elif kind == 'ping':
+            await self.send({'type': 'pong'})
+        elif kind == 'pong':
+            pass
+        elif not self.initialized:
+            raise ProtocolError(4401, 'Unauthorized')
+        elif kind == 'subscribe':
+            await self.subscribe(message)
+        elif kind == 'complete':
+            task = self.subscriptions.pop(str(message.get('id')), None)
+            if task is not None:
+                task.cancel()
+        else:
+            raise ProtocolError(4400, f'Unknown message type {kind!r}')
+
+    async def subscribe(self, message: Dict[str, Any]) -> None:
+        id = message.get('id')
+        payload = message.get('payload') or {}
+        if not isinstance(id, str) or not isinstance(payload, dict) or 'query' not in payload:
+            raise ProtocolError(4400, 'Invalid message')
+        if id in self.subscriptions:
+            raise ProtocolError(4409, f'Subscriber for {id} already exists')
+        query = payload['query']
+        variables = payload.get('variables')
+        operation_name = payload.get('operationName')
+        try:
+            document = parse(query)
+        except GraphQLError as e:
+            await self.send({'id': id, 'type': 'error', 'payload': [format_error(e)]})
+            return
+        if is_live(document, operation_name):
+            hub = self.hub
+            results = live(
+                hub.schema, document, hub.root, hub.context, variables, operation_name,
+                **hub.request_options
+            )
+        else:
+            try:
+                results = self.hub.subscribe(
+                    document, variables, operation_name, max_size=self.max_size, policy=self.policy,
+                )
+            except SubscriptionError as e:
+                await self.send({'id': id, 'type': 'error', 'payload': e.errors})
+                return
+        self.subscriptions[id] = asyncio.ensure_future(self.forward(id, results))
+
+    async def forward(self, id: str, results: AsyncIterator[Dict[str, Any]]) -> None:
+        try:
+            async for result in results:
+                await self.send({'id': id, 'type': 'next', 'payload': result})
+            if self.subscriptions.pop(id, None) is not None:
+                await self.send({'id': id, 'type': 'complete'})
+        except ConnectionError:
+            pass
+        finally:
+            if isinstance(results, Subscriber):
+                results.close()
+            else:
+                await results.aclose() # type: ignore
+
+async def serve(
+    schema: GraphQLSchema,
+    host: str = '127.0.0.1',
+    port: int = 8124,
+    max_size: int = 100,
+    policy: str = 'drop_oldest',
+    **hub_options: Any
+) -> asyncio.AbstractServer:
+    """Start serving subscriptions to `schema`; returns the started server.
+
+    `max_size` and `policy` apply to each subscription's queue, see
+    `graphotype.subscriptions`. `hub_options` go to the `SubscriptionHub`.
+    """
+    hub = SubscriptionHub(schema, **hub_options)
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            headers = await read_handshake(reader)
+            key = headers.get('sec-websocket-key')
+            if headers.get('upgrade', '').lower() != 'websocket' or not key:
+                writer.write(b'HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\n\r\n')
+                return
+            protocols = [p.strip() for p in headers.get('sec-websocket-protocol', '').split(',')]
+            response = (
+                'HTTP/1.1 101 Switching Protocols\r\n'
+                'Upgrade: websocket\r\n'
+                'Connection: Upgrade\r\n'
+                f'Sec-WebSocket-Accept: {accept_key(key)}\r\n'
+            )
+            if PROTOCOL in protocols:
+                response += f'Sec-WebSocket-Protocol: {PROTOCOL}\r\n'
+            writer.write((response + '\r\n').encode())
+            await writer.drain()
+            await Connection(hub, reader, writer, max_size, policy).run()
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
+
+def serve_in_thread(schema: GraphQLSchema, host: str = '127.0.0.1', port: int = 8124, **options: Any) -> threading.Thread:
+    """Run `serve` on its own event loop in a daemon thread."""
+    started = threading.Event()
+    errors: List[Exception] = []
+
+    def run() -> None:
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(serve(schema, host, port, **options))
+        except Exception as e:
+            errors.append(e)
+            return
+        finally:
+            started.set()
+        loop.run_forever()
+
+    thread = threading.Thread(target=run, name='graphotype-websocket', daemon=True)
+    thread.start()
+    started.wait()
+    if errors:
+        raise errors[0]
+    return thread
@@ -0,0 +1,85 @@
+import json
+from typing import Any
+
+import pytest
+
+from graphotype import Object, Scalar, execute, make_schema
+from graphotype.crunch import crunch, execute_crunched, uncrunch
+
+FRIENDS_OF_FRIENDS = """
+    query {
+      hero {
+        name
+        friends {
+          name
+          appearsIn
+          friends { name appearsIn friends { name } }
+        }
+      }
+    }
+"""
+
+def test_crunch_roundtrip():
+    value = {'a': {'x': 1}, 'b': {'x': 1}, 'c': [1, 1.0, True, None, 'x'], 'd': []}
+    crunched = crunch(value)
+    assert crunched[:2] == [1, {'x': 0}]
+    decoded = uncrunch(crunched)
+    assert decoded == value
+    assert json.dumps(decoded) == json.dumps(value)
+    assert uncrunch(crunch(None)) is None
+
+def test_execute_crunched(schema):
+    expected = execute(schema, FRIENDS_OF_FRIENDS).to_dict()
+    crunched = execute_crunched(schema, FRIENDS_OF_FRIENDS)
+    assert 'errors' not in crunched
+    assert uncrunch(crunched['data']) == expected['data']
+    # the same table as crunching afterwards
+    assert crunched['data'] == crunch(expected['data'])
+    assert len(json.dumps(crunched)) * 2 < len(json.dumps(expected))
+
+class Payload:
+    def __init__(self, value: Any) -> None:
+        self.value = value
+
+class Blob(Scalar[Payload]):
+    t = Payload
+
+    @classmethod
+    def parse(cls, value: Any) -> Payload:
+        return Payload(value)
+
+    @classmethod
+    def serialize(cls, instance: Payload) -> Any:
+        return instance.value
+
+class BlobQuery(Object):
+    def blob(self) -> Payload:
+        return Payload({'tags': ['a', 'b'], 'size': {'w': 1}})
+
+    def tags(self) -> Payload:
+        return Payload(['a', 'b'])
+
+    def opaque(self) -> Payload:
+        return Payload({1, 2})
+
+def test_execute_crunched_unhashable():
+    schema = make_schema(BlobQuery, scalars=[Blob])
+    query = '{ blob tags a: tags }'
+    crunched = execute_crunched(schema, query)
+    assert 'errors' not in crunched
+    assert uncrunch(crunched['data']) == execute(schema, query).data
+    assert crunched['data'] == crunch(execute(schema, query).data)
+    crunched = execute_crunched(schema, '{ opaque a: opaque }')
+    assert uncrunch(crunched['data']) == {'opaque': {1, 2}, 'a': {1, 2}}
+
+def test_execute_crunched_errors(schema):
+    result = execute_crunched(schema, '{ human(id: 1) { nope } }')
+    assert 'data' not in result and result['errors']
+
+def test_server(schema):
+    pytest.importorskip('flask_graphql')
+    from graphotype.server import make_app
+    client = make_app(schema).test_client()
+    response = client.post('/', json={'query': FRIENDS_OF_FRIENDS}, headers={'X-GraphQL-Crunch': '1'})
+    assert response.headers['X-GraphQL-Crunch'] == '1'
+    assert uncrunch(response.get_json()['data']) == execute(schema, FRIENDS_OF_FRIENDS).data
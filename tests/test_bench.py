@@ -0,0 +1,52 @@
+import json
+from typing import List
+
+import pytest
+
+from graphotype import make_schema, Object
+from graphotype.__main__ import main
+from graphotype.bench import benchmark, format_table, load_operations
+
+class Query(Object):
+    def names(self, n: int) -> List[str]:
+        return ['Luke Skywalker'] * n
+
+schema = make_schema(Query)
+
+@pytest.fixture
+def operations(tmp_path):
+    (tmp_path / 'names.graphql').write_text('query Names($n: Int!) { names(n: $n) }')
+    (tmp_path / 'both.graphql').write_text('query A { names(n: 1) } query B { names(n: 2) }')
+    return [str(tmp_path / 'names.graphql'), str(tmp_path / 'both.graphql')]
+
+def test_load_operations(operations):
+    loaded = load_operations(operations, [{'n': 1}, {'n': 2}])
+    assert [o.name for o in loaded] == ['names[0]', 'names[1]', 'both:A[0]', 'both:A[1]', 'both:B[0]', 'both:B[1]']
+    assert loaded[1].variables == {'n': 2} and loaded[4].operation_name == 'B'
+
+@pytest.mark.parametrize('mode', ['sync', 'thread', 'asyncio'])
+def test_benchmark(operations, mode):
+    measurements = benchmark(
+        schema, load_operations(operations[:1], [{'n': 10}]), requests=20, concurrency=4, mode=mode, warmup=2
+    )
+    [m] = measurements
+    assert len(m.latencies) == 20 and m.errors == 0 and m.throughput > 0
+    p = m.percentiles()
+    assert p['p50'] <= p['p95'] <= p['p99']
+    assert m.nodes == 11 and m.peak > 0
+    assert format_table(measurements).splitlines()[1].startswith('names ')
+
+def test_errors_counted(operations):
+    [m] = benchmark(schema, load_operations(operations[:1]), requests=5, warmup=0, memory_samples=0)
+    # $n is required
+    assert m.errors == 5 and m.peak is None
+
+def test_cli(operations, tmp_path):
+    output = tmp_path / 'out.json'
+    main([
+        'bench', 'tests.test_bench:schema', *operations, '-v', '{"n": 3}',
+        '-n', '5', '-c', '2', '-m', 'thread', '--json', '-o', str(output)
+    ])
+    results = json.loads(output.read_text())
+    assert [r['operation'] for r in results] == ['names', 'both:A', 'both:B']
+    assert all(r['requests'] == 5 and r['errors'] == 0 and r['p99'] > 0 for r in results)
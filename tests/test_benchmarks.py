@@ -0,0 +1,25 @@
+from graphql import graphql
+
+from graphotype import make_schema
+from benchmarks import schemas
+from benchmarks.run import compare
+
+def test_synthetic_schema():
+    source = schemas.generate(100, seed=1)
+    assert source == schemas.generate(100, seed=1)
+    module = schemas.load(source, 'benchmarks.synthetic_test')
+    schema = make_schema(module.Query)
+    type_map = schema.get_type_map()
+    assert 'Interface7' in type_map and 'Union0' in type_map and 'Name0' in type_map and 'Input19' in type_map
+    # objects implement whole chains of interfaces
+    implemented = [len(t.interfaces) for name, t in type_map.items() if name.startswith('Object')]
+    assert max(implemented) == 8
+    result = graphql(schema, '{ object0 { id name related(input: {id: 1}) { id } } }', root=module.Query())
+    assert result.data == {'object0': None} and not result.errors
+
+def test_compare():
+    old = {'commit': 'a', 'benchmarks': {'x': {'seconds': 1.0, 'throughput': 100.0, 'nodes': 5}}}
+    new = {'commit': 'b', 'benchmarks': {'x': {'seconds': 1.5, 'throughput': 101.0, 'nodes': 5}}}
+    lines = compare(old, new).splitlines()
+    assert lines[1].split() == ['x', 'seconds', '1', '1.5', '+50.0%', '!']
+    assert lines[2].split() == ['x', 'throughput', '100', '101', '+1.0%']
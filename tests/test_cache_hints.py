@@ -0,0 +1,89 @@
+from typing import List
+
+import pytest
+
+import graphotype
+from graphotype import CacheHint, Request, make_schema, Object
+
+class Planet(Object):
+    name = 'Tatooine'
+
+    @property
+    @graphotype.cache_hint(max_age=600)
+    def population(self) -> int:
+        return 200000
+
+class Person(Object):
+    name = 'Luke'
+
+    @graphotype.cache_hint(max_age=30, scope='private')
+    def balance(self) -> int:
+        return 10
+
+class Query(Object):
+    @graphotype.cache_hint(max_age=60)
+    def planets(self) -> List[Planet]:
+        return [Planet()]
+
+    @graphotype.cache_hint(max_age=60)
+    def me(self) -> Person:
+        return Person()
+
+    def person(self) -> Person:
+        return Person()
+
+    def version(self) -> str:
+        return '1'
+
+schema = make_schema(Query)
+
+def policy(query: str):
+    request = Request()
+    try:
+        result = request.run(schema, query, Query())
+        assert not result.errors
+    finally:
+        request.close()
+    return request.cache_policy
+
+def test_merge():
+    assert CacheHint(60).merge(None) == CacheHint(60)
+    assert CacheHint(60).merge(CacheHint(30, 'private')) == CacheHint(30, 'private')
+    with pytest.raises(ValueError):
+        CacheHint(60, 'shared')
+
+def test_policy():
+    assert policy('{ planets { name population } }') == CacheHint(60)
+    # scalar fields without hints go with their parent
+    assert policy('{ me { name } }') == CacheHint(60)
+    assert policy('{ planets { name } me { balance } }') == CacheHint(30, 'private')
+    # objects without hints can't be cached
+    assert policy('{ planets { name } person { name } }') == CacheHint(0)
+    assert policy('{ version }') is None
+
+@pytest.fixture
+def client():
+    pytest.importorskip('flask_graphql')
+    from graphotype.server import make_app
+    return make_app(schema, root_value=Query(), graphiql=False).test_client()
+
+def test_server(client):
+    response = client.get('/', query_string={'query': '{ planets { name } }'})
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == 'max-age=60, public'
+    etag = response.headers['ETag']
+    response = client.get('/', query_string={'query': '{ planets { name } }'}, headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert not response.get_data()
+    response = client.get('/', query_string={'query': '{ me { balance } }'})
+    assert response.headers['Cache-Control'] == 'max-age=30, private'
+    assert response.get_json() == {'data': {'me': {'balance': 10}}}
+
+def test_server_uncacheable(client):
+    for query in ['{ person { name } }', '{ version }', '{ nope }']:
+        response = client.get('/', query_string={'query': query})
+        assert 'Cache-Control' not in response.headers and 'ETag' not in response.headers
+    response = client.post('/', json={'query': '{ planets { name } }'})
+    assert 'Cache-Control' not in response.headers
+    response = client.get('/', query_string={'query': 'mutation { x }'})
+    assert response.status_code == 405
@@ -0,0 +1,101 @@
+import gzip
+import json
+from typing import Iterator, List
+
+import pytest
+
+from graphotype import make_schema, Object
+from graphotype.compression import CODINGS, Compression
+
+DATA = b'{"name":"Luke Skywalker","appearsIn":["NEWHOPE","EMPIRE","JEDI"]},' * 1000
+
+def test_compress():
+    compression = Compression()
+    assert gzip.decompress(compression.compress(DATA, 'gzip')) == DATA
+    compression = Compression(levels={'gzip': 1})
+    assert len(compression.compress(DATA, 'gzip')) * 10 < len(DATA)
+
+def test_compress_in_thread():
+    compression = Compression(piece_size=1000)
+    pieces = list(compression.compress_in_thread(DATA, 'gzip'))
+    assert len(pieces) > 1
+    assert gzip.decompress(b''.join(pieces)) == DATA
+    assert gzip.decompress(b''.join(compression.compress_in_thread(b'', 'gzip'))) == b''
+
+def test_compress_chunks():
+    compression = Compression()
+    chunks = [DATA[i:i + 5000] for i in range(0, len(DATA), 5000)]
+    compressed = list(compression.compress_chunks(chunks, 'gzip'))
+    # each chunk is decompressible as soon as it's sent
+    decompressor = gzip.zlib.decompressobj(31)
+    assert decompressor.decompress(compressed[0]) == chunks[0]
+    assert gzip.decompress(b''.join(compressed)) == DATA
+
+@pytest.mark.parametrize('coding', [coding for coding in CODINGS if coding.available()])
+def test_codings(coding):
+    compression = Compression()
+    compressor = compression.compressor(coding.name)
+    assert compressor.compress(DATA) + compressor.finish()
+
+def test_unknown_coding():
+    with pytest.raises(ValueError):
+        Compression(levels={'nope': 1})
+
+class Query(Object):
+    def names(self, n: int) -> List[str]:
+        return ['Luke Skywalker'] * n
+
+    def rows(self, n: int) -> Iterator[str]:
+        return iter(['Luke Skywalker'] * n)
+
+schema = make_schema(Query)
+
+@pytest.fixture
+def client():
+    pytest.importorskip('flask_graphql')
+    from graphotype.server import make_app
+    app = make_app(schema, root_value=Query(), compression=Compression(thread_size=25000, piece_size=1000))
+    return app.test_client()
+
+@pytest.mark.parametrize('n', [1000, 2000])
+def test_server(client, n):
+    query = {'query': f'{{ names(n: {n}) }}'}
+    response = client.post('/', json=query, headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert json.loads(gzip.decompress(response.get_data())) == {'data': {'names': ['Luke Skywalker'] * n}}
+
+def test_server_uncompressed(client):
+    response = client.post('/', json={'query': '{ names(n: 1) }'}, headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+    response = client.post('/', json={'query': '{ names(n: 1000) }'})
+    assert 'Content-Encoding' not in response.headers
+    assert response.headers['Vary'] == 'Accept-Encoding'
+    response = client.post('/', json={'query': '{ names(n: 1000) }'}, headers={'Accept-Encoding': 'identity'})
+    assert 'Content-Encoding' not in response.headers
+
+def test_server_streaming():
+    pytest.importorskip('flask_graphql')
+    from graphotype.server import make_app
+    client = make_app(schema, root_value=Query(), stream=True, compression=Compression()).test_client()
+    response = client.post('/', json={'query': '{ rows(n: 1000) }'}, headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Length' not in response.headers
+    assert json.loads(gzip.decompress(response.get_data())) == {'data': {'rows': ['Luke Skywalker'] * 1000}}
+
+def test_serve_opt_in(monkeypatch):
+    pytest.importorskip('flask_graphql')
+    from graphotype import server
+    from graphotype.__main__ import main
+    options: List[dict] = []
+    class App:
+        def run(self, port: int) -> None:
+            pass
+    def make_app(schema, **kwargs):
+        options.append(kwargs)
+        return App()
+    monkeypatch.setattr(server, 'make_app', make_app)
+    main(['serve', 'tests.test_compression:schema'])
+    main(['serve', 'tests.test_compression:schema', '--compress', '--compression-level', 'gzip=1'])
+    assert options[0]['compression'] is None
+    assert options[1]['compression'].levels['gzip'] == 1
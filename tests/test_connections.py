@@ -0,0 +1,115 @@
+import itertools
+from typing import Iterator, List, Optional
+
+import pytest
+from graphql import print_schema
+
+from graphotype import make_schema, execute, Object, Connection, SchemaError
+from graphotype.connections import Page, encode_cursor
+
+class Row(Object):
+    n: int
+    def __init__(self, n: int) -> None:
+        self.n = n
+
+produced: List[int] = []
+
+def rows_from(start: int) -> Iterator[Row]:
+    for n in itertools.count(start):
+        produced.append(n)
+        yield Row(n)
+
+class Query(Object):
+    def numbers(self) -> Connection[Row]:
+        return [Row(n) for n in range(10)]
+
+    def endless(self) -> Connection[Row]:
+        return rows_from(0)
+
+    def paged(self, page: Page, step: int) -> Connection[Row]:
+        assert page.limit is not None
+        return [Row(n * step) for n in range(page.offset, page.offset + page.limit)]
+
+schema = make_schema(Query)
+
+def ns(result, field):
+    assert not result.errors, result.errors
+    return [edge['node']['n'] for edge in result.data[field]['edges']]
+
+def test_schema():
+    printed = print_schema(schema)
+    assert 'numbers(first: Int, after: String, last: Int, before: String): RowConnection!' in printed
+    assert 'paged(step: Int!, first: Int, after: String, last: Int, before: String): RowConnection!' in printed
+    assert 'type RowEdge {\n  node: Row!\n  cursor: String!\n}' in printed
+    assert 'type PageInfo' in printed
+
+def test_first_after():
+    result = execute(schema, '''{ numbers(first: 3) {
+        edges { cursor node { n } }
+        pageInfo { hasNextPage hasPreviousPage startCursor endCursor }
+    } }''')
+    assert ns(result, 'numbers') == [0, 1, 2]
+    page_info = result.data['numbers']['pageInfo']
+    assert page_info == {
+        'hasNextPage': True,
+        'hasPreviousPage': False,
+        'startCursor': encode_cursor(0),
+        'endCursor': encode_cursor(2),
+    }
+    result = execute(schema, '''query($after: String) { numbers(first: 20, after: $after) {
+        edges { node { n } } pageInfo { hasNextPage hasPreviousPage }
+    } }''', variables={'after': page_info['endCursor']})
+    assert ns(result, 'numbers') == list(range(3, 10))
+    assert result.data['numbers']['pageInfo'] == {'hasNextPage': False, 'hasPreviousPage': True}
+
+def test_last_before():
+    result = execute(schema, '{ numbers(last: 2) { edges { node { n } } } }')
+    assert ns(result, 'numbers') == [8, 9]
+    result = execute(schema, '{ numbers(last: 2, before: "%s") { edges { node { n } } } }' % encode_cursor(5))
+    assert ns(result, 'numbers') == [3, 4]
+
+def test_lazy_iterator():
+    produced.clear()
+    result = execute(schema, '{ endless(first: 3, after: "%s") { edges { node { n } } pageInfo { hasNextPage } } }' % encode_cursor(4))
+    assert ns(result, 'endless') == [5, 6, 7]
+    assert result.data['endless']['pageInfo'] == {'hasNextPage': True}
+    # just one item beyond the page, to know there's a next page
+    assert produced == [0, 1, 2, 3, 4, 5, 6, 7, 8]
+
+def test_page_parameter():
+    result = execute(schema, '{ paged(step: 10, first: 2, after: "%s") { edges { node { n } } pageInfo { hasNextPage } } }' % encode_cursor(1))
+    assert ns(result, 'paged') == [20, 30]
+    assert result.data['paged']['pageInfo'] == {'hasNextPage': True}
+    result = execute(schema, '{ paged(step: 1, last: 2) { edges { node { n } } } }')
+    assert 'does not support `last` without `before`' in str(result.errors[0])
+
+def test_invalid_cursor():
+    result = execute(schema, '{ numbers(after: "nope") { edges { cursor } } }')
+    assert 'Invalid cursor' in str(result.errors[0])
+
+def test_negative_cursor():
+    result = execute(schema, '{ numbers(before: "%s") { edges { cursor } } }' % encode_cursor(-5))
+    assert 'Invalid cursor' in str(result.errors[0])
+
+def test_nullable_nodes():
+    class NullableQuery(Object):
+        def numbers(self) -> Connection[Row]:
+            return [Row(0)]
+
+        def gaps(self) -> Connection[Optional[Row]]:
+            return [Row(0), None]
+
+    schema = make_schema(NullableQuery)
+    printed = print_schema(schema)
+    assert 'gaps(first: Int, after: String, last: Int, before: String): NullableRowConnection!' in printed
+    assert 'type NullableRowEdge {\n  node: Row\n  cursor: String!\n}' in printed
+    assert 'type RowEdge {\n  node: Row!\n  cursor: String!\n}' in printed
+    result = execute(schema, '{ gaps { edges { node { n } } } numbers { pageInfo { hasNextPage } } }')
+    assert result.data == {'gaps': {'edges': [{'node': {'n': 0}}, {'node': None}]}, 'numbers': {'pageInfo': {'hasNextPage': False}}}
+
+def test_reserved_argument_names():
+    class Query(Object):
+        def items(self, first: int) -> Connection[Row]:
+            return []
+    with pytest.raises(SchemaError):
+        make_schema(Query)
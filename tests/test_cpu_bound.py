@@ -0,0 +1,75 @@
+from dataclasses import dataclass
+import os
+import time
+from typing import Any, List
+
+from graphotype import make_schema, execute, cpu_bound, Object
+
+@dataclass
+class Shape(Object):
+    points: List[float]
+
+    @cpu_bound
+    def area(self, scale: float) -> float:
+        return sum(self.points) * scale
+
+    @cpu_bound
+    def pid(self) -> int:
+        return os.getpid()
+
+    @cpu_bound(fields=['points'])
+    def summary(self) -> str:
+        # only `points` was shipped to the worker
+        return f"{len(self.points)} {hasattr(self, 'callback')}"
+
+class Query(Object):
+    def shape(self) -> Shape:
+        shape = Shape([1.0, 2.0, 3.0])
+        shape.callback = lambda: None  # type: ignore
+        return shape
+
+    def plainShape(self) -> Shape:
+        return Shape([1.0])
+
+    @cpu_bound(timeout=0.05)
+    def sleepy(self) -> int:
+        time.sleep(1)
+        return 1
+
+schema = make_schema(Query, processes=2)
+in_process = make_schema(Query, processes=0)
+
+def teardown_module():
+    schema.shutdown()
+
+def test_runs_in_worker():
+    result = execute(schema, '{ plainShape { area(scale: 2) pid } }')
+    assert not result.errors
+    assert result.data['plainShape']['area'] == 2.0
+    assert result.data['plainShape']['pid'] != os.getpid()
+
+def test_unpicklable_parent_falls_back():
+    result = execute(schema, '{ shape { area(scale: 1) pid } }')
+    assert not result.errors
+    assert result.data['shape'] == {'area': 6.0, 'pid': os.getpid()}
+
+def test_ship_selected_fields():
+    result = execute(schema, '{ shape { summary } }')
+    assert not result.errors
+    assert result.data['shape']['summary'] == '3 False'
+
+def test_in_process():
+    result = execute(in_process, '{ plainShape { pid } }')
+    assert not result.errors
+    assert result.data['plainShape']['pid'] == os.getpid()
+
+def test_timeout():
+    result = execute(schema, '{ sleepy }')
+    assert result.errors
+    assert 'took longer than' in str(result.errors[0])
+
+def test_restarts_after_shutdown():
+    schema.process_pool.shutdown()
+    result = execute(schema, '{ plainShape { area(scale: 1) } }')
+    assert not result.errors
+    assert result.data == {'plainShape': {'area': 1.0}}
@@ -109,3 +109,8 @@ def test_dict_and_list_from_ast(schema):
                  '    "a": "1"\n'
                  '  }\n'
                  '}'}
+
+def test_scalars_positional():
+    # make_schema(query, mutation, scalars), as always
+    schema = make_schema(Query, None, [DateTime, JSON])
+    assert schema.get_type('DateTime') is not None
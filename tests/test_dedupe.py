@@ -0,0 +1,101 @@
+from collections import Counter
+from dataclasses import dataclass
+from typing import List
+
+from graphotype import make_schema, execute, Object
+from graphotype import execution
+
+calls: Counter = Counter()
+
+@dataclass
+class Filter:
+    tags: List[str]
+
+class Item(Object):
+    def __init__(self, n: int) -> None:
+        self.n = n
+
+    def square(self) -> int:
+        calls['square'] += 1
+        return self.n * self.n
+
+    @property
+    def double(self) -> int:
+        calls['double'] += 1
+        return self.n * 2
+
+shared = Item(3)
+
+class Query(Object):
+    def item(self, n: int) -> Item:
+        calls['item'] += 1
+        return shared if n == 3 else Item(n)
+
+    def items(self) -> List[Item]:
+        return [shared, shared, Item(4)]
+
+    def search(self, filter: Filter) -> int:
+        calls['search'] += 1
+        return len(filter.tags)
+
+class Mutation(Object):
+    def increment(self) -> int:
+        calls['increment'] += 1
+        return calls['increment']
+
+schema = make_schema(Query, Mutation)
+
+def setup_function():
+    calls.clear()
+
+def test_aliases():
+    result = execute(schema, '''
+    query {
+        a: item(n: 3) { square double }
+        b: item(n: 3) { square double }
+        c: item(n: 5) { square }
+    }''')
+    assert not result.errors
+    assert result.data == {
+        'a': {'square': 9, 'double': 6},
+        'b': {'square': 9, 'double': 6},
+        'c': {'square': 25},
+    }
+    assert calls == {'item': 2, 'square': 2, 'double': 1}
+
+def test_fragments_and_shared_parents():
+    result = execute(schema, '''
+    query {
+        items { ...F ...F }
+    }
+    fragment F on Item { square }
+    ''')
+    assert not result.errors
+    assert result.data == {'items': [{'square': 9}, {'square': 9}, {'square': 16}]}
+    assert calls == {'square': 2}
+
+def test_input_object_args():
+    result = execute(schema, '''
+    query {
+        a: search(filter: {tags: ["x", "y"]})
+        b: search(filter: {tags: ["x", "y"]})
+        c: search(filter: {tags: ["x"]})
+    }''')
+    assert result.data == {'a': 2, 'b': 2, 'c': 1}
+    assert calls == {'search': 2}
+
+def test_disabled():
+    result = execute(schema, 'query { a: item(n: 3) { square } b: item(n: 3) { square } }', dedupe=False)
+    assert not result.errors
+    assert calls == {'item': 2, 'square': 2}
+
+def test_mutations_not_deduplicated():
+    result = execute(schema, 'mutation { a: increment b: increment }')
+    assert not result.errors
+    assert result.data == {'a': 1, 'b': 2}
+
+def test_stats():
+    before = execution.stats.copy()
+    execute(schema, 'query { a: item(n: 3) { square } b: item(n: 3) { square } }')
+    assert execution.stats['dedupe_hits'] - before['dedupe_hits'] == 2
+    assert execution.stats['dedupe_misses'] - before['dedupe_misses'] == 2
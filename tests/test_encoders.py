@@ -0,0 +1,92 @@
+import json
+import sys
+from datetime import datetime, timezone
+from typing import Any
+
+import pytest
+
+from graphotype import execute, make_schema, Object, Scalar
+from graphotype.encoders import JSON, CBOREncoder, MessagePackEncoder, available_encoders, to_json
+
+_DATETIME = datetime(2019, 1, 10, 23, 35, 7)
+
+class DateTime(Scalar[datetime]):
+    t = datetime
+
+    @classmethod
+    def parse(cls, value: Any) -> datetime:
+        return datetime.fromisoformat(value)
+
+    @classmethod
+    def serialize(cls, instance: datetime) -> Any:
+        # left to the encoder
+        return instance
+
+class Bytes(Scalar[bytes]):
+    t = bytes
+
+    @classmethod
+    def parse(cls, value: Any) -> bytes:
+        return bytes(value)
+
+    @classmethod
+    def serialize(cls, instance: bytes) -> Any:
+        return instance
+
+class Query(Object):
+    when: datetime = _DATETIME
+    blob: bytes = b'\x00\xff'
+    ratio: float = 0.5
+
+schema = make_schema(Query, scalars=[DateTime, Bytes])
+QUERY = '{ when blob ratio }'
+EXPECTED = {'data': {'when': '2019-01-10T23:35:07', 'blob': 'AP8=', 'ratio': 0.5}}
+
+def test_to_json():
+    assert to_json(b'\x00\xff') == 'AP8='
+    assert to_json(_DATETIME.date()) == '2019-01-10'
+    with pytest.raises(TypeError):
+        to_json(object())
+
+def test_native_leaves():
+    result = execute(schema, QUERY, Query()).to_dict()
+    assert result['data']['when'] == _DATETIME
+    assert json.loads(JSON.encode(result)) == EXPECTED
+    assert json.loads(JSON.encode(result, pretty=True)) == EXPECTED
+
+def test_json_without_orjson(monkeypatch):
+    monkeypatch.setitem(sys.modules, 'orjson', None)
+    result = execute(schema, QUERY, Query()).to_dict()
+    assert JSON.encode(result) == json.dumps(EXPECTED, separators=(',', ':')).encode()
+    assert JSON.encode({'n': 2 ** 70}) == b'{"n":1180591620717411303424}'
+
+def test_big_integers():
+    assert json.loads(JSON.encode({'n': 2 ** 70})) == {'n': 2 ** 70}
+
+def test_msgpack():
+    msgpack = pytest.importorskip('msgpack')
+    result = execute(schema, QUERY, Query()).to_dict()
+    decoded = msgpack.unpackb(MessagePackEncoder().encode(result), timestamp=3)
+    assert decoded['data'] == {'when': _DATETIME.replace(tzinfo=timezone.utc), 'blob': b'\x00\xff', 'ratio': 0.5}
+
+def test_cbor():
+    cbor2 = pytest.importorskip('cbor2')
+    result = execute(schema, QUERY, Query()).to_dict()
+    decoded = cbor2.loads(CBOREncoder().encode(result))
+    assert decoded['data'] == {'when': _DATETIME.replace(tzinfo=timezone.utc), 'blob': b'\x00\xff', 'ratio': 0.5}
+
+def test_server():
+    pytest.importorskip('flask_graphql')
+    from graphotype.server import make_app
+    client = make_app(schema, root_value=Query()).test_client()
+    response = client.post('/', json={'query': QUERY})
+    assert response.content_type == 'application/json'
+    assert response.get_json() == EXPECTED
+    for encoder in available_encoders():
+        response = client.post('/', json={'query': QUERY}, headers={'Accept': encoder.media_type})
+        assert response.content_type == encoder.media_type
+    # unknown types get JSON
+    response = client.post('/', json={'query': QUERY}, headers={'Accept': 'application/x-nope'})
+    assert response.get_json() == EXPECTED
+    response = client.post('/', json=[{'query': QUERY}])
+    assert response.status_code == 400
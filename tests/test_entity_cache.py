@@ -0,0 +1,89 @@
+from collections import Counter
+from dataclasses import dataclass
+from typing import List
+
+from graphotype import make_schema, execute, Context, EntityCache, Object, ID
+
+calls: Counter = Counter()
+
+@dataclass
+class Person(Object):
+    id: ID
+    name: str
+
+    def canEdit(self, user: Context[str]) -> bool:
+        calls['canEdit'] += 1
+        return user == graph[self.id]
+
+    def friends(self) -> List['Person']:
+        calls[self.id] += 1
+        # Fresh instances every time, as if loaded from a database.
+        return [Person(ID(i), graph[i]) for i in friends[self.id]]
+
+graph = {'1': 'Luke', '2': 'Han', '3': 'Leia'}
+friends = {'1': ['2', '3'], '2': ['1', '3'], '3': ['1', '2']}
+
+class Query(Object):
+    def person(self, id: ID) -> Person:
+        return Person(id, graph[id])
+
+schema = make_schema(Query)
+
+QUERY = '''
+query {
+    person(id: "1") {
+        name
+        friends { name friends { name friends { name } } }
+    }
+}
+'''
+
+def setup_function():
+    calls.clear()
+
+def test_without_cache():
+    result = execute(schema, QUERY)
+    assert not result.errors
+    assert sum(calls.values()) == 1 + 2 + 4
+
+def test_resolves_each_entity_once():
+    uncached = execute(schema, QUERY).data
+    calls.clear()
+    result = execute(schema, QUERY, entity_cache=True)
+    assert not result.errors
+    assert result.data == uncached
+    assert calls == {'1': 1, '2': 1, '3': 1}
+
+def test_shared_across_requests():
+    cache = EntityCache()
+    execute(schema, QUERY, entity_cache=cache)
+    assert ('Person', '2') in cache
+    calls.clear()
+    result = execute(schema, QUERY, entity_cache=cache)
+    assert not result.errors
+    assert sum(calls.values()) == 0
+
+    cache.invalidate('Person', '2')
+    execute(schema, QUERY, entity_cache=cache)
+    assert calls == {'2': 1}
+
+def test_max_size():
+    cache = EntityCache(max_size=2)
+    execute(schema, QUERY, entity_cache=cache)
+    assert len(cache) == 2
+
+def test_canonical_instances():
+    cache = EntityCache()
+    a, b = Person(ID('1'), 'Luke'), Person(ID('1'), 'Luke')
+    key_of = lambda p: ('Person', p.id)
+    assert all(p is a for p in cache.canonical([a, b], key_of))
+    assert cache.canonical(b, key_of) is a
+
+def test_injected_not_shared():
+    cache = EntityCache()
+    query = '{ person(id: "1") { canEdit a: canEdit } }'
+    calls.clear()
+    assert execute(schema, query, context='Luke', entity_cache=cache).data == {'person': {'canEdit': True, 'a': True}}
+    assert execute(schema, query, context='Han', entity_cache=cache).data == {'person': {'canEdit': False, 'a': False}}
+    # still resolved once per request
+    assert calls['canEdit'] == 2
@@ -0,0 +1,72 @@
+from typing import List, Optional
+
+import pytest
+
+from graphotype import Interface, Object, SchemaCreator, SchemaError, execute, make_schema
+
+class Animal(Interface):
+    legs: int
+
+class Dog(Object, Animal):
+    legs = 4
+    def friend(self, name: str) -> Optional['Dog']:
+        return Dog() if name == 'Rex' else None
+
+class Bird(Object, Animal):
+    legs = 2
+
+class Query(Object):
+    def animals(self) -> List[Animal]:
+        return [Dog(), Bird()]
+
+def test_freeze(monkeypatch):
+    calls: List[str] = []
+    map_fields = SchemaCreator.map_fields
+    def counting(self, cls):
+        calls.append(cls.__name__)
+        return map_fields(self, cls)
+    monkeypatch.setattr(SchemaCreator, 'map_fields', counting)
+
+    schema = make_schema(Query, freeze=True)
+    assert sorted(calls) == ['Animal', 'Bird', 'Dog', 'Query']
+    assert {'Query', 'Animal', 'Dog', 'Bird'} <= set(schema.build_timings)
+    assert all(seconds >= 0 for seconds in schema.build_timings.values())
+
+    result = execute(schema, '{ animals { legs ... on Dog { friend(name: "Rex") { legs } } } }', root=Query())
+    assert result.data == {'animals': [{'legs': 4, 'friend': {'legs': 4}}, {'legs': 2}]}
+    # nothing was built again
+    assert len(calls) == 4
+    eager = make_schema(Query)
+    assert schema.frozen and not eager.frozen
+    assert schema.print_schema() == eager.print_schema()
+
+def test_read_only():
+    schema = make_schema(Query, freeze=True)
+    dog = schema.get_type('Dog')
+    with pytest.raises(TypeError):
+        dog.fields['legs'] = dog.fields['friend']
+    with pytest.raises(TypeError):
+        dog.fields['friend'].args['name'] = None
+    with pytest.raises(TypeError):
+        schema.get_type_map()['Cat'] = dog
+    with pytest.raises(TypeError):
+        del schema.get_type_map()['Dog']
+
+def test_checked():
+    class Named(Interface):
+        name: str
+
+    class Numbered(Object, Named):
+        name: int = 1
+
+    class BadQuery(Object):
+        def named(self) -> Named:
+            return Numbered()
+
+    with pytest.raises(SchemaError) as e:
+        make_schema(BadQuery, freeze=True)
+    assert 'Named.name expects type "String!"' in str(e.value)
+
+def test_not_lazy():
+    with pytest.raises(ValueError):
+        make_schema(Query, lazy=True, freeze=True)
@@ -0,0 +1,105 @@
+import json
+from typing import Iterator, List, Optional
+
+import pytest
+from graphql import print_schema
+
+from graphotype import make_schema, execute, Object
+from graphotype.incremental import execute_incremental
+
+calls: List[str] = []
+
+class Product(Object):
+    name: str
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def recommendations(self) -> Iterator['Product']:
+        for name in ['a', 'b', 'c']:
+            calls.append(name)
+            yield Product(self.name + name)
+
+    def related(self) -> List['Product']:
+        return [Product(self.name + 'r')]
+
+    def price(self) -> int:
+        calls.append('price')
+        return len(self.name)
+
+    def broken(self) -> Optional['Product']:
+        raise ValueError('broken')
+
+    def boom(self) -> int:
+        raise ValueError('boom')
+
+class Query(Object):
+    def product(self) -> Product:
+        return Product('p')
+
+schema = make_schema(Query)
+
+def run(query: str, **kwargs) -> list:
+    return list(execute_incremental(schema, query, **kwargs))
+
+def test_schema():
+    printed = print_schema(schema)
+    assert 'directive @defer(if: Boolean = true, label: String) on FRAGMENT_SPREAD | INLINE_FRAGMENT' in printed
+    assert 'directive @stream' in printed
+
+def test_defer():
+    calls.clear()
+    payloads = execute_incremental(schema, '''{ product { name ...Slow @defer(label: "slow") } }
+        fragment Slow on Product { price }''')
+    assert next(payloads) == {'data': {'product': {'name': 'p'}}, 'hasNext': True}
+    # deferred work only starts once the first payload has been taken
+    assert calls == []
+    assert list(payloads) == [{
+        'incremental': [{'data': {'price': 1}, 'path': ['product'], 'label': 'slow'}],
+        'hasNext': False,
+    }]
+
+def test_defer_if_false():
+    query = 'query($d: Boolean!) { product { name ... on Product @defer(if: $d) { price } } }'
+    assert run(query, variables={'d': False}) == [{'data': {'product': {'name': 'p', 'price': 1}}}]
+
+def test_stream():
+    calls.clear()
+    payloads = execute_incremental(schema, '{ product { recommendations @stream(initialCount: 1) { name } } }')
+    assert next(payloads) == {'data': {'product': {'recommendations': [{'name': 'pa'}]}}, 'hasNext': True}
+    assert calls == ['a']
+    assert list(payloads) == [
+        {'incremental': [{'items': [{'name': 'pb'}], 'path': ['product', 'recommendations', 1]}], 'hasNext': True},
+        {'incremental': [{'items': [{'name': 'pc'}], 'path': ['product', 'recommendations', 2]}], 'hasNext': True},
+        {'hasNext': False},
+    ]
+
+def test_stream_only_lazy_lists():
+    [payload] = run('{ product { related @stream { name } } }')
+    assert 'only fields annotated Iterator' in payload['errors'][0]['message']
+    result = execute(schema, '{ product { recommendations @stream { name } } }')
+    assert not result.errors
+    assert len(result.data['product']['recommendations']) == 3
+
+def test_errors():
+    payloads = run('{ product { name ... on Product @defer { boom } broken { ... on Product @defer { name } } } }')
+    assert payloads[0]['data'] == {'product': {'name': 'p', 'broken': None}}
+    assert payloads[0]['errors'][0]['path'] == ['product', 'broken']
+    # nothing under `broken` is delivered
+    [incremental] = payloads[1]['incremental']
+    assert incremental['data'] is None
+    assert incremental['errors'][0]['message'] == 'boom'
+    assert payloads[1]['hasNext'] is False
+
+def test_server():
+    pytest.importorskip('flask_graphql')
+    from graphotype.server import make_app
+    client = make_app(schema).test_client()
+    query = '{ product { name ... on Product @defer { price } } }'
+    response = client.post('/', json={'query': query}, headers={'Accept': 'multipart/mixed'})
+    assert response.mimetype == 'multipart/mixed'
+    parts = response.get_data(as_text=True).split('\r\n---')[1:-1]
+    payloads = [json.loads(part.split('\r\n\r\n', 1)[1]) for part in parts]
+    assert payloads == run(query)
+    # without multipart, everything arrives at once
+    response = client.post('/', json={'query': query})
+    assert response.get_json() == {'data': {'product': {'name': 'p', 'price': 1}}}
@@ -0,0 +1,103 @@
+from dataclasses import dataclass
+from typing import List
+
+import pytest
+from graphql import graphql, print_schema
+
+from graphotype import make_schema, execute, Object, Context, Inject, ResourcePool, SchemaError
+
+@dataclass
+class AppContext:
+    user: str
+
+class Connection:
+    opened = 0
+
+    def __init__(self) -> None:
+        Connection.opened += 1
+        self.queries: List[str] = []
+
+    def query(self, sql: str) -> str:
+        self.queries.append(sql)
+        return sql.upper()
+
+class Query(Object):
+    def whoami(self, ctx: Context[AppContext]) -> str:
+        return ctx.user
+
+    def run(self, sql: str, db: Inject[Connection]) -> str:
+        return db.query(sql)
+
+schema = make_schema(Query)
+
+def test_injected_params_not_in_schema():
+    printed = print_schema(schema)
+    assert 'whoami: String!' in printed
+    assert 'run(sql: String!): String!' in printed
+
+def test_context():
+    result = execute(schema, '{ whoami }', context=AppContext('luke'))
+    assert not result.errors
+    assert result.data == {'whoami': 'luke'}
+    # plain graphql-core execution passes the context through as well
+    result = graphql(schema, '{ whoami }', context=AppContext('leia'))
+    assert result.data == {'whoami': 'leia'}
+
+def test_pooled_per_request():
+    pool = ResourcePool(Connection, max_size=1)
+    Connection.opened = 0
+    for _ in range(3):
+        result = execute(schema, '{ a: run(sql: "a") b: run(sql: "b") }', providers={Connection: pool})
+        assert not result.errors
+        assert result.data == {'a': 'A', 'b': 'B'}
+        assert pool.idle == 1
+    assert Connection.opened == 1
+
+def test_factory_provider():
+    conns: List[Connection] = []
+    def connect() -> Connection:
+        conns.append(Connection())
+        return conns[-1]
+    result = execute(schema, '{ a: run(sql: "a") b: run(sql: "b") }', providers={Connection: connect})
+    assert not result.errors
+    assert len(conns) == 1
+    assert conns[0].queries == ['a', 'b']
+
+def test_missing_provider():
+    result = execute(schema, '{ run(sql: "a") }')
+    assert result.errors
+    assert 'No provider for Inject' in str(result.errors[0])
+
+def test_pool_timeout():
+    pool = ResourcePool(Connection, max_size=1, timeout=0.01)
+    pool.acquire()
+    with pytest.raises(TimeoutError):
+        pool.acquire()
+
+def test_not_allowed_as_field_type():
+    class Query(Object):
+        ctx: Context[AppContext]
+    with pytest.raises(SchemaError):
+        make_schema(Query)
+
+@pytest.mark.parametrize('headers', [{}, {'X-GraphQL-Crunch': '1'}])
+@pytest.mark.parametrize('stream', [False, True])
+def test_server(stream, headers):
+    pytest.importorskip('flask_graphql')
+    from graphotype.server import make_app
+    conns: List[Connection] = []
+    def connect() -> Connection:
+        conns.append(Connection())
+        return conns[-1]
+    client = make_app(schema, stream=stream, providers={Connection: connect}).test_client()
+    response = client.post('/', json={'query': '{ run(sql: "a") }'}, headers=headers)
+    assert b'"A"' in response.get_data()
+    assert len(conns) == 1
+
+def test_server_incremental():
+    pytest.importorskip('flask_graphql')
+    from graphotype.server import make_app
+    client = make_app(schema, providers={Connection: Connection}).test_client()
+    response = client.post('/', json={'query': '{ ... @defer { run(sql: "a") } }'}, headers={'Accept': 'multipart/mixed'})
+    assert response.content_type.startswith('multipart/mixed')
+    assert b'"A"' in response.get_data()
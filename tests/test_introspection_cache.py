@@ -0,0 +1,103 @@
+import json
+from typing import List
+
+import pytest
+from graphql import graphql, print_schema
+from graphql.utils.introspection_query import introspection_query
+
+from graphotype import execute, make_schema, Object
+from graphotype.__main__ import main
+
+class Query(Object):
+    def names(self, n: int) -> List[str]:
+        return ['Luke Skywalker'] * n
+
+schema = make_schema(Query)
+
+def test_cached():
+    result = execute(schema, introspection_query)
+    assert not result.errors
+    assert result.data == graphql(schema, introspection_query).data
+    assert result.data is schema.introspect()
+    # the same operation, formatted differently
+    variant = ' '.join(introspection_query.split())
+    assert execute(schema, variant).data is schema.introspect()
+
+def test_not_quite_standard():
+    aliased = introspection_query.replace('__schema', 's: __schema')
+    result = execute(schema, aliased)
+    assert result.data == {'s': schema.introspect()['__schema']}
+    deprecated = introspection_query.replace('includeDeprecated: true', 'includeDeprecated: false')
+    result = execute(schema, deprecated)
+    assert result.data is not schema.introspect() and result.data == graphql(schema, deprecated).data
+    renamed = introspection_query.replace('IntrospectionQuery', 'Introspect')
+    assert execute(schema, renamed).data is not schema.introspect()
+
+def test_other_introspection():
+    query = '{ __schema { queryType { name } } }'
+    assert execute(schema, query).data == {'__schema': {'queryType': {'name': 'Query'}}}
+    query = '{ __type(name: "Query") { name } names(n: 1) __typename }'
+    assert execute(schema, query).data == {'__type': {'name': 'Query'}, 'names': ['Luke Skywalker'], '__typename': 'Query'}
+
+def test_print_schema():
+    assert schema.print_schema() == print_schema(schema)
+    assert schema.print_schema() is schema.print_schema()
+
+def test_execute():
+    executed = make_schema(Query, introspection='execute')
+    result = execute(executed, introspection_query)
+    assert result.data == schema.introspect() and result.data is not executed.introspect()
+
+def test_block():
+    blocked = make_schema(Query, introspection='block')
+    for query in [introspection_query, '{ names(n: 1) __type(name: "Query") { name } }']:
+        result = execute(blocked, query)
+        assert result.invalid and [e.message for e in result.errors] == ['Introspection is disabled']
+    assert execute(blocked, '{ names(n: 1) __typename }').data == {'names': ['Luke Skywalker'], '__typename': 'Query'}
+
+def test_block_fragments():
+    blocked = make_schema(Query, introspection='block')
+    for query in [
+        '{ ... on Query { __schema { types { name } } } }',
+        '{ ...F } fragment F on Query { __schema { types { name } } }',
+        '{ ...F } fragment F on Query { ... { ...G } } fragment G on Query { __type(name: "Query") { name } }',
+    ]:
+        result = execute(blocked, query)
+        assert result.invalid and [e.message for e in result.errors] == ['Introspection is disabled']
+    assert execute(blocked, '{ ... on Query { names(n: 1) } }').data == {'names': ['Luke Skywalker']}
+
+def test_block_everywhere():
+    from graphotype.crunch import execute_crunched
+    from graphotype.incremental import execute_incremental
+    from graphotype.streaming import execute_streaming
+    blocked = make_schema(Query, introspection='block')
+    query = '{ __schema { types { name } } }'
+    expected = {'errors': [{'message': 'Introspection is disabled'}]}
+    assert execute_crunched(blocked, query) == expected
+    assert list(execute_incremental(blocked, query)) == [expected]
+    assert json.loads(''.join(execute_streaming(blocked, query))) == expected
+
+def test_bad_policy():
+    with pytest.raises(ValueError):
+        make_schema(Query, introspection='nope')
+
+def test_dump(tmp_path):
+    path = tmp_path / 'schema.json'
+    main(['dump', 'tests.test_introspection_cache:schema', str(path), '--json'])
+    assert json.loads(path.read_text()) == {'data': schema.introspect()}
+
+def test_server():
+    pytest.importorskip('flask_graphql')
+    from graphotype.server import make_app
+    blocked = make_schema(Query, introspection='block')
+    client = make_app(blocked, root_value=Query()).test_client()
+    response = client.post('/', json={'query': introspection_query})
+    assert response.status_code == 400
+    response = client.post('/', json={'query': introspection_query}, headers={'X-GraphQL-Crunch': '1'})
+    assert response.status_code == 400 and '__schema' not in response.get_data(as_text=True)
+    streamed = make_app(blocked, root_value=Query(), stream=True).test_client()
+    response = streamed.post('/', json={'query': introspection_query})
+    assert response.get_json() == {'errors': [{'message': 'Introspection is disabled'}]}
+    client = make_app(schema, root_value=Query()).test_client()
+    response = client.post('/', json={'query': introspection_query})
+    assert response.json == {'data': schema.introspect()}
@@ -0,0 +1,120 @@
+from dataclasses import dataclass
+import threading
+import time
+from typing import List, Optional, Union
+
+from graphotype import Interface, Object, SchemaCreator, SchemaError, execute, make_schema
+
+class Vehicle(Interface):
+    wheels: int
+
+class Car(Object, Vehicle):
+    wheels = 4
+    doors: int = 5
+
+class Bike(Object, Vehicle):
+    wheels = 2
+    def rider(self) -> Optional['Rider']:
+        return Rider()
+
+class Truck(Object, Vehicle):
+    wheels = 6
+
+class Rider(Object):
+    name: str = 'Eddy'
+
+class Boat(Object):
+    sails: int = 1
+
+class Plane(Object):
+    engines: int = 2
+
+Craft = Union[Boat, Plane]
+
+@dataclass
+class Route:
+    start: str
+    end: str
+
+class Garage(Object):
+    def vehicles(self) -> List[Vehicle]:
+        return [Car(), Bike()]
+
+class Query(Object):
+    def garage(self) -> Garage:
+        return Garage()
+
+    def craft(self) -> List['Craft']:
+        return [Boat(), Plane()]
+
+    def distance(self, route: Route) -> int:
+        return len(route.start) + len(route.end)
+
+def built(schema, name):
+    return 'fields' in vars(schema._type_map[name])
+
+def test_lazy():
+    schema = make_schema(Query, lazy=True)
+    # only the roots, so far
+    assert 'Garage' not in schema._type_map and not built(schema, 'Query')
+
+    result = execute(schema, '{ garage { vehicles { wheels ... on Car { doors } } } }', root=Query())
+    assert result.data == {'garage': {'vehicles': [{'wheels': 4, 'doors': 5}, {'wheels': 2}]}}
+    # implementations come with their interface, but their fields wait
+    assert built(schema, 'Garage') and built(schema, 'Car')
+    assert 'Truck' in schema._type_map and not built(schema, 'Truck')
+    # so do those of the types of Query's other fields
+    assert not built(schema, 'Boat') and not built(schema, 'Route')
+
+def test_lookup_by_name():
+    schema = make_schema(Query, lazy=True)
+    # Route is only referenced by the arguments of a field not built yet
+    result = execute(schema, 'query ($route: Route!) { distance(route: $route) }', variables={'route': {'start': 'a', 'end': 'bc'}}, root=Query())
+    assert result.data == {'distance': 3}
+    result = execute(schema, '{ garage { vehicles { ... on Bike { rider { name } } } } }', root=Query())
+    assert result.data == {'garage': {'vehicles': [{}, {'rider': {'name': 'Eddy'}}]}}
+    assert execute(schema, '{ craft { ... on Plane { engines } } }', root=Query()).data == {'craft': [{}, {'engines': 2}]}
+    assert execute(schema, '{ craft { ... on Glider { wings } } }', root=Query()).errors
+
+def test_same_as_eager():
+    lazy = make_schema(Query, lazy=True)
+    assert lazy.print_schema() == make_schema(Query).print_schema()
+    assert set(lazy._type_map) == set(make_schema(Query).get_type_map())
+
+def test_schema_errors_when_reached():
+    class BadQuery(Object):
+        fine: int = 1
+        def bad(self) -> Union[int, str]:
+            return 1
+
+    schema = make_schema(BadQuery, lazy=True)
+    try:
+        execute(schema, '{ fine }')
+    except SchemaError:
+        pass
+    else:
+        assert False, 'expected a SchemaError'
+
+def test_concurrent_first_operations(monkeypatch):
+    calls: List[str] = []
+    map_fields = SchemaCreator.map_fields
+    def counting(self, cls):
+        calls.append(cls.__name__)
+        # give other threads the chance to build the same fields
+        time.sleep(0.01)
+        return map_fields(self, cls)
+    monkeypatch.setattr(SchemaCreator, 'map_fields', counting)
+
+    schema = make_schema(Query, lazy=True)
+    barrier = threading.Barrier(8)
+    results = []
+    def run():
+        barrier.wait()
+        results.append(execute(schema, '{ garage { vehicles { wheels } } craft { ... on Boat { sails } } }', root=Query()))
+    threads = [threading.Thread(target=run) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert all(r.data == {'garage': {'vehicles': [{'wheels': 4}, {'wheels': 2}]}, 'craft': [{'sails': 1}, {}]} for r in results)
+    assert sorted(calls) == sorted(set(calls))
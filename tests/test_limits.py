@@ -0,0 +1,132 @@
+import json
+from typing import Iterator, List
+
+import pytest
+
+from graphotype import execute, make_schema, Object
+from graphotype.limits import Limits
+
+class Droid(Object):
+    def __init__(self, name: str) -> None:
+        self._name = name
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    def friends(self, n: int) -> List['Droid']:
+        return [Droid(f'{self._name}-{i}') for i in range(n)]
+
+class Query(Object):
+    def droids(self, n: int) -> List[Droid]:
+        return [Droid(f'R{i}') for i in range(n)]
+
+    def names(self, n: int) -> List[str]:
+        return ['Luke Skywalker'] * n
+
+    def nums(self, n: int) -> Iterator[int]:
+        return iter(range(n))
+
+    def generated(self, n: int) -> Iterator[Droid]:
+        for i in range(n):
+            produced.append(i)
+            yield Droid(f'G{i}')
+
+produced: List[int] = []
+
+schema = make_schema(Query)
+
+def test_usage():
+    limits = Limits(memory_sample_rate=1.0)
+    result = execute(schema, '{ droids(n: 3) { name } }', Query(), limits=limits)
+    assert result.data == {'droids': [{'name': 'R0'}, {'name': 'R1'}, {'name': 'R2'}]}
+    usage = result.extensions['usage']
+    # droids, its 3 items and their names
+    assert usage['nodes'] == 7
+    encoded = json.dumps(result.data, separators=(',', ':'))
+    assert abs(usage['bytes'] - len(encoded)) <= 4
+    assert usage['allocated'] > 0 and usage['blocks'] > 0 and usage['peak'] > 0
+    assert all(line['size'] > 0 for line in usage['top'])
+
+def test_no_usage_unsampled():
+    result = execute(schema, '{ droids(n: 3) { name } }', Query(), limits=Limits(max_nodes=100))
+    assert result.data and not result.errors
+    assert 'usage' not in result.extensions
+
+@pytest.mark.parametrize('limits, message', [
+    (Limits(max_nodes=50), 'The result exceeds the limit of 50 nodes'),
+    (Limits(max_bytes=1000), 'The result exceeds the limit of 1000 bytes'),
+])
+def test_limits(limits, message):
+    result = execute(schema, '{ droids(n: 10) { name friends(n: 10) { name } } }', Query(), limits=limits)
+    assert result.data is None
+    assert [e.message for e in result.errors] == [message]
+    assert result.errors[0].extensions == {'code': 'RESULT_TOO_LARGE'}
+
+def test_scalar_lists():
+    limits = Limits(max_bytes=1000)
+    assert not execute(schema, '{ names(n: 10) }', Query(), limits=limits).errors
+    result = execute(schema, '{ names(n: 1000) }', Query(), limits=limits)
+    assert result.data is None and len(result.errors) == 1
+
+def test_lazy_lists():
+    limits = Limits(max_nodes=1000, memory_sample_rate=1.0)
+    result = execute(schema, '{ nums(n: 10) }', Query(), limits=limits)
+    assert result.data == {'nums': list(range(10))}
+    assert result.extensions['usage']['nodes'] == 11
+    encoded = json.dumps(result.data, separators=(',', ':'))
+    assert abs(result.extensions['usage']['bytes'] - len(encoded)) <= 4
+    result = execute(schema, '{ nums(n: 100000) }', Query(), limits=Limits(max_nodes=1000))
+    assert result.data is None
+    assert [e.message for e in result.errors] == ['The result exceeds the limit of 1000 nodes']
+    # stops asking for more once over the limit
+    produced.clear()
+    result = execute(schema, '{ generated(n: 100000) { name } }', Query(), limits=Limits(max_nodes=1000))
+    assert result.data is None and len(result.errors) == 1
+    assert len(produced) < 1000
+
+def test_dedupe_hits_count():
+    # the second alias is answered by dedupe, but still adds to the result
+    query = '{ a: droids(n: 30) { name } b: droids(n: 30) { name } }'
+    assert not execute(schema, query, Query(), limits=Limits(max_nodes=200)).errors
+    assert execute(schema, query, Query(), limits=Limits(max_nodes=100)).errors
+
+def test_server():
+    pytest.importorskip('flask_graphql')
+    from graphotype.server import make_app
+    client = make_app(schema, root_value=Query(), limits=Limits(max_nodes=100)).test_client()
+    response = client.post('/', json={'query': '{ names(n: 10) }'})
+    assert response.json == {'data': {'names': ['Luke Skywalker'] * 10}}
+    response = client.post('/', json={'query': '{ names(n: 1000) }'})
+    assert response.status_code == 200
+    assert response.json['data'] is None
+    assert response.json['errors'][0]['message'] == 'The result exceeds the limit of 100 nodes'
+
+def test_other_formats():
+    from graphotype.crunch import execute_crunched
+    from graphotype.incremental import execute_incremental
+    from graphotype.streaming import execute_streaming
+    limits = Limits(max_nodes=100)
+    message = 'The result exceeds the limit of 100 nodes'
+    query = '{ droids(n: 10) { name friends(n: 10) { name } } }'
+    result = execute_crunched(schema, query, Query(), limits=limits)
+    assert result['data'] is None and [e['message'] for e in result['errors']] == [message]
+    payloads = list(execute_incremental(schema, query, Query(), limits=limits))
+    assert payloads[0]['data'] is None and [e['message'] for e in payloads[0]['errors']] == [message]
+    payloads = list(execute_incremental(schema, '{ nums(n: 3) ... @defer { more: nums(n: 1000) } }', Query(), limits=limits))
+    assert payloads[0] == {'data': {'nums': [0, 1, 2]}, 'hasNext': True}
+    assert [e['message'] for e in payloads[-1]['errors']] == [message] and not payloads[-1]['hasNext']
+    streamed = json.loads(''.join(execute_streaming(schema, '{ nums(n: 100000) }', Query(), limits=limits)))
+    assert len(streamed['data']['nums']) < 100
+    assert [e['message'] for e in streamed['errors']] == [message]
+
+def test_server_other_formats():
+    pytest.importorskip('flask_graphql')
+    from graphotype.server import make_app
+    query = {'query': '{ names(n: 1000) }'}
+    client = make_app(schema, root_value=Query(), limits=Limits(max_nodes=100)).test_client()
+    response = client.post('/', json=query, headers={'X-GraphQL-Crunch': '1'})
+    assert response.json['data'] is None and len(response.json['errors']) == 1
+    client = make_app(schema, root_value=Query(), limits=Limits(max_nodes=100), stream=True).test_client()
+    response = client.post('/', json={'query': '{ nums(n: 1000) }'})
+    assert len(response.json['data']['nums']) < 1000 and len(response.json['errors']) == 1
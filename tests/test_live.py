@@ -0,0 +1,125 @@
+import asyncio
+import base64
+import json
+import os
+from typing import Dict, List
+
+import pytest
+from graphql import parse
+
+import graphotype
+from graphotype import make_schema, Object
+from graphotype.live import apply_patch, diff, is_live, live
+from graphotype.websocket import OP_TEXT, encode_frame, read_frame, serve
+
+users: Dict[int, str] = {1: 'ann', 2: 'bob'}
+tags: List[str] = ['a']
+
+class User(Object):
+    def __init__(self, id: int) -> None:
+        self.id = id
+
+    @property
+    def name(self) -> str:
+        return users[self.id]
+
+class Query(Object):
+    def users(self) -> List[User]:
+        return [User(id) for id in sorted(users)]
+
+    def tags(self) -> List[str]:
+        return list(tags)
+
+schema = make_schema(Query)
+
+@pytest.mark.parametrize('old,new', [
+    ({'a': 1, 'b': [1, 2, 3]}, {'a': 2, 'b': [1, 3], 'c': None}),
+    ({'a': [{'x': 1}]}, {'a': [{'x': 1}, {'x': 2}]}),
+    ({'a/b': {'~': 1}}, {'a/b': {'~': 2}}),
+    ([1], {'a': 1}),
+    ({'a': 1}, {'a': 1.0}),
+])
+def test_diff(old, new):
+    patched = apply_patch(old, diff(old, new))
+    assert patched == new
+    assert json.dumps(patched) == json.dumps(new)
+
+def test_diff_is_minimal():
+    assert diff({'a': 1, 'b': 2}, {'a': 1, 'b': 3}) == [{'op': 'replace', 'path': '/b', 'value': 3}]
+    assert diff({'a': 1}, {'a': 1}) == []
+
+def test_is_live():
+    assert is_live(parse('query @live { users { name } }'))
+    assert not is_live(parse('{ users { name } }'))
+
+async def next_result(results) -> dict:
+    return await asyncio.wait_for(results.__anext__(), 5)
+
+def test_live():
+    async def run():
+        results = live(schema, 'query @live { users { name } }')
+        first = await next_result(results)
+        assert first == {'data': {'users': [{'name': 'ann'}, {'name': 'bob'}]}, 'revision': 0}
+        # untouched types don't cause re-execution
+        graphotype.invalidate('Tag')
+        users[2] = 'bea'
+        graphotype.invalidate('User')
+        second = await next_result(results)
+        await results.aclose()
+        return first, second
+    first, second = asyncio.run(run())
+    assert second == {'patch': [{'op': 'replace', 'path': '/data/users/1/name', 'value': 'bea'}], 'revision': 1}
+    assert apply_patch(first, second['patch'])['data']['users'][1] == {'name': 'bea'}
+
+def test_live_from_other_thread():
+    async def run():
+        results = live(schema, '{ tags }')
+        await next_result(results)
+        loop = asyncio.get_running_loop()
+        def change():
+            tags.append('b')
+            graphotype.invalidate('Query')
+        await loop.run_in_executor(None, change)
+        patch = await next_result(results)
+        await results.aclose()
+        return patch
+    assert asyncio.run(run()) == {'patch': [{'op': 'add', 'path': '/data/tags/1', 'value': 'b'}], 'revision': 1}
+
+def test_invalid():
+    async def run():
+        return [result async for result in live(schema, '{ nope }')]
+    [result] = asyncio.run(run())
+    assert result['errors']
+
+def test_websocket():
+    async def run():
+        server = await serve(schema, port=0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        key = base64.b64encode(os.urandom(16)).decode()
+        writer.write((
+            'GET / HTTP/1.1\r\nHost: localhost\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n'
+            f'Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n'
+        ).encode())
+        await reader.readuntil(b'\r\n\r\n')
+        async def send(message):
+            writer.write(encode_frame(OP_TEXT, json.dumps(message).encode(), mask=os.urandom(4)))
+            await writer.drain()
+        async def receive():
+            fin, opcode, payload = await asyncio.wait_for(read_frame(reader), 5)
+            return json.loads(payload)
+        await send({'type': 'connection_init'})
+        await receive()
+        await send({'id': 'q', 'type': 'subscribe', 'payload': {'query': 'query @live { users { name } }'}})
+        first = await receive()
+        users[1] = 'amy'
+        graphotype.invalidate('User')
+        second = await receive()
+        await send({'id': 'q', 'type': 'complete'})
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return first, second
+    first, second = asyncio.run(run())
+    assert first['type'] == 'next' and first['payload']['revision'] == 0
+    assert second['payload'] == {'patch': [{'op': 'replace', 'path': '/data/users/0/name', 'value': 'amy'}], 'revision': 1}
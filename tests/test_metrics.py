@@ -0,0 +1,78 @@
+from typing import List, Optional
+
+import pytest
+
+from graphotype import execute, make_schema, Object
+from graphotype.metrics import Histogram, Metrics
+
+class Item(Object):
+    n: int
+
+    def __init__(self, n: int) -> None:
+        self.n = n
+
+    @property
+    def double(self) -> int:
+        return self.n * 2
+
+    def fail(self) -> Optional[int]:
+        raise ValueError('nope')
+
+class Query(Object):
+    def items(self, count: int) -> List[Item]:
+        return [Item(n) for n in range(count)]
+
+def test_histogram():
+    histogram = Histogram([0.1, 1])
+    for value in [0.05, 0.1, 0.5, 2]:
+        histogram.observe(value)
+    assert histogram.counts == [2, 1, 1]
+    assert histogram.count == 4
+
+def test_uninstrumented():
+    schema = make_schema(Query)
+    assert schema.metrics is None
+    assert execute(schema, '{ items(count: 1) { double } }', Query()).data == {'items': [{'double': 0}]}
+
+def test_fields():
+    metrics = Metrics()
+    schema = make_schema(Query, metrics=metrics)
+    result = execute(schema, '{ items(count: 3) { double n fail } }', Query())
+    assert result.errors
+    assert metrics.field('Query', 'items').calls == 1
+    assert metrics.field('Item', 'double').calls == 3
+    assert metrics.field('Item', 'fail').snapshot()[0] == 3
+    assert metrics.field('Item', 'double').snapshot()[0] == 0
+
+def test_phases():
+    metrics = Metrics()
+    schema = make_schema(Query, metrics=metrics)
+    execute(schema, 'query Items { items(count: 1) { n } }', Query(), operation_name='Items')
+    execute(schema, '{ nope }', Query())
+    assert {key: h.count for key, h in metrics.operations.items()} == {
+        ('parse', 'Items'): 1, ('validate', 'Items'): 1, ('execute', 'Items'): 1,
+        ('parse', ''): 1, ('validate', ''): 1,
+    }
+
+def test_render():
+    metrics = Metrics(buckets=[1])
+    schema = make_schema(Query, metrics=metrics)
+    # deduplicated resolutions don't call the resolver
+    execute(schema, '{ a: items(count: 1) { n } b: items(count: 1) { n } }', Query())
+    text = metrics.render()
+    assert 'graphotype_field_calls_total{type="Query",field="items"} 1\n' in text
+    assert 'graphotype_field_duration_seconds_bucket{type="Query",field="items",le="+Inf"} 1\n' in text
+    assert 'graphotype_field_calls_total{type="Item",field="double"}' not in text
+    assert 'graphotype_operation_duration_seconds_count{phase="execute",operation=""} 1\n' in text
+    assert 'graphotype_dedupe_hits_total ' in text
+
+def test_server():
+    pytest.importorskip('flask_graphql')
+    from graphotype.server import make_app
+    schema = make_schema(Query, metrics=Metrics())
+    client = make_app(schema, root_value=Query()).test_client()
+    client.post('/', json={'query': '{ items(count: 2) { n } }'})
+    response = client.get('/metrics')
+    assert response.content_type.startswith('text/plain; version=0.0.4')
+    assert 'graphotype_field_calls_total{type="Query",field="items"} 1' in response.get_data(as_text=True)
+    assert make_app(make_schema(Query)).test_client().get('/metrics').status_code == 404
@@ -0,0 +1,78 @@
+import io
+import json
+import time
+from typing import List
+
+import pytest
+from graphql import parse
+
+from graphotype import execute, make_schema, Object
+from graphotype.querylog import QueryStats, SlowQueryLog, fingerprint, normalize, percentile
+
+@pytest.mark.parametrize('a,b', [
+    ('{ hero(first: 1) { id name } }', 'query { hero(first: 2) { name id } }'),
+    ('{ x: hero { name } }', '{ hero { name } }'),
+    ('{ hero { ...F } } fragment F on Character { name }', '{ hero { ... on Character { name } } }'),
+    ('query Q($b: Int, $a: String = "x") { f(a: $a, b: $b) }', 'query Q($a: String, $b: Int) { f(b: $b, a: $a) }'),
+    ('{ f(s: "abc", l: [1, 2], o: {a: 1}) }', '{ f(s: "", l: [], o: {}) }'),
+])
+def test_same_shape(a, b):
+    assert normalize(parse(a)) == normalize(parse(b))
+
+@pytest.mark.parametrize('a,b', [
+    ('query A { hero { name } }', 'query B { hero { name } }'),
+    ('{ hero(episode: JEDI) { name } }', '{ hero(episode: EMPIRE) { name } }'),
+    ('{ hero { name } }', '{ hero { id } }'),
+])
+def test_different_shape(a, b):
+    assert fingerprint(normalize(parse(a))) != fingerprint(normalize(parse(b)))
+
+def test_normalize():
+    document = parse('query Hero { b: hero(episode: JEDI, first: 3) { ...F } } fragment F on Character { name id }')
+    assert normalize(document) == 'query Hero { hero(episode: JEDI, first: 0) { ... on Character { id name } } }'
+    assert normalize(document, 'Nope') is None
+    # cycles are cut rather than recursed into forever
+    assert normalize(parse('{ a { ...F } } fragment F on A { b ...F }')) == '{ a { ... on A { b } } }'
+
+def test_stats():
+    assert percentile([1, 2, 3, 4], 50) == 2
+    assert percentile([1, 2, 3, 4], 99) == 4
+    stats = QueryStats(window=3, max_fingerprints=2)
+    for seconds in [5, 1, 2, 3]:
+        stats.observe('a', seconds)
+    assert stats.percentiles('a') == {'p50': 2, 'p95': 3, 'p99': 3}
+    assert stats.count('a') == 4
+    stats.observe('b', 1)
+    stats.observe('c', 1)
+    assert stats.percentiles('a') == {} and stats.count('b') == 1
+
+class Query(Object):
+    def fast(self) -> int:
+        return 1
+
+    def slow(self, n: int) -> List[int]:
+        time.sleep(0.02)
+        return list(range(n))
+
+schema = make_schema(Query)
+
+def test_slow_query_log():
+    out = io.StringIO()
+    log = SlowQueryLog(out, threshold=0.01)
+    assert not execute(schema, 'query Fast { fast }', Query(), operation_name='Fast', tracer=log).errors
+    assert out.getvalue() == ''
+    execute(schema, 'query Slow { fast a: slow(n: 3) }', Query(), tracer=log)
+    execute(schema, 'query Slow { slow(n: 4) fast }', Query(), tracer=log)
+    lines = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert len(lines) == 2
+    assert lines[0]['fingerprint'] == lines[1]['fingerprint']
+    assert lines[1]['query'] == 'query Slow { fast slow(n: 0) }'
+    assert lines[1]['count'] == 2 and set(lines[1]['percentiles']) == {'p50', 'p95', 'p99'}
+    assert lines[0]['slowest'][0]['path'] == ['a'] and lines[0]['slowest'][0]['field'] == 'Query.slow'
+    assert len(lines[0]['slowest']) == 2
+
+def test_invalid():
+    out = io.StringIO()
+    log = SlowQueryLog(out, threshold=0)
+    execute(schema, '{ nope', tracer=log)
+    assert out.getvalue() == ''
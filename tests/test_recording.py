@@ -0,0 +1,120 @@
+import gzip
+import json
+from dataclasses import dataclass
+import time
+from typing import List, Optional
+
+import pytest
+
+from graphotype import execute, make_schema, Object
+from graphotype.__main__ import main
+from graphotype.recording import Recorder, compare, format_comparison, load, redact, replay
+
+@dataclass
+class Login:
+    user: str
+    password: str
+
+class Query(Object):
+    def names(self, n: int) -> List[str]:
+        return ['Luke Skywalker'] * n
+
+    def sleep(self, seconds: float) -> bool:
+        time.sleep(seconds)
+        return True
+
+    def login(self, login: Login) -> Optional[str]:
+        return login.user
+
+schema = make_schema(Query)
+
+def test_redact():
+    variables = {'login': {'user': 'luke', 'password': 'hunter2'}, 'n': 3, 'flags': [True], 'secrets': ['a', 1]}
+    assert redact(variables, {'password', 'secrets'}) == {
+        'login': {'user': 'luke', 'password': ''}, 'n': 3, 'flags': [True], 'secrets': ['', 0]
+    }
+
+def test_record(tmp_path):
+    path = str(tmp_path / 'capture.jsonl.gz')
+    recorder = Recorder(path, redact=['password'])
+    query = 'query Login($login: Login!) { login(login: $login) }'
+    for user in ['luke', 'leia']:
+        variables = {'login': {'user': user, 'password': 'hunter2'}}
+        assert execute(schema, query, variables=variables, recorder=recorder).data == {'login': user}
+    execute(schema, '{ names(n: 1) }', recorder=recorder)
+    recorder.close()
+    with gzip.open(path, 'rt') as f:
+        entries = [json.loads(line) for line in f]
+    assert [e['type'] for e in entries] == ['start', 'document', 'operation', 'operation', 'document', 'operation']
+    assert entries[1]['document'] == query
+    assert entries[3]['hash'] == entries[1]['hash']
+    assert entries[3]['variables'] == {'login': {'user': 'leia', 'password': ''}}
+    assert entries[2]['operation'] is None and entries[2]['duration'] > 0 and entries[2]['errors'] == 0
+    assert entries[2]['at'] <= entries[3]['at'] <= entries[5]['at']
+
+    operations = load(path)
+    assert [o.variables['login']['user'] for o in operations[:2]] == ['luke', 'leia']
+    assert operations[2].document == '{ names(n: 1) }'
+
+def test_sampling(tmp_path):
+    path = str(tmp_path / 'capture.jsonl.gz')
+    recorder = Recorder(path, sample_rate=0.0)
+    execute(schema, '{ names(n: 1) }', recorder=recorder)
+    recorder.close()
+    assert load(path) == []
+
+def test_appended(tmp_path):
+    path = str(tmp_path / 'capture.jsonl.gz')
+    for n in [1, 2]:
+        recorder = Recorder(path)
+        execute(schema, f'{{ names(n: {n}) }}', recorder=recorder)
+        recorder.close()
+    first, second = load(path)
+    assert first.document == '{ names(n: 1) }' and second.document == '{ names(n: 2) }'
+    assert first.at <= second.at
+
+def test_replay(tmp_path):
+    path = str(tmp_path / 'capture.jsonl.gz')
+    recorder = Recorder(path)
+    start = time.perf_counter()
+    for _ in range(3):
+        execute(schema, 'query Sleep { sleep(seconds: 0.02) }', operation_name='Sleep', recorder=recorder)
+    execute(schema, '{ names(n: 1) }', recorder=recorder)
+    recorded = time.perf_counter() - start
+    recorder.close()
+
+    operations = load(path)
+    start = time.perf_counter()
+    replayed = replay(schema, operations, speed=1.0)
+    # the last operation waits for its time
+    assert time.perf_counter() - start >= operations[-1].at - operations[0].at
+    assert all(r.errors == 0 for r in replayed)
+    start = time.perf_counter()
+    replay(schema, operations, speed=0, concurrency=4)
+    assert time.perf_counter() - start < recorded
+
+    [sleep, names] = compare(replayed)
+    assert sleep.name == 'Sleep' and len(sleep.replayed) == 3 and min(sleep.replayed) >= 0.02
+    assert names.name != 'Sleep' and len(names.recorded) == 1
+    assert format_comparison([sleep, names]).splitlines()[1].startswith('Sleep ')
+
+def test_cli(tmp_path):
+    path = str(tmp_path / 'capture.jsonl.gz')
+    recorder = Recorder(path)
+    execute(schema, 'query Names { names(n: 3) }', recorder=recorder)
+    recorder.close()
+    output = tmp_path / 'out.json'
+    main(['replay', 'tests.test_recording:schema', path, '--speed', '0', '--json', '-o', str(output)])
+    [result] = json.loads(output.read_text())
+    assert result['operation'] == 'Names' and result['count'] == 1 and result['replayed_errors'] == 0
+
+def test_server(tmp_path):
+    pytest.importorskip('flask_graphql')
+    from graphotype.server import make_app
+    path = str(tmp_path / 'capture.jsonl.gz')
+    recorder = Recorder(path)
+    client = make_app(schema, root_value=Query(), recorder=recorder).test_client()
+    client.post('/', json={'query': 'query Names($n: Int!) { names(n: $n) }', 'variables': {'n': 2}})
+    recorder.close()
+    [operation] = load(path)
+    assert operation.operation_name is None and operation.variables == {'n': 2}
@@ -0,0 +1,115 @@
+from datetime import datetime
+import threading
+from typing import Any, List
+
+import pytest
+
+from graphotype import Interface, Object, Scalar, SchemaCreator, TypeRegistry, execute, make_schema
+
+class Timestamp(Scalar[datetime]):
+    t = datetime
+
+    @classmethod
+    def parse(cls, value: Any) -> datetime:
+        return datetime.fromtimestamp(value)
+
+    @classmethod
+    def serialize(cls, instance: datetime) -> Any:
+        return int(instance.timestamp())
+
+class IsoDate(Scalar[datetime]):
+    t = datetime
+
+    @classmethod
+    def parse(cls, value: Any) -> datetime:
+        return datetime.fromisoformat(value)
+
+    @classmethod
+    def serialize(cls, instance: datetime) -> Any:
+        return instance.date().isoformat()
+
+class Pet(Interface):
+    name: str
+
+class Cat(Object, Pet):
+    name = 'Tom'
+
+class Account(Object):
+    id: int = 1
+    created: datetime = datetime(2020, 1, 2)
+
+class Invoice(Object):
+    total: float = 9.5
+    def account(self) -> Account:
+        return Account()
+
+class PublicQuery(Object):
+    def account(self) -> Account:
+        return Account()
+
+class AdminQuery(Object):
+    def account(self) -> Account:
+        return Account()
+
+    def invoices(self) -> List[Invoice]:
+        return [Invoice()]
+
+    def pets(self) -> List[Pet]:
+        return [Cat()]
+
+def test_shared():
+    registry = TypeRegistry()
+    public = make_schema(PublicQuery, scalars=[Timestamp], registry=registry)
+    admin = make_schema(AdminQuery, scalars=[Timestamp], registry=registry)
+    assert admin.get_type('Account') is public.get_type('Account')
+    assert make_schema(PublicQuery, scalars=[Timestamp]).get_type('Account') is not public.get_type('Account')
+    # each schema has only the types it reaches
+    assert 'Cat' in admin.get_type_map() and 'Invoice' in admin.get_type_map()
+    assert 'Cat' not in public.get_type_map() and 'Invoice' not in public.get_type_map()
+
+    created = int(datetime(2020, 1, 2).timestamp())
+    assert execute(public, '{ account { created } }', root=PublicQuery()).data == {'account': {'created': created}}
+    result = execute(admin, '{ invoices { account { created } } pets { name } }', root=AdminQuery())
+    assert result.data == {'invoices': [{'account': {'created': created}}], 'pets': [{'name': 'Tom'}]}
+
+def test_scalars_isolated():
+    registry = TypeRegistry()
+    timestamps = make_schema(PublicQuery, scalars=[Timestamp], registry=registry)
+    dates = make_schema(PublicQuery, scalars=[IsoDate], registry=registry)
+    assert dates.get_type('Account') is not timestamps.get_type('Account')
+    assert execute(dates, '{ account { created } }', root=PublicQuery()).data == {'account': {'created': '2020-01-02'}}
+    assert make_schema(AdminQuery, scalars=[IsoDate], registry=registry).get_type('Account') is dates.get_type('Account')
+
+def test_frozen():
+    registry = TypeRegistry()
+    admin = make_schema(AdminQuery, scalars=[Timestamp], registry=registry, freeze=True)
+    public = make_schema(PublicQuery, scalars=[Timestamp], registry=registry, freeze=True)
+    assert public.get_type('Account') is admin.get_type('Account')
+    assert set(public.get_type_map()) == set(make_schema(PublicQuery, scalars=[Timestamp]).get_type_map())
+    # an interface's implementations come along, even when already translated
+    pets = make_schema(AdminQuery, scalars=[Timestamp], registry=registry, freeze=True)
+    assert execute(pets, '{ pets { name } }', root=AdminQuery()).data == {'pets': [{'name': 'Tom'}]}
+
+def test_not_lazy():
+    with pytest.raises(ValueError):
+        make_schema(PublicQuery, registry=TypeRegistry(), lazy=True)
+
+def test_concurrent_builds(monkeypatch):
+    calls: List[str] = []
+    map_fields = SchemaCreator.map_fields
+    def counting(self, cls):
+        calls.append(cls.__name__)
+        return map_fields(self, cls)
+    monkeypatch.setattr(SchemaCreator, 'map_fields', counting)
+
+    registry = TypeRegistry()
+    schemas = []
+    def build(query):
+        schemas.append(make_schema(query, scalars=[Timestamp], registry=registry))
+    threads = [threading.Thread(target=build, args=(q,)) for q in [PublicQuery, AdminQuery] * 4]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(schema.get_type('Account')) for schema in schemas}) == 1
+    assert sorted(calls) == sorted(set(calls))
@@ -0,0 +1,91 @@
+import itertools
+import json
+from typing import Iterator, List, Optional, Union
+
+import pytest
+
+from graphotype import make_schema, execute, Object, Interface
+from graphotype.limits import MemoryMeasurement
+from graphotype.streaming import execute_streaming
+
+produced: List[int] = []
+
+class Named(Interface):
+    name: str
+
+class Row(Object, Named):
+    n: int
+    def __init__(self, n: int) -> None:
+        self.n = n
+        self.name = f'row {n}'
+
+    def squares(self) -> List[int]:
+        return [self.n * self.n]
+
+    def fails(self) -> Optional[int]:
+        raise ValueError(f'boom {self.n}')
+
+class Query(Object):
+    def rows(self, count: int) -> Iterator[Row]:
+        for n in range(count):
+            produced.append(n)
+            yield Row(n)
+
+    def unrecorded(self, count: int) -> Iterator[Row]:
+        return (Row(n) for n in range(count))
+
+    def named(self) -> List[Named]:
+        return [Row(1), Row(2)]
+
+    def greeting(self) -> str:
+        return 'hi'
+
+schema = make_schema(Query)
+
+def streamed(query: str, **kwargs) -> dict:
+    return json.loads(''.join(execute_streaming(schema, query, **kwargs)))
+
+@pytest.mark.parametrize('query', [
+    '{ greeting rows(count: 3) { n name squares } }',
+    '{ named { name ... on Row { n } } }',
+    '{ r: rows(count: 2) { fails n } }',
+    '{ rows(count: "x") { n } }',
+    '{ nope }',
+])
+def test_same_as_execute(query):
+    assert streamed(query) == execute(schema, query).to_dict()
+
+def test_lazy():
+    produced.clear()
+    chunks = execute_streaming(schema, '{ rows(count: 1000) { n } }', chunk_size=100)
+    first = next(chunks)
+    assert first.startswith('{"data":{"rows":[{"n":0}')
+    # only about a chunk's worth of rows has been produced so far
+    assert len(produced) < 20
+    rest = ''.join(chunks)
+    assert len(produced) == 1000
+    assert len(json.loads(first + rest)['data']['rows']) == 1000
+
+def test_flat_memory():
+    def peak(count: int) -> int:
+        memory = MemoryMeasurement()
+        memory.start()
+        for _ in execute_streaming(schema, f'{{ unrecorded(count: {count}) {{ n squares }} }}'):
+            pass
+        return memory.stop()['peak']
+    small = peak(5000)
+    large = peak(25000)
+    # five times the rows, but not much more memory
+    assert large < small * 1.5
+
+def test_server():
+    pytest.importorskip('flask_graphql')
+    from graphotype.server import make_app
+    client = make_app(schema, stream=True).test_client()
+    response = client.post('/', json={'query': '{ rows(count: 2) { n } }'})
+    assert response.is_streamed
+    assert response.get_json() == {'data': {'rows': [{'n': 0}, {'n': 1}]}}
+    response = client.get('/', query_string={'query': '{ greeting }'})
+    assert response.get_json() == {'data': {'greeting': 'hi'}}
+    response = client.get('/', query_string={'query': 'mutation { greeting }'})
+    assert response.status_code == 405
@@ -0,0 +1,204 @@
+import asyncio
+import base64
+import json
+import os
+from datetime import datetime
+from typing import Any, AsyncIterator, List
+
+import pytest
+from graphql import print_schema
+
+from graphotype import make_schema, Object, Scalar, SchemaError
+from graphotype.subscriptions import Subscriber, SubscriptionError, SubscriptionHub, subscribe
+from graphotype.websocket import OP_TEXT, encode_frame, read_frame, serve
+
+expensive_calls: List[int] = []
+
+class DateTime(Scalar[datetime]):
+    t = datetime
+
+    @classmethod
+    def parse(cls, value: Any) -> datetime:
+        return datetime.fromisoformat(value)
+
+    @classmethod
+    def serialize(cls, instance: datetime) -> Any:
+        # left to the encoder
+        return instance
+
+class Tick(Object):
+    def __init__(self, n: int) -> None:
+        self.n = n
+
+    def value(self) -> int:
+        return self.n
+
+    def expensive(self) -> int:
+        expensive_calls.append(self.n)
+        return self.n * 10
+
+    def stamp(self) -> datetime:
+        return datetime(2019, 1, 10, 23, 35, self.n)
+
+class Query(Object):
+    def hello(self) -> str:
+        return 'hi'
+
+class Subscription(Object):
+    async def ticks(self, count: int) -> AsyncIterator[Tick]:
+        for n in range(count):
+            await asyncio.sleep(0)
+            yield Tick(n)
+
+    async def failing(self) -> AsyncIterator[int]:
+        yield 1
+        raise ValueError('source broke')
+
+schema = make_schema(Query, subscription=Subscription, scalars=[DateTime])
+
+def test_schema():
+    printed = print_schema(schema)
+    assert 'subscription: Subscription' in printed
+    assert 'ticks(count: Int!): Tick!' in printed
+
+def test_only_async_generators():
+    class BadSubscription(Object):
+        def ticks(self) -> int:
+            return 1
+    with pytest.raises(SchemaError):
+        make_schema(Query, subscription=BadSubscription)
+    class BadQuery(Object):
+        async def ticks(self) -> AsyncIterator[int]:
+            yield 1
+    with pytest.raises(SchemaError):
+        make_schema(BadQuery)
+
+async def collect(agen) -> list:
+    return [result async for result in agen]
+
+def test_subscribe():
+    results = asyncio.run(collect(subscribe(schema, 'subscription { ticks(count: 3) { value } }')))
+    assert results == [{'data': {'ticks': {'value': n}}} for n in range(3)]
+
+def test_source_error():
+    results = asyncio.run(collect(subscribe(schema, 'subscription { failing }')))
+    assert results[0] == {'data': {'failing': 1}}
+    assert results[1]['errors'][0]['message'] == 'source broke'
+
+def test_invalid():
+    [result] = asyncio.run(collect(subscribe(schema, 'subscription { nope }')))
+    assert result['errors']
+    [result] = asyncio.run(collect(subscribe(schema, '{ hello }')))
+    assert 'Expected a subscription' in result['errors'][0]['message']
+
+def test_fan_out():
+    expensive_calls.clear()
+    async def run():
+        hub = SubscriptionHub(schema)
+        query = 'subscription { ticks(count: 3) { expensive } }'
+        first = hub.subscribe(query)
+        second = hub.subscribe(query)
+        other = hub.subscribe('subscription { ticks(count: 2) { value } }')
+        assert len(hub) == 2
+        return await asyncio.gather(collect(first), collect(second), collect(other))
+    first, second, other = asyncio.run(run())
+    assert first == second == [{'data': {'ticks': {'expensive': n * 10}}} for n in range(3)]
+    assert len(other) == 2
+    # resolved once per event, not once per subscriber
+    assert expensive_calls == [0, 1, 2]
+
+@pytest.mark.parametrize('policy,expected', [
+    ('drop_oldest', [2, 3]),
+    ('drop_newest', [0, 1]),
+    ('coalesce', [0, 3]),
+])
+def test_policies(policy, expected):
+    async def run():
+        subscriber = Subscriber(max_size=2, policy=policy)
+        for n in range(4):
+            subscriber.put({'n': n})
+        subscriber.close()
+        return [r['n'] async for r in subscriber], subscriber.dropped
+    assert asyncio.run(run()) == (expected, 2)
+    with pytest.raises(ValueError):
+        Subscriber(policy='block')
+
+def test_unsubscribe_stops_source():
+    async def run():
+        hub = SubscriptionHub(schema)
+        subscriber = hub.subscribe('subscription { ticks(count: 1000) { value } }')
+        await subscriber.__anext__()
+        subscriber.close()
+        await asyncio.sleep(0)
+        return len(hub)
+    assert asyncio.run(run()) == 0
+
+def test_resubscribe_before_source_stops():
+    async def run():
+        hub = SubscriptionHub(schema)
+        query = 'subscription { ticks(count: 1000) { value } }'
+        old = hub.subscribe(query)
+        await old.__anext__()
+        old.close()
+        # identical, before the old source's task has finished being cancelled
+        new = hub.subscribe(query)
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        sources = len(hub)
+        shared = hub.subscribe(query)
+        same = new._source is shared._source
+        await new.__anext__()
+        new.close()
+        shared.close()
+        return sources, same
+    assert asyncio.run(run()) == (1, True)
+
+def test_websocket():
+    async def run():
+        server = await serve(schema, port=0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        key = base64.b64encode(os.urandom(16)).decode()
+        writer.write((
+            'GET / HTTP/1.1\r\nHost: localhost\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n'
+            f'Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n'
+            'Sec-WebSocket-Protocol: graphql-transport-ws\r\n\r\n'
+        ).encode())
+        response = (await reader.readuntil(b'\r\n\r\n')).decode()
+        assert response.startswith('HTTP/1.1 101')
+        assert 'Sec-WebSocket-Protocol: graphql-transport-ws' in response
+
+        async def send(message):
+            writer.write(encode_frame(OP_TEXT, json.dumps(message).encode(), mask=os.urandom(4)))
+            await writer.drain()
+        async def receive():
+            fin, opcode, payload = await asyncio.wait_for(read_frame(reader), 5)
+            return json.loads(payload)
+
+        await send({'type': 'connection_init'})
+        assert await receive() == {'type': 'connection_ack'}
+        await send({'id': '1', 'type': 'subscribe', 'payload': {
+            'query': 'subscription($n: Int!) { ticks(count: $n) { value } }', 'variables': {'n': 2},
+        }})
+        messages = [await receive() for _ in range(3)]
+        await send({'id': '2', 'type': 'subscribe', 'payload': {'query': 'subscription { nope }'}})
+        error = await receive()
+        await send({'id': '3', 'type': 'subscribe', 'payload': {
+            'query': 'subscription { ticks(count: 1) { stamp } }',
+        }})
+        stamped = [await receive() for _ in range(2)]
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return messages, error, stamped
+    messages, error, stamped = asyncio.run(run())
+    assert messages == [
+        {'id': '1', 'type': 'next', 'payload': {'data': {'ticks': {'value': 0}}}},
+        {'id': '1', 'type': 'next', 'payload': {'data': {'ticks': {'value': 1}}}},
+        {'id': '1', 'type': 'complete'},
+    ]
+    assert error['id'] == '2' and error['type'] == 'error'
+    assert stamped == [
+        {'id': '3', 'type': 'next', 'payload': {'data': {'ticks': {'stamp': '2019-01-10T23:35:00'}}}},
+        {'id': '3', 'type': 'complete'},
+    ]
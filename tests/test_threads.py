@@ -0,0 +1,130 @@
+import threading
+import time
+from typing import List
+
+import pytest
+
+from graphotype import execution, make_schema, execute, serial, Object
+
+DELAY = 0.05
+
+class Widget(Object):
+    def __init__(self, n: int) -> None:
+        self.n = n
+
+    def slow(self) -> int:
+        time.sleep(DELAY)
+        return self.n
+
+    def double(self) -> int:
+        return self.n * 2
+
+class Query(Object):
+    def widgets(self) -> List[Widget]:
+        return [Widget(n) for n in range(4)]
+
+    def slow1(self) -> int:
+        time.sleep(DELAY)
+        return 1
+
+    def slow2(self) -> int:
+        time.sleep(DELAY)
+        return 2
+
+    def slow3(self) -> int:
+        time.sleep(DELAY)
+        return 3
+
+    def thread(self) -> str:
+        return threading.current_thread().name
+
+    @serial
+    def serialThread(self) -> str:
+        return threading.current_thread().name
+
+log: List[str] = []
+
+class Mutation(Object):
+    def first(self) -> int:
+        time.sleep(DELAY)
+        log.append('first')
+        return 1
+
+    def second(self) -> int:
+        log.append('second')
+        return 2
+
+schema = make_schema(Query, Mutation, execution='threads', max_workers=8)
+
+def test_siblings_run_concurrently():
+    start = time.monotonic()
+    result = execute(schema, '{ slow1 slow2 slow3 widgets { slow } }')
+    elapsed = time.monotonic() - start
+    assert not result.errors
+    assert result.data == {
+        'slow1': 1, 'slow2': 2, 'slow3': 3,
+        'widgets': [{'slow': n} for n in range(4)],
+    }
+    # 7 sleeps, but at most 2 levels deep
+    assert elapsed < 4 * DELAY
+
+def test_serial_fields_stay_on_calling_thread():
+    result = execute(schema, '{ thread serialThread }')
+    assert not result.errors
+    assert result.data['thread'].startswith('graphotype')
+    assert result.data['serialThread'] == threading.current_thread().name
+
+def test_mutations_in_order():
+    log.clear()
+    result = execute(schema, 'mutation { first second again: first }')
+    assert not result.errors
+    assert result.data == {'first': 1, 'second': 2, 'again': 1}
+    assert log == ['first', 'second', 'first']
+
+def test_concurrent_requests():
+    results = []
+    def run() -> None:
+        results.append(execute(schema, '{ slow1 widgets { slow } }'))
+    threads = [threading.Thread(target=run) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(results) == 8
+    assert all(not r.errors and r.data['slow1'] == 1 for r in results)
+
+def test_many_concurrent_requests():
+    errors: List[Exception] = []
+    def run() -> None:
+        try:
+            for _ in range(10):
+                result = execute(schema, '{ widgets { double a: double } thread }')
+                assert result.data['widgets'] == [{'double': n * 2, 'a': n * 2} for n in range(4)]
+        except Exception as e:
+            errors.append(e)
+    threads = [threading.Thread(target=run, daemon=True) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=10)
+    # none waits forever for a field
+    assert not any(t.is_alive() for t in threads)
+    assert not errors
+
+def test_concurrent_stats():
+    before = execution.stats.copy()
+    def run() -> None:
+        for _ in range(10):
+            execute(schema, '{ widgets { double a: double b: double c: double } }')
+    threads = [threading.Thread(target=run) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    # whether a lookup hits depends on timing, but every one is counted
+    lookups = sum(execution.stats[k] - before[k] for k in ('dedupe_hits', 'dedupe_misses'))
+    assert lookups == 8 * 10 * (1 + 4 * 4)
+
+def test_bad_mode():
+    with pytest.raises(ValueError):
+        make_schema(Query, execution='fibers')
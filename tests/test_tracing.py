@@ -0,0 +1,103 @@
+import json
+import os
+from typing import List
+
+import pytest
+
+from graphotype import cpu_bound, execute, make_schema, Object, Request
+from graphotype.tracing import Trace, Tracer
+
+class Droid(Object):
+    def __init__(self, name: str) -> None:
+        self._name = name
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @cpu_bound
+    def power(self) -> int:
+        return 3
+
+class Query(Object):
+    def droids(self) -> List[Droid]:
+        return [Droid('R2-D2'), Droid('C-3PO')]
+
+QUERY = 'query Droids { droids { name } }'
+
+@pytest.fixture(scope='module')
+def schema():
+    yield make_schema(Query, processes=0)
+
+def test_spans(schema):
+    tracer = Tracer(extensions=True)
+    result = execute(schema, QUERY, Query(), operation_name='Droids', tracer=tracer)
+    tracing = result.extensions['tracing']
+    resolvers = tracing['execution']['resolvers']
+    assert [r['path'] for r in resolvers] == [['droids'], ['droids', 0, 'name'], ['droids', 1, 'name']]
+    assert resolvers[1]['parentType'] == 'Droid' and resolvers[1]['returnType'] == 'String!'
+    assert all(0 <= r['startOffset'] <= tracing['duration'] for r in resolvers)
+    assert tracing['parsing']['duration'] > 0 and tracing['validation']['duration'] > 0
+
+def test_threads():
+    schema = make_schema(Query, execution='threads', processes=0)
+    try:
+        result = execute(schema, '{ droids { name power } }', Query(), tracer=Tracer(extensions=True))
+        assert not result.errors
+    finally:
+        schema.shutdown()
+    resolvers = result.extensions['tracing']['execution']['resolvers']
+    assert len(resolvers) == 5
+
+def test_processes():
+    schema = make_schema(Query, processes=1)
+    try:
+        tracer = Tracer()
+        request = Request(tracer=tracer)
+        assert not request.run(schema, '{ droids { power } }', Query()).errors
+    finally:
+        schema.shutdown()
+    assert [span.mode for span in request.trace.spans] == ['sync', 'async', 'async']
+
+def test_modes():
+    trace = Trace()
+    class Info:
+        path = ['a']
+        parent_type = type('T', (), {'name': 'Query'})
+        field_name = 'a'
+        return_type = 'Int'
+    assert trace.resolve(Info, lambda: 1) == 1
+    from promise import Promise
+    assert trace.resolve(Info, lambda: Promise.resolve(2)).get() == 2
+    assert [span.mode for span in trace.spans] == ['sync', 'async']
+
+def test_sampling(schema):
+    tracer = Tracer(sample_rate=0, extensions=True)
+    assert 'tracing' not in execute(schema, QUERY, Query(), tracer=tracer).extensions
+    assert Tracer(sample_rate=0).sample() is None
+
+def test_chrome(schema, tmp_path):
+    tracer = Tracer(directory=str(tmp_path))
+    execute(schema, QUERY, Query(), operation_name='Droids', tracer=tracer)
+    [name] = os.listdir(tmp_path)
+    assert name.startswith('Droids-')
+    with open(tmp_path / name) as f:
+        events = json.load(f)['traceEvents']
+    names = [e['name'] for e in events if e['ph'] == 'X']
+    assert names == ['Droids', 'parse', 'validate', 'execute', 'Query.droids', 'Droid.name', 'Droid.name']
+    assert [e['args']['path'] for e in events if e.get('cat') == 'sync'] == ['droids', 'droids.0.name', 'droids.1.name']
+
+def test_unsafe_operation_name(schema, tmp_path):
+    tracer = Tracer(directory=str(tmp_path))
+    execute(schema, QUERY, Query(), operation_name='../x', tracer=tracer)
+    [name] = os.listdir(tmp_path)
+    assert name.startswith('___x-')
+
+def test_server(schema):
+    pytest.importorskip('flask_graphql')
+    from graphotype.server import make_app
+    client = make_app(schema, root_value=Query(), tracer=Tracer(extensions=True)).test_client()
+    response = client.post('/', json={'query': QUERY})
+    body = response.get_json()
+    assert body['data'] == {'droids': [{'name': 'R2-D2'}, {'name': 'C-3PO'}]}
+    assert len(body['extensions']['tracing']['execution']['resolvers']) == 3